@@ -0,0 +1,131 @@
+"""Timing, result records and regression comparison for the benchmark suite."""
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+SCHEMA_VERSION = 1
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    name: str
+    params: Dict[str, Any]
+    samples_ms: List[float]
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        labels = ",".join(f"{name}={value}" for name, value in sorted(self.params.items()))
+        return f"{self.name}[{labels}]" if labels else self.name
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.samples_ms)
+        return {
+            "name": self.name,
+            "key": self.key,
+            "params": self.params,
+            "runs": len(samples),
+            "min_ms": round(samples[0], 3),
+            "median_ms": round(statistics.median(samples), 3),
+            "mean_ms": round(statistics.fmean(samples), 3),
+            "p95_ms": round(_quantile(samples, 0.95), 3),
+            "max_ms": round(samples[-1], 3),
+            **self.extra,
+        }
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    repeat: int = 5,
+    warmup: int = 1,
+    setup: Optional[Callable[[], Any]] = None,
+    **params: Any,
+) -> BenchmarkResult:
+    """Time ``func`` ``repeat`` times after ``warmup`` untimed runs; ``setup`` runs untimed before each call."""
+
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+    samples: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return BenchmarkResult(name=name, params=params, samples_ms=samples)
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "git_commit": _git_commit(),
+    }
+
+
+def write_report(results: List[BenchmarkResult], path: Optional[Path]) -> Dict[str, Any]:
+    report = {
+        "schema_version": SCHEMA_VERSION,
+        "environment": environment(),
+        "results": [result.summary() for result in results],
+    }
+    text = json.dumps(report, indent=2)
+    if path is None:
+        print(text)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text + "\n", encoding="utf-8")
+    return report
+
+
+def compare(report: Dict[str, Any], baseline_path: Path, threshold: float) -> List[str]:
+    """Keys whose median got slower than the baseline by more than ``threshold`` (0.2 = 20 %)."""
+
+    baseline = {
+        entry["key"]: entry for entry in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+    }
+    regressions: List[str] = []
+    for entry in report["results"]:
+        previous = baseline.get(entry["key"])
+        if previous is None or not previous["median_ms"]:
+            continue
+        ratio = entry["median_ms"] / previous["median_ms"]
+        if ratio > 1.0 + threshold:
+            regressions.append(
+                f"{entry['key']}: {previous['median_ms']:.3f} ms -> {entry['median_ms']:.3f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def _quantile(samples: List[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+__all__ = ["BenchmarkResult", "compare", "environment", "measure", "write_report"]
@@ -0,0 +1,144 @@
+"""Offline stand-ins for Tankerkönig, OpenWeather and Meteostat.
+
+Recorded payloads in ``benchmarks/fixtures`` are replayed through an
+``httpx.MockTransport``: ``list.php`` is scaled to any station count by cloning
+the recorded stations under deterministic UUIDs, ``prices.php`` answers for the
+requested IDs (a fraction of prices moves on every call, like a real cycle) and
+``onecall`` is shifted so its hourly forecast starts at the current hour.
+Meteostat is replaced by a synthetic hourly frame with the same columns.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import math
+import random
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+import pandas as pd
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+STATION_NAMESPACE = uuid.UUID("6f1c2a52-5b0e-4a53-9a8e-0d8f6c1e2b71")
+METEOSTAT_COLUMNS = ("temp", "dwpt", "rhum", "prcp", "snow", "wdir", "wspd", "wpgt", "pres", "tsun", "coco")
+
+
+def load_fixture(name: str) -> Dict[str, Any]:
+    return json.loads((FIXTURE_DIR / f"{name}.json").read_text(encoding="utf-8"))
+
+
+class FixtureUpstream:
+    """Routes requests of both upstream services to the recorded fixtures."""
+
+    def __init__(self, station_count: int, price_change_rate: float = 0.1, seed: int = 42) -> None:
+        self.station_count = station_count
+        self.price_change_rate = price_change_rate
+        self.calls: Dict[str, int] = {}
+        self._rng = random.Random(seed)
+        self._list = load_fixture("list")
+        self._prices = load_fixture("prices")
+        self._onecall = load_fixture("onecall")
+        self._templates = self._list["stations"]
+        self._ids = [str(uuid.uuid5(STATION_NAMESPACE, str(position))) for position in range(station_count)]
+        self._template_of = {station_id: position % len(self._templates) for position, station_id in enumerate(self._ids)}
+        self._current: Dict[str, Dict[str, Any]] = {}
+
+    def transport(self) -> httpx.MockTransport:
+        """Transport usable by both ``httpx.Client`` and ``httpx.AsyncClient``."""
+
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request.url.path.rsplit("/", 1)[-1]
+        self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+        if endpoint == "list.php":
+            return httpx.Response(200, json=self._list_payload(request.url.params))
+        if endpoint == "prices.php":
+            return httpx.Response(200, json=self._prices_payload(request.url.params["ids"].split(",")))
+        if endpoint == "onecall":
+            return httpx.Response(200, json=self._onecall_payload())
+        return httpx.Response(404, json={"ok": False, "message": f"unknown endpoint {endpoint}"})
+
+    def _list_payload(self, params: httpx.QueryParams) -> Dict[str, Any]:
+        lat, lng, radius_km = float(params["lat"]), float(params["lng"]), float(params["rad"])
+        stations: List[Dict[str, Any]] = []
+        for position, station_id in enumerate(self._ids):
+            station = copy.copy(self._templates[self._template_of[station_id]])
+            # Spread the clones evenly over the disc (sunflower pattern), deterministic per position.
+            distance = radius_km * math.sqrt((position + 0.5) / self.station_count)
+            angle = position * 2.399963
+            station["id"] = station_id
+            station["lat"] = round(lat + distance * math.sin(angle) / 111.32, 6)
+            station["lng"] = round(lng + distance * math.cos(angle) / (111.32 * math.cos(math.radians(lat))), 6)
+            station["dist"] = round(distance, 1)
+            stations.append(station)
+        return {**self._list, "stations": stations}
+
+    def _prices_payload(self, station_ids: List[str]) -> Dict[str, Any]:
+        recorded = list(self._prices["prices"].values())
+        prices: Dict[str, Any] = {}
+        for station_id in station_ids:
+            current = self._current.get(station_id)
+            if current is None:
+                current = copy.copy(recorded[self._template_of.get(station_id, 0) % len(recorded)])
+                self._current[station_id] = current
+            elif self._rng.random() < self.price_change_rate:
+                for fuel in ("e5", "e10", "diesel"):
+                    if isinstance(current.get(fuel), float):
+                        current[fuel] = round(current[fuel] + self._rng.choice((-0.01, 0.01)), 3)
+            prices[station_id] = dict(current)
+        return {**self._prices, "prices": prices}
+
+    def _onecall_payload(self) -> Dict[str, Any]:
+        hourly = self._onecall["hourly"]
+        start = int(datetime.now(timezone.utc).timestamp()) // 3600 * 3600
+        shift = start - hourly[0]["dt"]
+        return {**self._onecall, "hourly": [{**item, "dt": item["dt"] + shift} for item in hourly]}
+
+
+class SyntheticHourly:
+    """Quacks like ``meteostat.Hourly``: ``fetch()`` returns an hourly UTC frame."""
+
+    def __init__(self, start: datetime, end: datetime, seed: int = 7) -> None:
+        self.start = start
+        self.end = end
+        self.seed = seed
+
+    def fetch(self) -> pd.DataFrame:
+        index = pd.date_range(
+            pd.Timestamp(self.start).tz_convert("UTC").ceil("h"),
+            pd.Timestamp(self.end).tz_convert("UTC").floor("h"),
+            freq="h",
+            name="time",
+        )
+        rng = np.random.default_rng(self.seed + int(index[0].timestamp()) if len(index) else self.seed)
+        hours = index.hour.to_numpy() if len(index) else np.empty(0)
+        days = index.dayofyear.to_numpy() if len(index) else np.empty(0)
+        size = len(index)
+        frame = pd.DataFrame(
+            {
+                "temp": 9 + 8 * np.sin((days - 110) / 365 * 2 * np.pi) + 3 * np.sin((hours - 9) / 24 * 2 * np.pi)
+                + rng.normal(0, 1, size),
+                "dwpt": rng.normal(5, 3, size),
+                "rhum": rng.uniform(55, 98, size).round(),
+                "prcp": np.where(rng.random(size) < 0.15, rng.exponential(0.8, size), 0.0).round(1),
+                "snow": np.nan,
+                "wdir": rng.uniform(0, 360, size).round(),
+                "wspd": rng.gamma(2.0, 7.0, size).round(1),
+                "wpgt": np.nan,
+                "pres": rng.normal(1013, 8, size).round(1),
+                "tsun": np.nan,
+                "coco": rng.integers(1, 10, size).astype(float),
+            },
+            index=index,
+        )
+        # Meteostat leaves gaps; blank ~1 % of temperatures.
+        frame.loc[rng.random(size) < 0.01, "temp"] = np.nan
+        return frame.reindex(columns=list(METEOSTAT_COLUMNS))
+
+
+__all__ = ["FixtureUpstream", "SyntheticHourly", "load_fixture"]
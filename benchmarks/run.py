@@ -0,0 +1,302 @@
+"""Offline benchmark suite for the ingest, persistence and prediction hot paths.
+
+Usage::
+
+    python -m benchmarks.run --output benchmarks/results/latest.json
+    python -m benchmarks.run --quick --only etl,predictions
+    python -m benchmarks.run --baseline benchmarks/results/main.json --threshold 0.25
+
+Everything runs against a throwaway SQLite database in a temporary directory;
+upstream HTTP is served from recorded fixtures through ``httpx.MockTransport``
+and Meteostat is replaced by a synthetic frame, so no API key or network is
+needed. With ``--baseline`` the exit code is 1 when any median regressed by more
+than ``--threshold``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.harness import BenchmarkResult, compare, measure, write_report
+from benchmarks.mock_upstream import FixtureUpstream, SyntheticHourly
+
+SUITES = ("etl", "history", "predictions")
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "full": {
+        "stations": (10, 100, 1000),
+        "history_days": (7, 365, 5 * 365),
+        "repeat": 5,
+        "requests": 200,
+        "concurrency": 16,
+    },
+    "quick": {
+        "stations": (10, 100),
+        "history_days": (7, 365),
+        "repeat": 3,
+        "requests": 50,
+        "concurrency": 8,
+    },
+}
+
+
+def configure_environment(workdir: Path) -> None:
+    """Point every path at ``workdir`` and lift rate limits; must run before ``src`` is imported."""
+
+    os.environ.update(
+        {
+            "SQLITE_PATH": str(workdir / "benchmark.db"),
+            "MODEL_DIR": str(workdir / "models"),
+            "ARCHIVE_DIR": str(workdir / "archive"),
+            "WEATHER_CACHE_PATH": str(workdir / "weather_cache.npz"),
+            "TANKERKOENIG_API_KEY": "benchmark",
+            "OPENWEATHER_API_KEY": "benchmark",
+            "TANKERKOENIG_CALLS_PER_MINUTE": str(10**9),
+            "OPENWEATHER_CALLS_PER_MINUTE": str(10**9),
+            "UPSTREAM_BURST": str(10**6),
+            "EMBEDDED_SCHEDULER": "false",
+        }
+    )
+
+
+def reset_database() -> None:
+    from src.db import models
+    from src.db.session import SessionLocal, get_engine
+
+    models.Base.metadata.create_all(get_engine())
+    with SessionLocal() as session:
+        for table in reversed(models.Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+
+
+def offline_pipeline(upstream: FixtureUpstream, workdir: Path):
+    """An :class:`ETLPipeline` whose HTTP clients talk to the fixture transport."""
+
+    import httpx
+
+    from src.ingest.etl import ETLPipeline
+    from src.ingest.weather_cache import WeatherCache
+    from src.ingest.weather_service import WeatherService
+
+    pipeline = ETLPipeline()
+    pipeline.tk_client._client.close()
+    pipeline.tk_client._client = httpx.Client(transport=upstream.transport())
+    pipeline.async_tk_client._client = httpx.AsyncClient(transport=upstream.transport())
+    # TTL 0: every capture goes upstream instead of being answered by the weather cache.
+    weather = WeatherService(cache=WeatherCache(workdir / "weather_cache.npz", ttl_seconds=0))
+    weather.ow_client._client.close()
+    weather.ow_client._client = httpx.Client(transport=upstream.transport())
+    pipeline.weather_service = weather
+    return pipeline
+
+
+def _with_calls(upstream: FixtureUpstream, run: Callable[[], BenchmarkResult]) -> BenchmarkResult:
+    before = dict(upstream.calls)
+    result = run()
+    total_runs = len(result.samples_ms) + 1  # + warm-up
+    result.extra["upstream_calls_per_run"] = {
+        endpoint: round((count - before.get(endpoint, 0)) / total_runs, 2)
+        for endpoint, count in upstream.calls.items()
+        if count != before.get(endpoint, 0)
+    }
+    return result
+
+
+def bench_etl(profile: Dict[str, Any], workdir: Path) -> List[BenchmarkResult]:
+    from src.db.session import SessionLocal
+
+    results: List[BenchmarkResult] = []
+    for count in profile["stations"]:
+        reset_database()
+        upstream = FixtureUpstream(count)
+        pipeline = offline_pipeline(upstream, workdir)
+        repeat = profile["repeat"]
+        with SessionLocal() as session:
+            results.append(
+                _with_calls(
+                    upstream,
+                    lambda: measure("etl.sync_stations", lambda: pipeline.sync_stations(session), repeat, stations=count),
+                )
+            )
+            results.append(
+                _with_calls(
+                    upstream,
+                    lambda: measure("etl.capture_prices", lambda: pipeline.capture_prices(session), repeat, stations=count),
+                )
+            )
+            results.append(
+                _with_calls(
+                    upstream,
+                    lambda: measure(
+                        "etl.capture_weather", lambda: pipeline.capture_weather(session), repeat, stations=count
+                    ),
+                )
+            )
+    return results
+
+
+def bench_history(profile: Dict[str, Any]) -> List[BenchmarkResult]:
+    from src.db import models
+    from src.db.session import SessionLocal
+    from src.ingest.weather_history import HistoricalWeatherIngestor
+
+    class SyntheticHistoryIngestor(HistoricalWeatherIngestor):
+        def fetch_hourly(self, start: datetime, end: datetime) -> SyntheticHourly:
+            return SyntheticHourly(start, end)
+
+    def clear_weather() -> None:
+        with SessionLocal() as session:
+            session.execute(models.WeatherSnapshot.__table__.delete())
+            session.commit()
+
+    reset_database()
+    ingestor = SyntheticHistoryIngestor()
+    results: List[BenchmarkResult] = []
+    for days in profile["history_days"]:
+        result = measure(
+            "history.backfill",
+            lambda: ingestor.backfill(days),
+            repeat=max(1, profile["repeat"] - (2 if days > 365 else 0)),
+            setup=clear_weather,
+            days=days,
+        )
+        result.extra["rows"] = days * 24
+        results.append(result)
+        # Re-running over stored data exercises the anti-join path only.
+        result = measure("history.backfill_existing", lambda: ingestor.backfill(days), repeat=profile["repeat"], days=days)
+        results.append(result)
+    return results
+
+
+def bench_predictions(profile: Dict[str, Any], workdir: Path) -> List[BenchmarkResult]:
+    from src.db.session import SessionLocal
+
+    count = max(profile["stations"])
+    reset_database()
+    upstream = FixtureUpstream(count)
+    pipeline = offline_pipeline(upstream, workdir)
+    with SessionLocal() as session:
+        pipeline.sync_stations(session)
+        for _ in range(12):  # one hour of 5-minute captures
+            pipeline.capture_prices(session)
+        pipeline.capture_weather(session)
+    return asyncio.run(_bench_http(profile, count))
+
+
+async def _bench_http(profile: Dict[str, Any], stations: int) -> List[BenchmarkResult]:
+    import httpx
+
+    from src.api.app import app
+
+    results: List[BenchmarkResult] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+
+        async def get(params: Dict[str, Any]) -> None:
+            response = await client.get("/predictions/next24h", params=params)
+            response.raise_for_status()
+
+        async def latency(name: str, params: Dict[str, Any], requests: int, **labels: Any) -> BenchmarkResult:
+            await get(params)  # warm-up (fills the forecast cache on the first call)
+            samples: List[float] = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                await get(params)
+                samples.append((time.perf_counter() - started) * 1000.0)
+            return BenchmarkResult(name=name, params={"stations": stations, **labels}, samples_ms=samples)
+
+        for fmt in ("rows", "columnar", "arrow"):
+            results.append(
+                await latency("api.next24h.cached", {"format": fmt}, profile["requests"], format=fmt)
+            )
+        located = {"lat": 53.56, "lng": 10.0, "radius_km": 5, "fuel_type": "diesel"}
+        results.append(await latency("api.next24h.located", located, max(10, profile["requests"] // 10)))
+        samples = []
+        for offset in range(max(10, profile["requests"] // 10)):  # a new region-cache cell per request
+            started = time.perf_counter()
+            await get({**located, "lat": 53.5 + offset * 0.01})
+            samples.append((time.perf_counter() - started) * 1000.0)
+        results.append(
+            BenchmarkResult(name="api.next24h.located.miss", params={"stations": stations}, samples_ms=samples)
+        )
+
+        concurrency, total = profile["concurrency"], profile["requests"] * 4
+        semaphore = asyncio.Semaphore(concurrency)
+        samples: List[float] = []
+
+        async def timed() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                await get({})
+                samples.append((time.perf_counter() - started) * 1000.0)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(timed() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        results.append(
+            BenchmarkResult(
+                name="api.next24h.throughput",
+                params={"stations": stations, "concurrency": concurrency},
+                samples_ms=samples,
+                extra={"requests": total, "requests_per_second": round(total / elapsed, 1)},
+            )
+        )
+    return results
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer repetitions")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma-separated suites ({', '.join(SUITES)})")
+    parser.add_argument("--output", type=Path, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--workdir", type=Path, help="scratch directory (default: a temporary directory)")
+    parser.add_argument("--baseline", type=Path, help="earlier report to compare medians against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed median slowdown (0.25 = 25 %%)")
+    parser.add_argument("--log-level", default="WARNING")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    suites = [suite.strip() for suite in args.only.split(",") if suite.strip()]
+    unknown = sorted(set(suites) - set(SUITES))
+    if unknown:
+        raise SystemExit(f"Unknown suite(s): {', '.join(unknown)}")
+    profile = PROFILES["quick" if args.quick else "full"]
+
+    with tempfile.TemporaryDirectory(prefix="benzin-bench-") as scratch:
+        workdir = args.workdir or Path(scratch)
+        workdir.mkdir(parents=True, exist_ok=True)
+        configure_environment(workdir)
+
+        from loguru import logger
+
+        logger.remove()
+        logger.add(sys.stderr, level=args.log_level)
+
+        results: List[BenchmarkResult] = []
+        if "etl" in suites:
+            results += bench_etl(profile, workdir)
+        if "history" in suites:
+            results += bench_history(profile)
+        if "predictions" in suites:
+            results += bench_predictions(profile, workdir)
+
+    report = write_report(results, args.output)
+    if args.baseline is not None:
+        regressions = compare(report, args.baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
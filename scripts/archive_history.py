@@ -0,0 +1,25 @@
+"""Compact closed days of price/weather snapshots into the Parquet archive."""
+import argparse
+
+from src.ingest.etl import ETLPipeline
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Archive closed days to Parquet")
+    parser.add_argument(
+        "--prune",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Delete archived rows from SQLite (default: ARCHIVE_PRUNE setting)",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    written = ETLPipeline().archive_history(prune=args.prune)
+    print(f"Archived {written['price_snapshots']} price rows and {written['weather_snapshots']} weather rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 """Run a Meteostat-backed historical weather import."""
 import argparse
+from datetime import datetime, timedelta, timezone
 
-from src.ingest.weather_history import HistoricalWeatherIngestor
+from src.ingest.weather_history import DEFAULT_CHUNK_SIZE, HistoricalWeatherIngestor
+
+
+def _utc_date(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
 
 
 def parse_args() -> argparse.Namespace:
@@ -10,16 +15,34 @@ def parse_args() -> argparse.Namespace:
         "--days",
         type=int,
         default=30,
-        help="Number of trailing days to backfill (default: 30)",
+        help="Number of trailing days to backfill (default: 30); ignored when --start is given",
+    )
+    parser.add_argument(
+        "--start",
+        type=_utc_date,
+        help="Start of the backfill window (ISO date, UTC), e.g. 2020-01-01",
+    )
+    parser.add_argument(
+        "--end",
+        type=_utc_date,
+        help="End of the backfill window (ISO date, UTC; default: now)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Rows per bulk INSERT statement (default: {DEFAULT_CHUNK_SIZE})",
     )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    end = args.end or datetime.now(timezone.utc)
+    start = args.start or end - timedelta(days=args.days)
     ingestor = HistoricalWeatherIngestor()
-    inserted = ingestor.backfill(days=args.days)
-    print(f"Inserted {inserted} weather rows from the last {args.days} days")
+    inserted = ingestor.backfill_range(start, end, chunk_size=args.chunk_size)
+    print(f"Inserted {inserted} weather rows between {start.date()} and {end.date()}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+"""Replay stored prices and weather to score forecasts against what actually happened."""
+import argparse
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.config.settings import get_settings
+from src.db.session import SessionLocal
+from src.models.backtest import default_config, run_backtest
+from src.models.features import last_capture
+from src.models.registry import ModelRegistry
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backtest forecasts over stored history")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="First origin (ISO, UTC)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Last origin (default: last capture minus horizon)")
+    parser.add_argument("--days", type=int, default=30, help="Window length when --start is omitted (default: 30)")
+    parser.add_argument("--horizon-hours", type=float, default=24.0, help="Forecast horizon per origin (default: 24)")
+    parser.add_argument("--every-minutes", type=int, default=60, help="Spacing of forecast origins (default: 60)")
+    parser.add_argument(
+        "--fuel-type", action="append", dest="fuel_types", help="Fuel to score (repeatable; default: FUEL_TYPES)"
+    )
+    parser.add_argument("--station", action="append", dest="station_ids", help="Restrict to a station ID (repeatable)")
+    parser.add_argument(
+        "--model",
+        action="append",
+        dest="models",
+        help="Model version to score (repeatable; default: models/LATEST if present); "
+        "the persistence baseline is always scored",
+    )
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", type=Path, help="Write the full report (by step, hour and station) as JSON")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    settings = get_settings()
+    step = timedelta(minutes=settings.prediction_interval_minutes)
+    horizon_steps = max(1, int(timedelta(hours=args.horizon_hours) / step))
+
+    end = args.end
+    if end is None:
+        with SessionLocal() as session:
+            captured = last_capture(session)
+        if captured is None:
+            raise SystemExit("No price captures stored yet")
+        end = captured - step * horizon_steps
+    start = args.start or end - timedelta(days=args.days)
+
+    models = args.models
+    if models is None:
+        latest = ModelRegistry().latest_version()
+        models = [latest] if latest else []
+
+    config = default_config(
+        start,
+        end,
+        horizon_steps=horizon_steps,
+        origin_every=max(1, int(timedelta(minutes=args.every_minutes) / step)),
+        fuel_types=args.fuel_types,
+        station_ids=args.station_ids,
+        model_versions=models,
+    )
+    report = run_backtest(config, workers=args.workers).to_dict()
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print(f"{report['origins']} origins from {report['start']} to {report['end']} in {report['elapsed_seconds']}s")
+    for name, scores in report["models"].items():
+        print(f"{name}: MAE {_fmt(scores['mae'])}  RMSE {_fmt(scores['rmse'])}  ({scores['count']} points)")
+        hourly = [row for row in scores["by_step"] if (row["step"] + 1) % int(timedelta(hours=1) / step) == 0]
+        for row in hourly:
+            print(f"  +{row['lead_minutes'] / 60:>4.0f}h  MAE {_fmt(row['mae'])}  RMSE {_fmt(row['rmse'])}")
+
+
+def _fmt(value) -> str:
+    return "n/a" if value is None else f"{value:.4f}"
+
+
+if __name__ == "__main__":
+    main()
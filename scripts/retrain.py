@@ -1,9 +1,41 @@
 """Trigger AutoML retraining manually."""
+import argparse
+import json
+
+from src.config.settings import get_settings
+from src.models.partitions import PARTITION_KINDS, PartitionedTrainer
 from src.models.train import AutoMLTrainer
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--partitions",
+        choices=PARTITION_KINDS,
+        help="train per-partition models (fuel, brand or station) instead of the global model",
+    )
+    parser.add_argument("--force", action="store_true", help="retrain partitions even if their data did not change")
+    return parser.parse_args()
+
+
 def main() -> None:
-    AutoMLTrainer().retrain()
+    args = parse_args()
+    if args.partitions:
+        settings = get_settings().model_copy(update={"train_partition_by": args.partitions})
+        result = PartitionedTrainer(settings).run(force=args.force)
+        print(json.dumps(result, indent=2))
+        if result is not None and result["failed"]:
+            raise SystemExit(f"{len(result['failed'])} partition(s) failed; see log output")
+        return
+
+    trainer = AutoMLTrainer()
+    try:
+        result = trainer.retrain()
+    finally:
+        trainer.close()
+    if result is None:
+        raise SystemExit("Retraining did not produce a model; see log output")
+    print(json.dumps(result, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,40 +1,271 @@
+"""FastAPI application.
+
+Importing this module only defines routes: the database engine, model registry,
+forecast cache, scheduler and (when embedded) the ingest worker are created in
+the lifespan handler. Loading the price state and the model and warming the
+forecast cache run as a background task, so the worker accepts connections
+right away and reports ``/health/ready`` once the first forecast is cached.
+Heavy libraries (pandas, pyarrow, Meteostat, AutoGluon) are imported on first
+use.
+"""
 from __future__ import annotations
 
+import asyncio
+import signal
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from fastapi import FastAPI
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from src.api.responses import ORJSONResponse
+from src.api.routes.health import router as health_router
+from src.api.routes.metrics import router as metrics_router
+from src.api.routes.models import router as models_router
 from src.api.routes.predictions import router as predictions_router
+from src.api.routes.stream import router as stream_router
 from src.config.settings import get_settings
-from src.ingest.etl import ETLPipeline
-from src.models.train import AutoMLTrainer
+from src.db.session import SessionLocal, dispose_engine, get_engine
+from src.forecast.broadcast import get_broadcaster
+from src.forecast.cache import get_forecast_cache
+from src.forecast.price_state import get_price_state
+from src.ingest.http import close_async_http_client
+from src.models.features import last_capture
+from src.models.registry import get_model_registry
+from src.observability import startup
+from src.observability.exposition import dump_process_metrics, multiprocess_dir
+from src.observability.metrics import HTTP_REQUEST_SECONDS
 
-app = FastAPI(title="Benzin Forecast API", version="0.1.0")
-app.include_router(predictions_router)
+if TYPE_CHECKING:
+    from src.worker import IngestWorker
 
 settings = get_settings()
-scheduler = AsyncIOScheduler()
-etl_pipeline = ETLPipeline()
-trainer = AutoMLTrainer()
+scheduler: Optional[AsyncIOScheduler] = None
+ingest_worker: Optional[IngestWorker] = None
+_warmup: Optional[asyncio.Task] = None
+_data_version: Optional[datetime] = None
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    await start()
+    try:
+        yield
+    finally:
+        await stop()
+
+
+app = FastAPI(
+    title="Benzin Forecast API", version="0.1.0", default_response_class=ORJSONResponse, lifespan=lifespan
+)
+app.include_router(predictions_router)
+app.include_router(models_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(stream_router)
+startup.milestone("imports")
+
+
+class RequestLatencyMiddleware:
+    """Observe request latency per route template (not per raw path, to bound label cardinality).
+
+    A plain ASGI middleware: it only wraps ``send`` to catch the status code, and
+    reads the matched route from the scope once the inner app has finished (for
+    event streams, when the stream ends).
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status,
+            )
+            startup.first_request_served()
+
+
+app.add_middleware(RequestLatencyMiddleware)
+
+
+async def refresh_forecast() -> None:
+    """Catch the price state up with the store, rebuild the served forecast and remember its capture."""
+
+    global _data_version
+    version = await asyncio.to_thread(_last_capture)
+    await asyncio.to_thread(_sync_price_state)
+    await asyncio.to_thread(get_forecast_cache().refresh)
+    _data_version = version
+
+
+async def watch_data() -> None:
+    """Rebuild the forecast once a (possibly other-process) ETL run has stored a new capture."""
+
+    try:
+        version = await asyncio.to_thread(_last_capture)
+    except Exception:  # pragma: no cover - database locked or missing
+        logger.exception("Checking for new price data failed")
+        return
+    if version is not None and version != _data_version:
+        await refresh_forecast()
+
 
+async def watch_models() -> None:
+    """Activate a newer artifact from ``models/LATEST`` and rebuild the forecast with it."""
 
-@app.on_event("startup")
-async def on_startup() -> None:
+    registry = get_model_registry()
+    try:
+        swapped = await asyncio.to_thread(registry.refresh)
+    except Exception:  # pragma: no cover - corrupt or partial artifact
+        logger.exception("Loading the latest model failed; keeping {}", registry.active_version)
+        return
+    if swapped:
+        await refresh_forecast()
+
+
+async def dump_metrics(directory: Path) -> None:
+    """Share this worker's metrics with the one answering the next ``/metrics`` scrape."""
+
+    await asyncio.to_thread(dump_process_metrics, directory)
+
+
+def _last_capture() -> Optional[datetime]:
+    with SessionLocal() as session:
+        return last_capture(session)
+
+
+def _sync_price_state() -> None:
+    with SessionLocal() as session:
+        get_price_state().sync(session)
+
+
+def _load_price_state() -> None:
+    with SessionLocal() as session:
+        get_price_state().reload(session)
+
+
+async def warm_up() -> None:
+    """Load the price state and newest model, build the default forecast; marks the worker ready."""
+
+    with startup.step("price_state"):
+        try:
+            await asyncio.to_thread(_load_price_state)
+        except Exception:  # pragma: no cover - empty or missing database
+            logger.exception("Loading the price state failed; it is loaded on the first forecast build")
+    with startup.step("model_load"):
+        await watch_models()
+    with startup.step("forecast_warmup"):
+        try:
+            await refresh_forecast()
+        except Exception:  # pragma: no cover - empty or missing database
+            logger.exception("Initial forecast cache warm-up failed; will retry after the next ETL run")
+    startup.milestone(startup.READY)
+
+
+def _close_streams_on_exit() -> None:
+    """End open event streams as soon as the server is asked to stop.
+
+    The server waits for open connections before running the shutdown handler,
+    and event streams never finish on their own, so the server's own
+    SIGINT/SIGTERM handlers are wrapped to close the broadcaster first.
+    """
+
+    if threading.current_thread() is not threading.main_thread():
+        return
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(signum)
+        if not callable(previous):
+            continue
+
+        def handler(received, frame, previous=previous) -> None:
+            loop.call_soon_threadsafe(get_broadcaster().close)
+            previous(received, frame)
+
+        signal.signal(signum, handler)
+
+
+async def start() -> None:
+    global scheduler, ingest_worker, _warmup
+    _close_streams_on_exit()
+    with startup.step("engine"):
+        get_engine()
+    with startup.step("forecast_cache"):
+        get_model_registry()
+        get_forecast_cache()
+
+    scheduler = AsyncIOScheduler()
     scheduler.add_job(
-        etl_pipeline.run_all,
-        IntervalTrigger(minutes=settings.price_refresh_minutes),
-        id="etl-job",
+        watch_models,
+        IntervalTrigger(seconds=settings.model_watch_seconds),
+        id="model-watch-job",
         replace_existing=True,
     )
     scheduler.add_job(
-        trainer.retrain,
-        IntervalTrigger(hours=settings.retrain_interval_hours),
-        id="retrain-job",
+        watch_data,
+        IntervalTrigger(seconds=settings.data_watch_seconds),
+        id="data-watch-job",
         replace_existing=True,
     )
+    metrics_dir = multiprocess_dir()
+    if metrics_dir is not None:
+        scheduler.add_job(
+            dump_metrics,
+            IntervalTrigger(seconds=settings.metrics_dump_seconds),
+            args=(metrics_dir,),
+            id="metrics-dump-job",
+            replace_existing=True,
+        )
     scheduler.start()
+    _warmup = asyncio.create_task(warm_up(), name="forecast-warmup")
+
+    if settings.embedded_scheduler:
+        # Imported here so API-only workers never load the ETL stack (Meteostat, Parquet archive).
+        with startup.step("ingest_worker"):
+            from src.worker import IngestWorker
+
+            ingest_worker = IngestWorker(settings, after_etl=refresh_forecast, after_retrain=watch_models)
+            await ingest_worker.start()
+    startup.milestone("serving")
+
 
+async def stop() -> None:
+    get_broadcaster().close()
+    if _warmup is not None and not _warmup.done():
+        _warmup.cancel()
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    if ingest_worker is not None:
+        await ingest_worker.stop()
+    await close_async_http_client()
+    dispose_engine()
+    metrics_dir = multiprocess_dir()
+    if metrics_dir is not None:
+        dump_process_metrics(metrics_dir)  # keep this worker's final counts in the merged totals
 
-@app.on_event("shutdown")
-async def on_shutdown() -> None:
-    scheduler.shutdown(wait=False)
@@ -0,0 +1,43 @@
+"""Response classes and content negotiation for the forecast endpoints."""
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from src.forecast.encoding import MEDIA_TYPES, Format
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (NumPy arrays and datetimes supported natively)."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def negotiate_format(
+    requested: Optional[Format],
+    accept: Optional[str],
+    supported: Sequence[Format],
+    default: Format,
+) -> Format:
+    """Pick the wire format: the ``format`` query parameter wins, then the Accept header.
+
+    Unknown or wildcard Accept values fall back to ``default``.
+    """
+
+    if requested is not None:
+        if requested not in supported:
+            raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(supported)}")
+        return requested
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";", 1)[0].strip().lower()
+        for fmt in supported:
+            if MEDIA_TYPES[fmt] == media_type:
+                return fmt
+    return default
+
+
+__all__ = ["ORJSONResponse", "negotiate_format"]
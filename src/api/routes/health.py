@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from src.ingest.upstream import upstream_metrics
+from src.observability import startup
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/upstreams")
+def get_upstream_health() -> dict:
+    """Return breaker state plus per-endpoint latency and error metrics of the ingest upstreams."""
+
+    return upstream_metrics()
+
+
+@router.get("/ready")
+def get_readiness() -> JSONResponse:
+    """503 until the model is loaded and the default forecast has been warmed up."""
+
+    ready = startup.reached(startup.READY)
+    return JSONResponse({"ready": ready}, status_code=200 if ready else 503)
+
+
+@router.get("/startup")
+def get_startup_report() -> dict:
+    """Seconds from process start to each startup phase, plus the duration of each startup step."""
+
+    return startup.report()
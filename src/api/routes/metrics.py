@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import asyncio
+
+from fastapi import APIRouter, Response
+
+from src.observability.exposition import multiprocess_dir, render_metrics
+from src.observability.metrics import CONTENT_TYPE
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """Prometheus text exposition of the API's metrics plus data freshness gauges.
+
+    With several workers, whichever one answers merges the dumps of all of them.
+    """
+
+    return Response(content=await asyncio.to_thread(render_metrics, multiprocess_dir()), media_type=CONTENT_TYPE)
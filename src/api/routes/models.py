@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from src.forecast.cache import ForecastCache, get_forecast_cache
+from src.models.registry import ModelRegistry, get_model_registry
+from src.models.train import AutoMLTrainer, get_trainer
+
+router = APIRouter(prefix="/models", tags=["models"])
+
+
+@router.get("/status")
+def get_model_status(
+    registry: ModelRegistry = Depends(get_model_registry),
+    trainer: AutoMLTrainer = Depends(get_trainer),
+) -> dict:
+    """Return the active/previous model versions and the latest training run."""
+
+    return {**registry.status(), "training": trainer.progress()}
+
+
+@router.post("/rollback")
+def rollback_model(
+    registry: ModelRegistry = Depends(get_model_registry),
+    cache: ForecastCache = Depends(get_forecast_cache),
+) -> dict:
+    """Reactivate the previous model version and rebuild the cached forecast.
+
+    The rollback is written to the model directory, so the other API workers
+    switch on their next model check.
+    """
+
+    model = registry.rollback()
+    if model is None:
+        raise HTTPException(status_code=409, detail="No earlier model version to roll back to")
+    cache.refresh()
+    return registry.status()
@@ -1,59 +1,104 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import List
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 
+from src.api.responses import negotiate_format
 from src.config.settings import Settings, get_settings
-from src.ingest.tankerkoenig import TankerkoenigClient
-from src.ingest.weather_service import WeatherService
+from src.db.session import SessionLocal
+from src.forecast.builder import Forecast
+from src.forecast.cache import ForecastCache, get_forecast_cache
+from src.forecast.encoding import MEDIA_TYPES, Format
+from src.forecast.station_index import StationIndex, get_station_index
 
 router = APIRouter(prefix="/predictions", tags=["predictions"])
 
+FuelType = Literal["e5", "e10", "diesel"]
+MAX_RADIUS_KM = 25.0
+POINT_FORMATS = ("rows", "columnar", "arrow")
+STATION_FORMATS = ("columnar", "arrow")
 
-def get_clients():
-    return {
-        "tk_client": TankerkoenigClient(),
-        "weather_service": WeatherService(),
-    }
+
+def _forecast_response(forecast: Forecast, fmt: Format, age: int = 0) -> Response:
+    return Response(
+        content=forecast.encode(fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            "Vary": "Accept",
+            "X-Forecast-Generated-At": forecast.generated_at.isoformat(),
+            "X-Model-Version": forecast.model_version or "none",
+            "Age": str(age),
+        },
+    )
 
 
 @router.get("/next24h")
 def get_predictions(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=MAX_RADIUS_KM),
+    fuel_type: Optional[FuelType] = None,
+    format: Optional[Format] = Query(None, description="rows (default), columnar or arrow"),
+    accept: Optional[str] = Header(None),
     settings: Settings = Depends(get_settings),
-    clients: dict = Depends(get_clients),
-) -> List[dict]:
-    """Return placeholder predictions until AutoML is wired in."""
-
-    tk_client: TankerkoenigClient = clients["tk_client"]
-    weather_service: WeatherService = clients["weather_service"]
-
-    stations = tk_client.list_stations(
-        lat=settings.hamburg_lat,
-        lng=settings.hamburg_lng,
-        radius_km=settings.search_radius_km,
-        fuel_type=settings.fuel_type,
-    )
-    current_station = stations[0] if stations else None
-    current_price = getattr(current_station, settings.fuel_type, None)
-
-    weather_forecast = weather_service.get_forecast()
-    start_time = datetime.utcnow()
-    interval = timedelta(minutes=settings.prediction_interval_minutes)
-    horizon_steps = int(24 * 60 / settings.prediction_interval_minutes)
-
-    predictions: List[dict] = []
-    for step in range(horizon_steps):
-        ts = start_time + interval * step
-        forecast_temp = weather_forecast[step].temperature_c if step < len(weather_forecast) else None
-        predictions.append(
-            {
-                "timestamp": ts.isoformat(),
-                "predicted_price": current_price,
-                "temperature_c": forecast_temp,
-                "notes": "AutoML model pending; returning current price as placeholder",
-            }
+    cache: ForecastCache = Depends(get_forecast_cache),
+) -> Response:
+    """Return the 24h forecast for the station nearest to the point.
+
+    Without location parameters the cached default forecast is served; located
+    queries are answered for the centre of their grid cell from the region cache.
+    The body is one object per point (``rows``), start/step plus value arrays
+    (``columnar``) or an Arrow IPC stream (``arrow``), chosen by ``format`` or the
+    Accept header.
+    """
+
+    fmt = negotiate_format(format, accept, POINT_FORMATS, default="rows")
+    if lat is None and lng is None and radius_km is None and fuel_type is None:
+        try:
+            entry = cache.get()
+        except Exception as exc:  # pragma: no cover - depends on DB state
+            raise HTTPException(status_code=503, detail="Forecast not available yet") from exc
+        return _forecast_response(entry.forecast, fmt, int(entry.age()))
+
+    try:
+        entry = cache.regions.get(
+            lat if lat is not None else settings.hamburg_lat,
+            lng if lng is not None else settings.hamburg_lng,
+            radius_km or settings.search_radius_km,
+            fuel_type or settings.fuel_type,
         )
+    except Exception as exc:  # pragma: no cover - depends on DB state
+        raise HTTPException(status_code=503, detail="Forecast not available yet") from exc
+    return _forecast_response(entry.forecast, fmt, int(entry.age()))
 
-    return predictions
+
+@router.get("/stations/next24h")
+def get_station_predictions(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius_km: Optional[float] = Query(None, gt=0, le=MAX_RADIUS_KM),
+    fuel_type: Optional[List[FuelType]] = Query(None),
+    limit: int = Query(50, gt=0, le=500),
+    format: Optional[Format] = Query(None, description="columnar (default) or arrow"),
+    accept: Optional[str] = Header(None),
+    settings: Settings = Depends(get_settings),
+    cache: ForecastCache = Depends(get_forecast_cache),
+    index: StationIndex = Depends(get_station_index),
+) -> Response:
+    """Return 24h forecasts for every station within the radius and each requested fuel."""
+
+    fmt = negotiate_format(format, accept, STATION_FORMATS, default="columnar")
+    stations = index.within(
+        lat if lat is not None else settings.hamburg_lat,
+        lng if lng is not None else settings.hamburg_lng,
+        radius_km or settings.search_radius_km,
+        limit=limit,
+    )
+    with SessionLocal() as session:
+        forecasts = cache.builder.build_stations(session, stations, fuel_type or settings.fuel_types)
+    return Response(
+        content=forecasts.encode(fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Vary": "Accept", "X-Model-Version": forecasts.model_version or "none"},
+    )
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from src.config.settings import Settings, get_settings
+from src.forecast.broadcast import Broadcaster, TooManySubscribers, get_broadcaster
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+KEEPALIVE = b": keepalive\n\n"
+RETRY_AFTER_SECONDS = 30  # how long a client turned away for capacity should wait before reconnecting
+RETRY_LATER = f"retry: {RETRY_AFTER_SECONDS * 1000}\n\n".encode()
+
+
+async def _events(broadcaster: Broadcaster, keepalive: float) -> AsyncIterator[bytes]:
+    # Subscribe only once the body is being sent: a client that disconnects before that never
+    # starts this generator, and a subscription taken in the handler would never be released.
+    try:
+        subscription = broadcaster.subscribe()
+    except TooManySubscribers:
+        # Filled up since the handler checked: tell EventSource to back off instead of reconnecting at once.
+        yield RETRY_LATER
+        return
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield KEEPALIVE  # keeps proxies from closing idle connections
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+@router.get("/forecast")
+async def stream_forecast(
+    settings: Settings = Depends(get_settings),
+    broadcaster: Broadcaster = Depends(get_broadcaster),
+) -> StreamingResponse:
+    """Server-sent events: a ``forecast`` event (columnar body) every time the default forecast is rebuilt.
+
+    The current forecast is sent on connect, then one event per ETL cycle or
+    model change. Comment lines are sent every ``STREAM_KEEPALIVE_SECONDS``.
+    When the subscriber limit is reached the request gets a 503 with
+    ``Retry-After``.
+    """
+
+    if broadcaster.full:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many streaming clients",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+    return StreamingResponse(
+        _events(broadcaster, settings.stream_keepalive_seconds),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,20 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class CoverageRegion(BaseModel):
+    """Circular area whose stations are tracked (tiled into <= 25 km list.php calls)."""
+
+    name: str
+    lat: float
+    lng: float
+    radius_km: float
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -18,16 +28,100 @@ class Settings(BaseSettings):
     hamburg_lng: float = 9.9937
     search_radius_km: float = 5.0
     fuel_type: str = "e5"
+    fuel_types: List[str] = ["e5", "e10", "diesel"]
+    station_index_cell_km: float = 5.0
+
+    # Coverage planning (empty regions -> one circle around the location defaults)
+    coverage_regions: List[CoverageRegion] = []
+    coverage_tile_radius_km: float = 25.0
+    station_sweep_interval_hours: int = 24
+
+    # Price capture: persist a row only when a series' price changes
+    price_change_capture: bool = True
+    # In-memory ring buffer of recent slot prices per (station, fuel) for prediction features
+    price_state_slots: int = 288
 
     # Paths
     sqlite_path: Path = Path("data/benzin.db")
     model_dir: Path = Path("models")
+    archive_dir: Path = Path("data/archive")
+    weather_cache_path: Path = Path("data/weather_cache.npz")
+
+    # SQLite tuning (applied as PRAGMAs on every new connection)
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_mmap_size_bytes: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_busy_timeout_ms: int = 5000
 
     # Scheduler settings
     prediction_interval_minutes: int = 5
     retrain_interval_hours: int = 24
     weather_refresh_minutes: int = 10
     price_refresh_minutes: int = 5
+    archive_interval_hours: int = 24
+    model_watch_seconds: int = 60
+    # Run ETL/retrain/archive inside the API process; disable when `python -m src.worker` runs them
+    embedded_scheduler: bool = True
+    scheduler_lease_seconds: int = 60
+    data_watch_seconds: int = 30
+    # Standalone scheduler worker serves /metrics on this port (0 disables)
+    worker_metrics_host: str = "0.0.0.0"
+    worker_metrics_port: int = 9100
+    api_workers: int = 1
+    # With API_WORKERS > 1 every worker dumps its metrics here so any of them can serve the merged /metrics
+    metrics_multiproc_dir: str = "./data/metrics"
+    metrics_dump_seconds: float = 5.0
+
+    # Weather response cache (entries stay fresh for weather_refresh_minutes)
+    weather_cache_precision: int = 2
+
+    # Parquet archive
+    archive_prune: bool = False
+
+    # Upstream HTTP (shared async connection pool)
+    http_timeout_seconds: float = 10.0
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    tankerkoenig_max_concurrency: int = 5
+
+    # Upstream resilience (rate limits, retries, circuit breaker)
+    tankerkoenig_calls_per_minute: int = 60
+    openweather_calls_per_minute: int = 30
+    upstream_burst: int = 10
+    upstream_timeout_seconds: float = 5.0
+    upstream_max_retries: int = 3
+    upstream_backoff_base_seconds: float = 0.5
+    upstream_backoff_max_seconds: float = 8.0
+    upstream_breaker_failures: int = 5
+    upstream_breaker_reset_seconds: float = 60.0
+
+    # Training (runs in a separate, resource-limited process)
+    train_time_limit_seconds: int = 1800
+    train_presets: str = "medium_quality"
+    train_memory_limit_mb: int = 4096
+    train_num_cpus: int = 2
+    train_min_rows: int = 1000
+    # Partitioned training: "" (global model only), "fuel", "brand" or "station"
+    train_partition_by: str = ""
+    train_partition_time_limit_seconds: int = 300
+    train_partition_workers: int = 0  # 0: usable cores // TRAIN_NUM_CPUS
+    model_cache_size: int = 64  # partition predictors kept loaded for inference
+
+    # Forecast cache
+    forecast_cache_ttl_seconds: int = 300
+    forecast_cache_stale_seconds: int = 900
+    # Located forecasts: snapped to grid cells and radius buckets, LRU-bounded by estimated size
+    forecast_region_cache_mb: int = 32
+    forecast_region_cell_km: float = 0.25
+    forecast_region_radius_step_km: float = 1.0
+
+    # Server-sent event stream (/stream/forecast)
+    stream_queue_size: int = 4  # messages buffered per client before the oldest is dropped
+    stream_max_clients: int = 5000  # per API worker
+    stream_keepalive_seconds: float = 15.0
+    api_shutdown_timeout_seconds: float = 10.0  # graceful shutdown limit for open connections (streams)
 
     # API
     api_host: str = "0.0.0.0"
@@ -0,0 +1,255 @@
+"""Columnar Parquet archive for closed days of price and weather history.
+
+Layout under ``Settings.archive_dir``::
+
+    price_snapshots/date=2026-10-17/fuel_type=e5/part-0.parquet
+    weather_snapshots/date=2026-10-17/part-0.parquet
+
+Days are written once they are closed (strictly before today, UTC) and can
+optionally be pruned from SQLite afterwards. Rows stored later for an already
+archived day (backfills) are merged into that day's partition before anything
+of the day is pruned. Pruning keeps the newest price event of every series (the
+price still in effect) and records the cutoff in the ``archive_pruned``
+watermark; the price and weather loaders in ``src/models/features.py`` read
+anything older than it from here. Readers use ``pyarrow.dataset`` so only the
+requested columns are decoded and partitions/row groups outside the filter are
+skipped.
+"""
+from __future__ import annotations
+
+import os
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from loguru import logger
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from src.config.settings import get_settings
+from src.db import models
+from src.db.watermarks import get_watermark, set_watermark
+
+PRICES = "price_snapshots"
+WEATHER = "weather_snapshots"
+
+_PARTITIONING = {
+    PRICES: ds.partitioning(pa.schema([("date", pa.string()), ("fuel_type", pa.string())]), flavor="hive"),
+    WEATHER: ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive"),
+}
+_MODELS = {PRICES: models.PriceSnapshot, WEATHER: models.WeatherSnapshot}
+_KEYS = {PRICES: ["station_id", "fuel_type", "captured_at"], WEATHER: ["captured_at"]}
+PRUNED_WATERMARK = "archive_pruned"  # SQLite holds only in-effect price events before this time
+
+
+class ParquetArchive:
+    def __init__(self, root: Optional[Path] = None) -> None:
+        settings = get_settings()
+        self.root = Path(root or settings.archive_dir)
+
+    def archived_days(self, table: str) -> set[date]:
+        base = self.root / table
+        if not base.exists():
+            return set()
+        return {date.fromisoformat(path.name.split("=", 1)[1]) for path in base.glob("date=*")}
+
+    def archived_counts(self, table: str) -> Dict[date, int]:
+        """Rows per archived day, from the Parquet footers (no data is decoded)."""
+
+        counts: Dict[date, int] = {}
+        base = self.root / table
+        if not base.exists():
+            return counts
+        for day_dir in base.glob("date=*"):
+            day = date.fromisoformat(day_dir.name.split("=", 1)[1])
+            counts[day] = sum(pq.ParquetFile(path).metadata.num_rows for path in day_dir.rglob("part-*.parquet"))
+        return counts
+
+    def compact(self, session: Session, until: Optional[date] = None, prune: Optional[bool] = None) -> Dict[str, int]:
+        """Archive every closed day before ``until`` (default: today, UTC).
+
+        Returns the number of rows written per table. With ``prune`` the archived
+        rows are deleted from SQLite in the same pass. A day that is already
+        archived but has rows in SQLite that the archive lacks is rewritten with
+        them merged in first, so pruning never drops unarchived rows.
+        """
+
+        settings = get_settings()
+        until = until or datetime.utcnow().date()
+        prune = settings.archive_prune if prune is None else prune
+        cutoff, _ = _day_bounds(until)
+
+        written: Dict[str, int] = {}
+        for table in (PRICES, WEATHER):
+            model = _MODELS[table]
+            archived = self.archived_counts(table)
+            rows_written = 0
+            for day, stored in self._closed_days(session, model, until).items():
+                if day not in archived:
+                    frame = self._load_day(session, model, day)
+                    self._write_day(table, day, frame)
+                    rows_written += len(frame)
+                elif prune or stored != archived[day]:
+                    # Without pruning, a matching count means nothing was added since the day was archived.
+                    rows_written += self._merge_day(session, table, model, day)
+                if prune:
+                    start, end = _day_bounds(day)
+                    stmt = delete(model).where(model.captured_at >= start, model.captured_at < end)
+                    if model is models.PriceSnapshot:
+                        # Keep the event each series has in effect at ``until``; readers fill forward from it.
+                        stmt = stmt.where(model.id.not_in(_in_effect_ids(cutoff)))
+                    session.execute(stmt)
+            session.commit()
+            written[table] = rows_written
+
+        if prune:
+            pruned = get_watermark(session, PRUNED_WATERMARK)
+            if pruned is None or pruned < cutoff:
+                set_watermark(session, PRUNED_WATERMARK, cutoff)
+                session.commit()
+
+        logger.info(
+            "Archived {} price and {} weather rows to {} (prune={})",
+            written[PRICES],
+            written[WEATHER],
+            self.root,
+            prune,
+        )
+        return written
+
+    def read_prices(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        fuel_types: Optional[Iterable[str]] = None,
+        station_ids: Optional[Iterable[str]] = None,
+    ) -> pd.DataFrame:
+        """Return archived price snapshots within ``[start, end)``."""
+
+        expression = _time_filter(start, end)
+        if fuel_types is not None:
+            expression = _and(expression, ds.field("fuel_type").isin(list(fuel_types)))
+        if station_ids is not None:
+            expression = _and(expression, ds.field("station_id").isin(list(station_ids)))
+        return self._read(PRICES, columns, expression)
+
+    def read_weather(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """Return archived weather snapshots within ``[start, end)``."""
+
+        return self._read(WEATHER, columns, _time_filter(start, end))
+
+    def _read(self, table: str, columns: Optional[Sequence[str]], expression) -> pd.DataFrame:
+        base = self.root / table
+        if not base.exists():
+            return pd.DataFrame(columns=list(columns) if columns else None)
+        dataset = ds.dataset(base, format="parquet", partitioning=_PARTITIONING[table])
+        scan_columns = [column for column in columns if column != "date"] if columns else None
+        return dataset.to_table(columns=scan_columns, filter=expression).to_pandas()
+
+    @staticmethod
+    def _closed_days(session: Session, model, until: date) -> Dict[date, int]:
+        """Rows stored in SQLite per closed day, oldest first."""
+
+        start, _ = _day_bounds(until)
+        day = func.date(model.captured_at)
+        stmt = select(day, func.count()).where(model.captured_at < start).group_by(day).order_by(day)
+        return {date.fromisoformat(value): count for value, count in session.execute(stmt).all() if value}
+
+    @staticmethod
+    def _load_day(session: Session, model, day: date) -> pd.DataFrame:
+        start, end = _day_bounds(day)
+        table = model.__table__
+        columns = [column for column in table.columns if column.name != "id"]
+        stmt = select(*columns).where(table.c.captured_at >= start, table.c.captured_at < end)
+        rows = session.execute(stmt).all()
+        return pd.DataFrame(rows, columns=[column.name for column in columns])
+
+    def _merge_day(self, session: Session, table: str, model, day: date) -> int:
+        """Add the day's SQLite rows missing from its archived partition; return how many were added."""
+
+        keys = _KEYS[table]
+        stored = self._load_day(session, model, day)
+        existing = self._read(table, None, ds.field("date") == day.isoformat()).drop(columns="date")
+        stored["captured_at"] = stored["captured_at"].astype("datetime64[ns]")
+        existing["captured_at"] = existing["captured_at"].astype("datetime64[ns]")
+        if table == PRICES:
+            existing["fuel_type"] = existing["fuel_type"].astype(str)
+        marked = stored.merge(existing[keys], on=keys, how="left", indicator=True)
+        missing = stored[(marked["_merge"] == "left_only").to_numpy()]
+        if missing.empty:
+            return 0
+        self._write_day(table, day, pd.concat([existing[stored.columns], missing], ignore_index=True))
+        logger.info("Merged {} late {} rows into archived day {}", len(missing), table, day)
+        return len(missing)
+
+    def _write_day(self, table: str, day: date, frame: pd.DataFrame) -> None:
+        day_dir = self.root / table / f"date={day.isoformat()}"
+        if table == PRICES:
+            for fuel_type, group in frame.groupby("fuel_type"):
+                _write_atomic(day_dir / f"fuel_type={fuel_type}", group.drop(columns="fuel_type"))
+        else:
+            _write_atomic(day_dir, frame)
+
+
+def _in_effect_ids(cutoff: datetime):
+    """IDs of the newest price event before ``cutoff`` per series (by ``captured_at``, not insert order)."""
+
+    model = models.PriceSnapshot
+    ranked = (
+        select(
+            model.id,
+            func.row_number()
+            .over(
+                partition_by=(model.station_id, model.fuel_type),
+                order_by=(model.captured_at.desc(), model.id.desc()),
+            )
+            .label("rank"),
+        )
+        .where(model.captured_at < cutoff)
+        .subquery()
+    )
+    return select(ranked.c.id).where(ranked.c.rank == 1)
+
+
+def _write_atomic(directory: Path, frame: pd.DataFrame) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / "part-0.parquet"
+    tmp = directory / ".part-0.parquet.tmp"
+    frame = frame.sort_values("captured_at")
+    pq.write_table(pa.Table.from_pandas(frame, preserve_index=False), tmp, compression="zstd")
+    os.replace(tmp, target)
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def _time_filter(start: Optional[datetime], end: Optional[datetime]):
+    """Partition filter on ``date`` plus row-group pushdown on ``captured_at``."""
+
+    expression = None
+    if start is not None:
+        expression = _and(expression, ds.field("date") >= start.date().isoformat())
+        expression = _and(expression, ds.field("captured_at") >= pa.scalar(start, pa.timestamp("us")))
+    if end is not None:
+        expression = _and(expression, ds.field("date") <= end.date().isoformat())
+        expression = _and(expression, ds.field("captured_at") < pa.scalar(end, pa.timestamp("us")))
+    return expression
+
+
+def _and(left, right):
+    return right if left is None else left & right
+
+
+__all__ = ["PRUNED_WATERMARK", "ParquetArchive"]
@@ -0,0 +1,115 @@
+"""Bulk write helpers built on SQLAlchemy Core.
+
+Each helper issues one statement for the whole batch (``executemany`` under the
+hood) instead of flushing ORM objects one by one. Rows are plain dicts keyed by
+column name.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.db import models
+from src.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+Row = Dict[str, Any]
+
+_STATION_UPDATE_COLUMNS = ("name", "brand", "lat", "lng", "street", "house_number", "post_code")
+
+
+def upsert_stations(session: Session, rows: Sequence[Row]) -> int:
+    """Insert new stations and refresh metadata of known ones (``ON CONFLICT DO UPDATE``)."""
+
+    if not rows:
+        return 0
+    stmt = sqlite_insert(models.Station.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Station.id],
+        set_={column: stmt.excluded[column] for column in _STATION_UPDATE_COLUMNS},
+    )
+    session.execute(stmt, list(rows))
+    return len(rows)
+
+
+def insert_price_snapshots(session: Session, rows: Sequence[Row]) -> int:
+    if not rows:
+        return 0
+    session.execute(insert(models.PriceSnapshot.__table__), list(rows))
+    return len(rows)
+
+
+def insert_weather_snapshots(session: Session, rows: Sequence[Row]) -> int:
+    """Insert weather rows whose ``captured_at`` is not stored yet; return the number inserted.
+
+    Existing timestamps in the batch window are loaded with a single range query
+    and filtered out in Python before one bulk insert.
+    """
+
+    if not rows:
+        return 0
+    timestamps = [row["captured_at"] for row in rows]
+    table = models.WeatherSnapshot.__table__
+    existing = set(
+        session.execute(
+            select(table.c.captured_at).where(
+                table.c.captured_at >= min(timestamps),
+                table.c.captured_at <= max(timestamps),
+            )
+        ).scalars()
+    )
+
+    fresh: list[Row] = []
+    for row in rows:
+        if row["captured_at"] in existing:
+            continue
+        existing.add(row["captured_at"])
+        fresh.append(row)
+
+    if fresh:
+        session.execute(insert(table), fresh)
+    return len(fresh)
+
+
+def insert_feature_vectors(session: Session, rows: Sequence[Row]) -> int:
+    """Insert feature rows, skipping (station, fuel, target_timestamp) keys that already exist."""
+
+    if not rows:
+        return 0
+    stmt = sqlite_insert(models.FeatureVector.__table__).on_conflict_do_nothing(
+        index_elements=["station_id", "fuel_type", "target_timestamp"]
+    )
+    session.execute(stmt, list(rows))
+    return len(rows)
+
+
+def frame_to_records(frame: pd.DataFrame, index_name: str | None = None) -> List[Row]:
+    """Convert a frame into row dicts with NaN/NaT mapped to ``None``.
+
+    Datetime columns become plain ``datetime`` objects. When ``index_name`` is
+    given the index is emitted as that column.
+    """
+
+    if index_name is not None:
+        frame = frame.rename_axis(index_name).reset_index()
+    columns = list(frame.columns)
+    values = frame.to_numpy(dtype=object)
+    for position, column in enumerate(columns):
+        if pd.api.types.is_datetime64_any_dtype(frame[column]):
+            values[:, position] = np.array(frame[column].dt.to_pydatetime(), dtype=object)
+    values[pd.isna(values)] = None
+    return [dict(zip(columns, row)) for row in values]
+
+
+__all__ = [
+    "frame_to_records",
+    "insert_feature_vectors",
+    "insert_price_snapshots",
+    "insert_weather_snapshots",
+    "upsert_stations",
+]
@@ -0,0 +1,54 @@
+"""SQLite-backed lease so that exactly one process runs the scheduled jobs.
+
+A holder acquires or renews the lease with a single conditional upsert that only
+succeeds while the row is free, expired or already held by that holder. SQLite
+serialises writers, so two contenders can never both win. A holder that stops
+renewing loses the lease after ``ttl``.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, delete, or_, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.db import models
+
+
+def try_acquire(session: Session, name: str, holder: str, ttl: timedelta) -> bool:
+    """Acquire or renew the lease; return True if ``holder`` owns it afterwards."""
+
+    table = models.SchedulerLease.__table__
+    now = datetime.utcnow()
+    stmt = sqlite_insert(table).values(name=name, holder=holder, acquired_at=now, expires_at=now + ttl)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={
+            "holder": stmt.excluded.holder,
+            "expires_at": stmt.excluded.expires_at,
+            "acquired_at": case(
+                (table.c.holder == stmt.excluded.holder, table.c.acquired_at),
+                else_=stmt.excluded.acquired_at,
+            ),
+        },
+        where=or_(table.c.expires_at < now, table.c.holder == holder),
+    )
+    session.execute(stmt)
+    session.commit()
+    return current_holder(session, name) == holder
+
+
+def release(session: Session, name: str, holder: str) -> None:
+    table = models.SchedulerLease.__table__
+    session.execute(delete(table).where(table.c.name == name, table.c.holder == holder))
+    session.commit()
+
+
+def current_holder(session: Session, name: str) -> Optional[str]:
+    table = models.SchedulerLease.__table__
+    return session.execute(select(table.c.holder).where(table.c.name == name)).scalar_one_or_none()
+
+
+__all__ = ["current_holder", "release", "try_acquire"]
@@ -0,0 +1,76 @@
+"""Baseline schema (mirrors the original schema.sql).
+
+Tables are only created when missing so databases bootstrapped from
+``schema.sql`` can be stamped and upgraded in place.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "stations" not in existing:
+        op.create_table(
+            "stations",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("brand", sa.String(), nullable=True),
+            sa.Column("lat", sa.Float(), nullable=False),
+            sa.Column("lng", sa.Float(), nullable=False),
+            sa.Column("street", sa.String(), nullable=True),
+            sa.Column("house_number", sa.String(), nullable=True),
+            sa.Column("post_code", sa.Integer(), nullable=True),
+        )
+    if "price_snapshots" not in existing:
+        op.create_table(
+            "price_snapshots",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("station_id", sa.String(), sa.ForeignKey("stations.id"), nullable=False),
+            sa.Column("captured_at", sa.DateTime(), nullable=True),
+            sa.Column("fuel_type", sa.String(), nullable=False),
+            sa.Column("price_eur", sa.Float(), nullable=False),
+        )
+    if "weather_snapshots" not in existing:
+        op.create_table(
+            "weather_snapshots",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("captured_at", sa.DateTime(), nullable=True),
+            sa.Column("temperature_c", sa.Float(), nullable=True),
+            sa.Column("humidity", sa.Float(), nullable=True),
+            sa.Column("wind_speed_ms", sa.Float(), nullable=True),
+            sa.Column("precipitation_mm", sa.Float(), nullable=True),
+            sa.Column("cloud_cover_pct", sa.Float(), nullable=True),
+        )
+    if "feature_vectors" not in existing:
+        op.create_table(
+            "feature_vectors",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("target_timestamp", sa.DateTime(), nullable=False),
+            sa.Column("fuel_type", sa.String(), nullable=False),
+            sa.Column("current_price", sa.Float(), nullable=True),
+            sa.Column("features_json", sa.String(), nullable=False),
+            sa.Column("label_price", sa.Float(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("feature_vectors")
+    op.drop_table("weather_snapshots")
+    op.drop_table("price_snapshots")
+    op.drop_table("stations")
@@ -0,0 +1,62 @@
+"""Time-series indexes for ingestion dedupe and feature queries.
+
+Duplicate rows that would violate the new unique indexes are removed first,
+keeping the oldest row per key.
+
+Revision ID: 0002_time_series_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_time_series_indexes"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "DELETE FROM price_snapshots WHERE id NOT IN ("
+        "SELECT MIN(id) FROM price_snapshots GROUP BY station_id, fuel_type, captured_at)"
+    )
+    op.execute(
+        "DELETE FROM weather_snapshots WHERE id NOT IN ("
+        "SELECT MIN(id) FROM weather_snapshots GROUP BY captured_at)"
+    )
+    op.create_index(
+        "ux_price_snapshots_station_fuel_captured",
+        "price_snapshots",
+        ["station_id", "fuel_type", "captured_at"],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_price_snapshots_captured_at", "price_snapshots", ["captured_at"], if_not_exists=True
+    )
+    op.create_index(
+        "ux_weather_snapshots_captured_at",
+        "weather_snapshots",
+        ["captured_at"],
+        unique=True,
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_feature_vectors_fuel_target",
+        "feature_vectors",
+        ["fuel_type", "target_timestamp"],
+        if_not_exists=True,
+    )
+    op.execute("ANALYZE")
+
+
+def downgrade() -> None:
+    op.drop_index("ix_feature_vectors_fuel_target", table_name="feature_vectors")
+    op.drop_index("ux_weather_snapshots_captured_at", table_name="weather_snapshots")
+    op.drop_index("ix_price_snapshots_captured_at", table_name="price_snapshots")
+    op.drop_index("ux_price_snapshots_station_fuel_captured", table_name="price_snapshots")
@@ -0,0 +1,70 @@
+"""Typed feature columns instead of features_json, plus pipeline watermarks.
+
+Revision ID: 0003_typed_feature_vectors
+Revises: 0002_time_series_indexes
+Create Date: 2026-10-18 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_typed_feature_vectors"
+down_revision: Union[str, None] = "0002_time_series_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FEATURE_COLUMNS = (
+    "hour_sin",
+    "hour_cos",
+    "weekday_sin",
+    "weekday_cos",
+    "lag_1",
+    "lag_12",
+    "lag_288",
+    "rolling_mean_12",
+    "rolling_std_12",
+    "rolling_mean_288",
+    "rolling_min_288",
+    "rolling_max_288",
+    "temperature_c",
+    "humidity",
+    "wind_speed_ms",
+    "precipitation_mm",
+    "cloud_cover_pct",
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("feature_vectors") as batch:
+        batch.add_column(sa.Column("station_id", sa.String(), nullable=True))
+        for column in FEATURE_COLUMNS:
+            batch.add_column(sa.Column(column, sa.Float(), nullable=True))
+        batch.drop_column("features_json")
+        batch.create_foreign_key("fk_feature_vectors_station_id", "stations", ["station_id"], ["id"])
+        batch.create_index(
+            "ux_feature_vectors_station_fuel_target",
+            ["station_id", "fuel_type", "target_timestamp"],
+            unique=True,
+        )
+
+    op.create_table(
+        "pipeline_watermarks",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("value", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pipeline_watermarks")
+    with op.batch_alter_table("feature_vectors") as batch:
+        batch.drop_index("ux_feature_vectors_station_fuel_target")
+        batch.drop_constraint("fk_feature_vectors_station_id", type_="foreignkey")
+        batch.add_column(sa.Column("features_json", sa.String(), nullable=False, server_default="{}"))
+        for column in reversed(FEATURE_COLUMNS):
+            batch.drop_column(column)
+        batch.drop_column("station_id")
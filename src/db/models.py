@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db.base import Base
@@ -26,6 +26,10 @@ class Station(Base):
 
 class PriceSnapshot(Base):
     __tablename__ = "price_snapshots"
+    __table_args__ = (
+        Index("ux_price_snapshots_station_fuel_captured", "station_id", "fuel_type", "captured_at", unique=True),
+        Index("ix_price_snapshots_captured_at", "captured_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     station_id: Mapped[str] = mapped_column(ForeignKey("stations.id"))
@@ -38,6 +42,7 @@ class PriceSnapshot(Base):
 
 class WeatherSnapshot(Base):
     __tablename__ = "weather_snapshots"
+    __table_args__ = (Index("ux_weather_snapshots_captured_at", "captured_at", unique=True),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     captured_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
@@ -49,12 +54,63 @@ class WeatherSnapshot(Base):
 
 
 class FeatureVector(Base):
+    """One engineered training row per (station, fuel, 5-minute slot)."""
+
     __tablename__ = "feature_vectors"
+    __table_args__ = (
+        Index("ix_feature_vectors_fuel_target", "fuel_type", "target_timestamp"),
+        Index("ux_feature_vectors_station_fuel_target", "station_id", "fuel_type", "target_timestamp", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    station_id: Mapped[Optional[str]] = mapped_column(ForeignKey("stations.id"), nullable=True)
     target_timestamp: Mapped[datetime] = mapped_column(DateTime)
     fuel_type: Mapped[str] = mapped_column(String)
     current_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
-    features_json: Mapped[str] = mapped_column(String)  # JSON payload stored as string
     label_price: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # Calendar encodings
+    hour_sin: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    hour_cos: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    weekday_sin: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    weekday_cos: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # Price lags (in 5-minute steps) and rolling statistics
+    lag_1: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lag_12: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    lag_288: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rolling_mean_12: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rolling_std_12: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rolling_mean_288: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rolling_min_288: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    rolling_max_288: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
+    # Weather interpolated to the slot
+    temperature_c: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    humidity: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    wind_speed_ms: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    precipitation_mm: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+    cloud_cover_pct: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class PipelineWatermark(Base):
+    """Last processed timestamp per incremental pipeline stage."""
+
+    __tablename__ = "pipeline_watermarks"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[datetime] = mapped_column(DateTime)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SchedulerLease(Base):
+    """Single-runner lease: only the current holder schedules ingest/training jobs."""
+
+    __tablename__ = "scheduler_leases"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    holder: Mapped[str] = mapped_column(String)
+    acquired_at: Mapped[datetime] = mapped_column(DateTime)
+    expires_at: Mapped[datetime] = mapped_column(DateTime)
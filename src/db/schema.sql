@@ -29,10 +29,48 @@ CREATE TABLE IF NOT EXISTS weather_snapshots (
 
 CREATE TABLE IF NOT EXISTS feature_vectors (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    station_id TEXT REFERENCES stations(id),
     target_timestamp DATETIME NOT NULL,
     fuel_type TEXT NOT NULL,
     current_price REAL,
-    features_json TEXT NOT NULL,
     label_price REAL,
+    hour_sin REAL,
+    hour_cos REAL,
+    weekday_sin REAL,
+    weekday_cos REAL,
+    lag_1 REAL,
+    lag_12 REAL,
+    lag_288 REAL,
+    rolling_mean_12 REAL,
+    rolling_std_12 REAL,
+    rolling_mean_288 REAL,
+    rolling_min_288 REAL,
+    rolling_max_288 REAL,
+    temperature_c REAL,
+    humidity REAL,
+    wind_speed_ms REAL,
+    precipitation_mm REAL,
+    cloud_cover_pct REAL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP
 );
+
+CREATE TABLE IF NOT EXISTS pipeline_watermarks (
+    name TEXT PRIMARY KEY,
+    value DATETIME NOT NULL,
+    updated_at DATETIME
+);
+
+CREATE TABLE IF NOT EXISTS scheduler_leases (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    acquired_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_price_snapshots_station_fuel_captured
+    ON price_snapshots (station_id, fuel_type, captured_at);
+CREATE INDEX IF NOT EXISTS ix_price_snapshots_captured_at ON price_snapshots (captured_at);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_weather_snapshots_captured_at ON weather_snapshots (captured_at);
+CREATE INDEX IF NOT EXISTS ix_feature_vectors_fuel_target ON feature_vectors (fuel_type, target_timestamp);
+CREATE UNIQUE INDEX IF NOT EXISTS ux_feature_vectors_station_fuel_target
+    ON feature_vectors (station_id, fuel_type, target_timestamp);
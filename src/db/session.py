@@ -1,11 +1,53 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 
 from src.config.settings import get_settings
 
-_settings = get_settings()
-_engine = create_engine(f"sqlite:///{_settings.sqlite_path}", echo=False, future=True)
-SessionLocal = sessionmaker(bind=_engine, autoflush=False, autocommit=False, future=True)
+
+@lru_cache
+def get_engine() -> Engine:
+    """Create the process-wide engine on first use (the API does so in its lifespan handler)."""
+
+    settings = get_settings()
+    engine = create_engine(f"sqlite:///{settings.sqlite_path}", echo=False, future=True)
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def dispose_engine() -> None:
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+
+
+def _apply_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    """WAL lets API readers run while the ETL writes; NORMAL sync is safe under WAL."""
+
+    settings = get_settings()
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size_bytes)}")
+        cursor.execute(f"PRAGMA cache_size={-int(settings.sqlite_cache_size_kib)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+class _LazySessionmaker(sessionmaker):
+    """``sessionmaker`` that binds to :func:`get_engine` when the first session is opened."""
+
+    def __call__(self, **local_kw) -> Session:
+        if self.kw.get("bind") is None:
+            self.configure(bind=get_engine())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(autoflush=False, autocommit=False, future=True)
 
 
 def get_session():
@@ -0,0 +1,31 @@
+"""Watermarks for incremental pipeline stages (last processed timestamp per stage)."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from src.db import models
+
+
+def get_watermark(session: Session, name: str) -> Optional[datetime]:
+    return session.execute(
+        select(models.PipelineWatermark.value).where(models.PipelineWatermark.name == name)
+    ).scalar_one_or_none()
+
+
+def set_watermark(session: Session, name: str, value: datetime) -> None:
+    stmt = sqlite_insert(models.PipelineWatermark.__table__).values(
+        name=name, value=value, updated_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.PipelineWatermark.name],
+        set_={"value": stmt.excluded.value, "updated_at": stmt.excluded.updated_at},
+    )
+    session.execute(stmt)
+
+
+__all__ = ["get_watermark", "set_watermark"]
@@ -0,0 +1,128 @@
+"""In-process fan-out of forecast updates to streaming clients.
+
+The forecast cache publishes one pre-encoded server-sent event per refresh;
+:class:`Broadcaster` copies the same bytes into every subscriber's bounded
+queue, so an update costs one build and one encoding regardless of how many
+clients listen. Idle subscribers only hold an empty ``asyncio.Queue``. A client
+that falls ``STREAM_QUEUE_SIZE`` messages behind loses its oldest queued
+message (the newer forecast supersedes it anyway) instead of growing the queue.
+New subscribers receive the latest message right away.
+
+Subscribers live on the event loop of the API worker; :meth:`Broadcaster.publish`
+may be called from any thread (cache refreshes run in worker threads).
+"""
+from __future__ import annotations
+
+import asyncio
+from functools import lru_cache
+from typing import Optional, Set
+
+from src.config.settings import get_settings
+from src.observability.metrics import STREAM_CLIENTS, STREAM_MESSAGES_DROPPED
+
+
+class TooManySubscribers(RuntimeError):
+    pass
+
+
+def format_event(event: str, data: bytes, event_id: Optional[str] = None) -> bytes:
+    """Encode one ``text/event-stream`` message."""
+
+    lines = [f"event: {event}".encode()]
+    if event_id is not None:
+        lines.append(f"id: {event_id}".encode())
+    lines.extend(b"data: " + line for line in data.splitlines() or [b""])
+    return b"\n".join(lines) + b"\n\n"
+
+
+class Subscription:
+    __slots__ = ("queue",)
+
+    def __init__(self, size: int) -> None:
+        self.queue: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=size)
+
+    def offer(self, message: Optional[bytes]) -> None:
+        """Enqueue without blocking, dropping the oldest queued message when full."""
+
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                STREAM_MESSAGES_DROPPED.inc()
+
+
+class Broadcaster:
+    def __init__(self, queue_size: Optional[int] = None, max_subscribers: Optional[int] = None) -> None:
+        settings = get_settings()
+        self.queue_size = queue_size or settings.stream_queue_size
+        self.max_subscribers = max_subscribers or settings.stream_max_clients
+        self._subscribers: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._last: Optional[bytes] = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    @property
+    def full(self) -> bool:
+        return len(self._subscribers) >= self.max_subscribers
+
+    def subscribe(self) -> Subscription:
+        """Register a client on the running loop; it starts with the latest message, if any.
+
+        Pair every call with :meth:`unsubscribe` in a ``finally`` block.
+        """
+
+        if self.full:
+            raise TooManySubscribers(f"{len(self._subscribers)} streaming clients connected")
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self.queue_size)
+        if self._last is not None:
+            subscription.offer(self._last)
+        self._subscribers.add(subscription)
+        STREAM_CLIENTS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+        STREAM_CLIENTS.set(len(self._subscribers))
+
+    def publish(self, message: bytes) -> None:
+        """Send ``message`` (see :func:`format_event`) to every subscriber; safe from any thread."""
+
+        self._last = message
+        self._dispatch(message)
+
+    def close(self) -> None:
+        """End every open stream (on shutdown, so the server does not wait for them)."""
+
+        self._dispatch(None)
+
+    def _dispatch(self, message: Optional[bytes]) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(message)
+        else:
+            loop.call_soon_threadsafe(self._deliver, message)
+
+    def _deliver(self, message: Optional[bytes]) -> None:
+        for subscription in list(self._subscribers):
+            subscription.offer(message)
+
+
+@lru_cache
+def get_broadcaster() -> Broadcaster:
+    """Return the process-wide broadcaster."""
+
+    return Broadcaster()
+
+
+__all__ = ["Broadcaster", "Subscription", "TooManySubscribers", "format_event", "get_broadcaster"]
@@ -0,0 +1,291 @@
+"""Assemble 24h forecasts from the local SQLite store.
+
+The builder never talks to Tankerkönig or OpenWeather: it reads whatever the ETL
+pipeline persisted last (stations, hourly weather rows). Stations are resolved
+through the in-memory station index, recent prices come from the in-memory
+price state, and every requested (station, fuel) series is forecast in one
+batched pass per model (the global one, or the partition model serving the
+series when partitioned training is enabled).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+from sqlalchemy.orm import Session
+
+from src.config.settings import Settings, get_settings
+from src.db.session import SessionLocal
+from src.forecast.encoding import (
+    Format,
+    arrow_ipc,
+    arrow_timestamps,
+    arrow_values,
+    dumps_columnar,
+    repeat_dictionary,
+    step_minutes,
+)
+from src.forecast.price_state import PriceState, get_price_state
+from src.forecast.station_index import StationHit, StationIndex, get_station_index
+from src.lazy_imports import lazy_import
+from src.models.features import interpolate_weather, load_weather_snapshots
+from src.models.inference import horizon_slots, predict_horizon
+from src.models.registry import LoadedModel, ModelRegistry, get_model_registry
+from src.observability.metrics import FORECAST_BUILD_SECONDS
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+
+PLACEHOLDER_NOTE = "AutoML model pending; returning current price as placeholder"
+
+
+@dataclass(slots=True)
+class Forecast:
+    generated_at: datetime
+    station_id: Optional[str]
+    model_version: Optional[str]
+    points: List[dict]
+    payload: bytes  # ``rows`` encoding, built eagerly
+    slots: pd.DatetimeIndex
+    predicted: np.ndarray
+    temperatures: np.ndarray
+    notes: str
+    _encoded: Dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    def to_columnar(self) -> dict:
+        return {
+            "generated_at": self.generated_at.isoformat(),
+            "station_id": self.station_id,
+            "model_version": self.model_version,
+            "notes": self.notes,
+            "start": self.slots[0].isoformat() if len(self.slots) else None,
+            "step_minutes": step_minutes(self.slots),
+            "predicted_price": np.ascontiguousarray(self.predicted, dtype=np.float64),
+            "temperature_c": np.ascontiguousarray(self.temperatures, dtype=np.float64),
+        }
+
+    def encode(self, fmt: Format) -> bytes:
+        """Payload in the requested wire format; cached, since cache entries are served repeatedly."""
+
+        if fmt == "rows":
+            return self.payload
+        encoded = self._encoded.get(fmt)
+        if encoded is None:
+            if fmt == "columnar":
+                encoded = dumps_columnar(self.to_columnar())
+            else:
+                encoded = arrow_ipc(
+                    {
+                        "timestamp": arrow_timestamps(self.slots),
+                        "predicted_price": arrow_values(self.predicted),
+                        "temperature_c": arrow_values(self.temperatures),
+                    },
+                    {
+                        "generated_at": self.generated_at.isoformat(),
+                        "station_id": self.station_id,
+                        "model_version": self.model_version,
+                        "notes": self.notes,
+                    },
+                )
+            self._encoded[fmt] = encoded
+        return encoded
+
+
+@dataclass(slots=True)
+class SeriesForecast:
+    station: StationHit
+    fuel_type: str
+    predicted: np.ndarray
+    model_version: Optional[str] = None
+
+
+@dataclass(slots=True)
+class StationForecasts:
+    generated_at: datetime
+    model_version: Optional[str]
+    slots: pd.DatetimeIndex
+    temperatures: np.ndarray
+    series: List[SeriesForecast]
+
+    def to_dict(self) -> dict:
+        """Columnar body: one price array per series instead of one object per point."""
+
+        return {
+            "generated_at": self.generated_at.isoformat(),
+            "model_version": self.model_version,
+            "start": self.slots[0].isoformat() if len(self.slots) else None,
+            "step_minutes": step_minutes(self.slots),
+            "temperature_c": _to_list(self.temperatures),
+            "series": [
+                {
+                    "station_id": item.station.station_id,
+                    "name": item.station.name,
+                    "brand": item.station.brand,
+                    "distance_km": round(item.station.distance_km, 3),
+                    "fuel_type": item.fuel_type,
+                    "model_version": item.model_version,
+                    "predicted_price": _to_list(item.predicted),
+                }
+                for item in self.series
+            ],
+        }
+
+    def encode(self, fmt: Format) -> bytes:
+        """``columnar`` JSON, or an Arrow IPC stream in long format (one row per series and slot)."""
+
+        if fmt != "arrow":
+            return dumps_columnar(self.to_dict())
+        steps, count = len(self.slots), len(self.series)
+        predicted = (
+            np.concatenate([item.predicted for item in self.series]) if self.series else np.empty(0, np.float64)
+        )
+        return arrow_ipc(
+            {
+                "station_id": repeat_dictionary([item.station.station_id for item in self.series], steps),
+                "fuel_type": repeat_dictionary([item.fuel_type for item in self.series], steps),
+                "timestamp": pa.concat_arrays([arrow_timestamps(self.slots)] * count)
+                if count
+                else arrow_timestamps(self.slots[:0]),
+                "predicted_price": arrow_values(predicted),
+                "temperature_c": arrow_values(np.tile(self.temperatures, count)),
+            },
+            {"generated_at": self.generated_at.isoformat(), "model_version": self.model_version},
+        )
+
+
+class ForecastBuilder:
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        registry: Optional[ModelRegistry] = None,
+        index: Optional[StationIndex] = None,
+        price_state: Optional[PriceState] = None,
+    ) -> None:
+        self.settings = settings or get_settings()
+        self.registry = registry or get_model_registry()
+        self.index = index or get_station_index()
+        self.price_state = price_state or get_price_state()
+
+    def build(self) -> Forecast:
+        """Default forecast for the configured point and fuel; also reloads the station index."""
+
+        settings = self.settings
+        with FORECAST_BUILD_SECONDS.time(kind="default"), SessionLocal() as session:
+            self.index.reload(session)
+            return self.build_point(
+                session, settings.hamburg_lat, settings.hamburg_lng, settings.search_radius_km, settings.fuel_type
+            )
+
+    def build_point(self, session: Session, lat: float, lng: float, radius_km: float, fuel_type: str) -> Forecast:
+        """Forecast for the station nearest to the point, in the ``/next24h`` row format."""
+
+        hit = self.index.nearest(lat, lng, radius_km)
+        forecasts = self.build_stations(session, [hit] if hit else [], [fuel_type])
+        if forecasts.series:
+            predicted = forecasts.series[0].predicted
+            model_version = forecasts.series[0].model_version
+        else:
+            predicted = np.full(len(forecasts.slots), np.nan)
+            model_version = forecasts.model_version
+
+        note = f"AutoML model {model_version}" if model_version else PLACEHOLDER_NOTE
+        points: List[dict] = [
+            {
+                "timestamp": ts.isoformat(),
+                "predicted_price": _nan_to_none(price),
+                "temperature_c": _nan_to_none(temperature),
+                "notes": note,
+            }
+            for ts, price, temperature in zip(
+                forecasts.slots.to_pydatetime(), predicted.tolist(), forecasts.temperatures.tolist()
+            )
+        ]
+
+        return Forecast(
+            generated_at=forecasts.generated_at,
+            station_id=hit.station_id if hit else None,
+            model_version=model_version,
+            points=points,
+            payload=orjson.dumps(points),
+            slots=forecasts.slots,
+            predicted=predicted,
+            temperatures=forecasts.temperatures,
+            notes=note,
+        )
+
+    def build_stations(
+        self,
+        session: Session,
+        stations: Sequence[StationHit],
+        fuel_types: Sequence[str],
+    ) -> StationForecasts:
+        """Forecast every (station, fuel) pair with one model call per serving model.
+
+        Price history is read from the in-memory price state (loaded from the
+        store on first use when nobody has loaded it yet). The weather join,
+        history lookup and model call are timed separately in
+        ``benzin_forecast_build_seconds`` (``kind`` = weather / history / predict).
+        """
+
+        settings = self.settings
+        start_time = datetime.utcnow()
+        interval = timedelta(minutes=settings.prediction_interval_minutes)
+        horizon_steps = int(24 * 60 / settings.prediction_interval_minutes)
+        slots = horizon_slots(start_time, interval, horizon_steps)
+        model = self.registry.active
+
+        pairs = [(station, fuel_type) for station in stations for fuel_type in fuel_types]
+        with FORECAST_BUILD_SECONDS.time(kind="weather"):
+            weather = load_weather_snapshots(
+                session,
+                (slots[0] - timedelta(hours=1)).to_pydatetime(),
+                (slots[-1] + timedelta(hours=1)).to_pydatetime(),
+            )
+            temperatures = interpolate_weather(weather, slots)["temperature_c"].to_numpy()
+
+        series: List[SeriesForecast] = []
+        if pairs:
+            with FORECAST_BUILD_SECONDS.time(kind="history"):
+                if not self.price_state.loaded:
+                    self.price_state.reload(session)
+                keys = [(station.station_id, fuel_type) for station, fuel_type in pairs]
+                history = self.price_state.history(keys, start_time)
+            with FORECAST_BUILD_SECONDS.time(kind="predict"):
+                serving: Dict[Optional[str], Optional[LoadedModel]] = {}
+                groups: Dict[Optional[str], List[int]] = {}
+                versions: List[Optional[str]] = []
+                for position, (station, fuel_type) in enumerate(pairs):
+                    pair_model = self.registry.model_for(station.station_id, station.brand, fuel_type)
+                    version = pair_model.version if pair_model else None
+                    serving[version] = pair_model
+                    groups.setdefault(version, []).append(position)
+                    versions.append(version)
+                predicted = np.empty((len(pairs), len(slots)))
+                for version, rows in groups.items():
+                    predicted[rows] = predict_horizon(history[rows], slots, weather, serving[version])
+            series = [
+                SeriesForecast(station=station, fuel_type=fuel_type, predicted=row, model_version=version)
+                for (station, fuel_type), row, version in zip(pairs, predicted, versions)
+            ]
+
+        return StationForecasts(
+            generated_at=start_time,
+            model_version=model.version if model else None,
+            slots=slots,
+            temperatures=temperatures,
+            series=series,
+        )
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    return [_nan_to_none(value) for value in values.tolist()]
+
+
+__all__ = ["Forecast", "ForecastBuilder", "SeriesForecast", "StationForecasts"]
@@ -0,0 +1,293 @@
+"""In-process cache holding the prebuilt, pre-serialized forecast payload.
+
+The scheduler refreshes the cache after every ETL run. Requests only read the
+current entry; once it is older than the TTL it is still served while a single
+background thread rebuilds it (stale-while-revalidate). Only when there is no
+entry yet, or it is older than TTL + stale window, is the forecast rebuilt
+inline, and even then the rebuild reads from SQLite only. Either way at most one
+rebuild runs at a time: concurrent misses wait for the one in flight.
+
+Forecasts for arbitrary points (``lat``/``lng``/``radius_km``/``fuel_type``) go
+through :class:`RegionCache`: the point is snapped to the centre of a grid cell
+(``FORECAST_REGION_CELL_KM`` on a side; longitude cells are widened by
+``1 / cos(latitude)`` of their row) and the radius rounded up to a bucket
+(``FORECAST_REGION_RADIUS_STEP_KM``), so nearby queries share one entry. Entries
+are keyed by cell, radius bucket, fuel, active model version and newest
+capture, evicted least-recently-used once their estimated size exceeds
+``FORECAST_REGION_CACHE_MB``, and dropped whenever the default forecast is
+refreshed (new capture or model). Concurrent misses for the same key wait for
+one build.
+
+Every refresh of the default forecast is published once, as a server-sent
+event with the columnar body, to the streaming clients of this process
+(``src/forecast/broadcast.py``).
+"""
+from __future__ import annotations
+
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.db.session import SessionLocal
+from src.forecast.broadcast import format_event, get_broadcaster
+from src.forecast.builder import Forecast, ForecastBuilder
+from src.forecast.station_index import KM_PER_DEGREE_LAT
+from src.observability.metrics import FORECAST_CACHE_BYTES, FORECAST_CACHE_EVICTIONS, FORECAST_CACHE_REQUESTS
+
+RegionKey = Tuple[int, int, float, str, Optional[str], Optional[datetime]]
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    forecast: Forecast
+    built_at: float  # time.monotonic() of the build
+
+    def age(self) -> float:
+        return time.monotonic() - self.built_at
+
+
+def forecast_nbytes(forecast: Forecast) -> int:
+    """Rough resident size of a forecast: payloads, arrays and the per-point row dicts."""
+
+    points = sum(
+        sys.getsizeof(point) + sum(sys.getsizeof(value) for value in point.values()) for point in forecast.points
+    )
+    encoded = sum(len(payload) for payload in forecast._encoded.values())
+    arrays = forecast.predicted.nbytes + forecast.temperatures.nbytes + forecast.slots.nbytes
+    return len(forecast.payload) + encoded + arrays + points
+
+
+class RegionCache:
+    """Bounded LRU of located forecasts with per-key request coalescing."""
+
+    def __init__(
+        self,
+        builder: ForecastBuilder,
+        max_bytes: Optional[int] = None,
+        cell_km: Optional[float] = None,
+        radius_step_km: Optional[float] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        self.builder = builder
+        self.max_bytes = max_bytes if max_bytes is not None else settings.forecast_region_cache_mb * 2**20
+        self.cell_deg = (cell_km or settings.forecast_region_cell_km) / KM_PER_DEGREE_LAT
+        self.radius_step_km = radius_step_km or settings.forecast_region_radius_step_km
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.forecast_cache_ttl_seconds
+        self._entries: "OrderedDict[RegionKey, Tuple[CacheEntry, int]]" = OrderedDict()
+        self._inflight: Dict[RegionKey, Future] = {}
+        self._bytes = 0
+        self._generation = 0  # bumped by clear(); builds started before it are not stored
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def lng_cell_deg(self, lat_cell: int) -> float:
+        """Longitude width of the cells in one latitude row, so they are as wide in km as they are tall."""
+
+        latitude = math.radians((lat_cell + 0.5) * self.cell_deg)
+        return self.cell_deg / max(math.cos(latitude), 0.01)
+
+    def key(self, lat: float, lng: float, radius_km: float, fuel_type: str) -> RegionKey:
+        radius = math.ceil(radius_km / self.radius_step_km - 1e-9) * self.radius_step_km
+        lat_cell = math.floor(lat / self.cell_deg)
+        return (
+            lat_cell,
+            math.floor(lng / self.lng_cell_deg(lat_cell)),
+            round(radius, 6),
+            fuel_type,
+            self.builder.registry.active_version,
+            self.builder.price_state.captured_at,
+        )
+
+    def get(self, lat: float, lng: float, radius_km: float, fuel_type: str) -> CacheEntry:
+        """Forecast for the cell containing the point, built at most once per key at a time."""
+
+        key = self.key(lat, lng, radius_km, fuel_type)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0].age() <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                FORECAST_CACHE_REQUESTS.inc(cache="region", result="hit")
+                return cached[0]
+            pending = self._inflight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[key] = Future()
+                generation = self._generation
+        if not leader:
+            FORECAST_CACHE_REQUESTS.inc(cache="region", result="coalesced")
+            return pending.result()
+
+        FORECAST_CACHE_REQUESTS.inc(cache="region", result="miss")
+        try:
+            entry = self._build(key)
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            if generation == self._generation:
+                self._store(key, entry)
+        pending.set_result(entry)
+        return entry
+
+    def _build(self, key: RegionKey) -> CacheEntry:
+        lat_cell, lng_cell, radius_km, fuel_type = key[:4]
+        lat = (lat_cell + 0.5) * self.cell_deg
+        lng = (lng_cell + 0.5) * self.lng_cell_deg(lat_cell)
+        with SessionLocal() as session:
+            forecast = self.builder.build_point(session, lat, lng, radius_km, fuel_type)
+        return CacheEntry(forecast=forecast, built_at=time.monotonic())
+
+    def _store(self, key: RegionKey, entry: CacheEntry) -> None:
+        size = forecast_nbytes(entry.forecast)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[key] = (entry, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            FORECAST_CACHE_EVICTIONS.inc(cache="region")
+        FORECAST_CACHE_BYTES.set(self._bytes, cache="region")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+        FORECAST_CACHE_BYTES.set(0, cache="region")
+
+
+class ForecastCache:
+    def __init__(
+        self,
+        builder: Optional[ForecastBuilder] = None,
+        ttl_seconds: Optional[float] = None,
+        stale_seconds: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        self.builder = builder or ForecastBuilder(settings)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.forecast_cache_ttl_seconds
+        self.stale_seconds = stale_seconds if stale_seconds is not None else settings.forecast_cache_stale_seconds
+        self.regions = RegionCache(self.builder)
+        self._entry: Optional[CacheEntry] = None
+        self._build_lock = threading.Lock()
+        self._inflight: Optional[Future] = None  # the rebuild requests are waiting for, if any
+        self._lock = threading.Lock()
+
+    @property
+    def entry(self) -> Optional[CacheEntry]:
+        return self._entry
+
+    def refresh(self) -> CacheEntry:
+        """Rebuild the forecast, swap it in atomically and publish it; located forecasts are dropped."""
+
+        with self._build_lock:
+            forecast = self.builder.build()
+            entry = CacheEntry(forecast=forecast, built_at=time.monotonic())
+            self._entry = entry
+            self.regions.clear()
+        get_broadcaster().publish(
+            format_event("forecast", forecast.encode("columnar"), forecast.generated_at.isoformat())
+        )
+        logger.debug("Forecast cache refreshed ({} points)", len(forecast.points))
+        return entry
+
+    def get(self) -> CacheEntry:
+        """Return the cached entry, revalidating in the background once stale.
+
+        Misses (no entry yet, or expired past the stale window) and background
+        revalidations share one rebuild at a time; concurrent callers wait for it.
+        """
+
+        entry = self._entry
+        if entry is None:
+            return self._rebuild()
+
+        age = entry.age()
+        if age <= self.ttl_seconds:
+            FORECAST_CACHE_REQUESTS.inc(cache="default", result="hit")
+            return entry
+        if age <= self.ttl_seconds + self.stale_seconds:
+            FORECAST_CACHE_REQUESTS.inc(cache="default", result="stale")
+            self._revalidate_in_background()
+            return entry
+
+        try:
+            return self._rebuild()
+        except Exception:  # pragma: no cover - depends on DB state
+            logger.exception("Forecast rebuild failed; serving expired entry")
+            return entry
+
+    def _join_rebuild(self) -> Tuple[Future, bool]:
+        """``(future, leader)``: the rebuild in flight, and whether the caller must run it."""
+
+        with self._lock:
+            leader = self._inflight is None
+            if leader:
+                self._inflight = Future()
+            return self._inflight, leader
+
+    def _lead_rebuild(self, pending: Future) -> CacheEntry:
+        try:
+            entry = self.refresh()
+        except BaseException as exc:
+            with self._lock:
+                self._inflight = None
+            pending.set_exception(exc)
+            raise
+        with self._lock:
+            self._inflight = None
+        pending.set_result(entry)
+        return entry
+
+    def _rebuild(self) -> CacheEntry:
+        pending, leader = self._join_rebuild()
+        if not leader:
+            FORECAST_CACHE_REQUESTS.inc(cache="default", result="coalesced")
+            return pending.result()
+        FORECAST_CACHE_REQUESTS.inc(cache="default", result="miss")
+        return self._lead_rebuild(pending)
+
+    def _revalidate_in_background(self) -> None:
+        pending, leader = self._join_rebuild()
+        if not leader:
+            return
+
+        def _run() -> None:
+            try:
+                self._lead_rebuild(pending)
+            except Exception:  # pragma: no cover - depends on DB state
+                logger.exception("Background forecast revalidation failed")
+
+        threading.Thread(target=_run, name="forecast-revalidate", daemon=True).start()
+
+
+@lru_cache
+def get_forecast_cache() -> ForecastCache:
+    """Return the process-wide forecast cache."""
+
+    return ForecastCache()
+
+
+__all__ = ["CacheEntry", "ForecastCache", "RegionCache", "forecast_nbytes", "get_forecast_cache"]
@@ -0,0 +1,93 @@
+"""Wire encodings of forecast payloads.
+
+Three shapes are served:
+
+- ``rows`` – the original list of ``{timestamp, predicted_price, temperature_c, notes}``
+  objects (JSON, encoded with orjson);
+- ``columnar`` – JSON with a start time, a step and parallel value arrays, so the
+  timestamps and the repeated note are sent once instead of once per point;
+- ``arrow`` – an Arrow IPC stream for machine consumers (float64 values, UTC
+  second timestamps, forecast metadata in the schema metadata).
+"""
+from __future__ import annotations
+
+from typing import Dict, Literal, Mapping, Optional, Sequence
+
+import numpy as np
+import orjson
+
+from src.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+pa = lazy_import("pyarrow")
+
+Format = Literal["rows", "columnar", "arrow"]
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.benzin.columnar+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+MEDIA_TYPES: Dict[str, str] = {
+    "rows": JSON_MEDIA_TYPE,
+    "columnar": COLUMNAR_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE,
+}
+
+
+def step_minutes(slots: pd.DatetimeIndex) -> float:
+    return (slots[1] - slots[0]).total_seconds() / 60.0 if len(slots) > 1 else 0.0
+
+
+def dumps_columnar(body: Mapping[str, object]) -> bytes:
+    """orjson with NumPy support; NaN values are emitted as ``null``."""
+
+    return orjson.dumps(body, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def arrow_timestamps(slots: pd.DatetimeIndex) -> pa.Array:
+    return pa.array(slots.values.astype("datetime64[s]"), type=pa.timestamp("s", tz="UTC"))
+
+
+def arrow_values(values: np.ndarray) -> pa.Array:
+    """float64 column with NaN mapped to null."""
+
+    values = np.asarray(values, dtype=np.float64)
+    return pa.array(values, mask=np.isnan(values), type=pa.float64())
+
+
+def arrow_ipc(columns: Mapping[str, pa.Array], metadata: Mapping[str, Optional[str]]) -> bytes:
+    """Serialize the columns as a single-batch Arrow IPC stream."""
+
+    table = pa.table(dict(columns))
+    table = table.replace_schema_metadata(
+        {key: value for key, value in metadata.items() if value is not None}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def repeat_dictionary(values: Sequence[str], repeats: int) -> pa.Array:
+    """Dictionary-encoded column repeating every value ``repeats`` times (long format keys)."""
+
+    positions: Dict[str, int] = {}
+    codes = np.array([positions.setdefault(value, len(positions)) for value in values], dtype=np.int32)
+    return pa.DictionaryArray.from_arrays(
+        pa.array(np.repeat(codes, repeats)), pa.array(list(positions), type=pa.string())
+    )
+
+
+__all__ = [
+    "ARROW_MEDIA_TYPE",
+    "COLUMNAR_MEDIA_TYPE",
+    "Format",
+    "JSON_MEDIA_TYPE",
+    "MEDIA_TYPES",
+    "arrow_ipc",
+    "arrow_timestamps",
+    "arrow_values",
+    "dumps_columnar",
+    "repeat_dictionary",
+    "step_minutes",
+]
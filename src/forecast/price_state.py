@@ -0,0 +1,251 @@
+"""In-memory price state: a ring buffer of recent slot prices per (station, fuel).
+
+Every series is one row of a single float64 block on the regular slot grid
+(``prediction_interval_minutes``), holding the price in effect at each slot,
+exactly like ``load_price_series`` reconstructs it from change events. All
+series share one clock: when a capture lands in a later slot, the previous
+prices are carried forward into the skipped slots, then the captured prices
+are written to the newest slot.
+
+The ring is double-written (slot ``i`` lives at columns ``i`` and
+``i + capacity``), so the last ``capacity`` slots of a series, oldest first,
+are always one contiguous slice: :meth:`PriceState.window` and
+:meth:`PriceState.block` return views, not copies. They are live, so a later
+capture changes what they show; copy them to keep a snapshot.
+
+The state is rebuilt from ``price_snapshots`` at startup, the ETL writes into
+it after every stored capture (when it runs in the same process), and
+:meth:`PriceState.sync` replays new change events written by another process.
+Forecast builds read price history from here only, never from the database.
+"""
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.config.settings import get_settings
+from src.models.features import HISTORY_STEPS, last_capture, load_price_events, load_price_series
+
+SeriesKey = Tuple[str, str]  # (station_id, fuel_type)
+EPOCH = datetime(1970, 1, 1)
+INITIAL_ROWS = 64
+
+
+class PriceState:
+    def __init__(self, capacity: Optional[int] = None, step: Optional[timedelta] = None) -> None:
+        settings = get_settings()
+        self.capacity = capacity or settings.price_state_slots
+        self.step = step or timedelta(minutes=settings.prediction_interval_minutes)
+        self._lock = threading.RLock()
+        self._rows: Dict[SeriesKey, int] = {}
+        self._keys: List[SeriesKey] = []
+        self._values = np.full((0, 2 * self.capacity), np.nan)
+        self._head = self.capacity - 1  # column of the newest slot (and ``+ capacity``)
+        self._head_slot: Optional[datetime] = None
+        self._captured_at: Optional[datetime] = None
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def captured_at(self) -> Optional[datetime]:
+        """Time of the newest capture applied to the state."""
+
+        return self._captured_at
+
+    @property
+    def keys(self) -> List[SeriesKey]:
+        """Series in row order of :meth:`block`."""
+
+        return list(self._keys)
+
+    @property
+    def nbytes(self) -> int:
+        return self._values.nbytes
+
+    def slot(self, moment: datetime) -> datetime:
+        return EPOCH + ((moment - EPOCH) // self.step) * self.step
+
+    def window_start(self) -> Optional[datetime]:
+        """Slot of the oldest column in :meth:`window` / :meth:`block`."""
+
+        if self._head_slot is None:
+            return None
+        return self._head_slot - self.step * (self.capacity - 1)
+
+    def window(self, key: SeriesKey) -> Optional[np.ndarray]:
+        """The last ``capacity`` slot prices of one series, oldest first (a view)."""
+
+        row = self._rows.get(key)
+        if row is None:
+            return None
+        head = self._head
+        return self._values[row, head + 1 : head + 1 + self.capacity]
+
+    def block(self) -> np.ndarray:
+        """``(len(self), capacity)`` view of every series, rows ordered as :attr:`keys`."""
+
+        head = self._head
+        return self._values[: len(self._keys), head + 1 : head + 1 + self.capacity]
+
+    def history(self, keys: Sequence[SeriesKey], end: datetime, length: int = HISTORY_STEPS) -> np.ndarray:
+        """``(len(keys), length)`` slot prices ending at ``end``, as ``history_matrix`` returns them.
+
+        Slots after the newest capture carry its price forward; unknown series
+        and slots older than the buffer are NaN.
+        """
+
+        matrix = np.full((len(keys), length), np.nan)
+        with self._lock:
+            if self._head_slot is None or not keys:
+                return matrix
+            rows = np.fromiter((self._rows.get(key, -1) for key in keys), dtype=np.intp, count=len(keys))
+            known = rows >= 0
+            if not known.any():
+                return matrix
+            last_slot = self.slot(end)
+            # Offset of every requested slot from the newest buffered slot, in steps.
+            offsets = np.arange(1 - length, 1) + (last_slot - self._head_slot) // self.step
+            buffered = (offsets <= 0) & (offsets > -self.capacity)
+            carried = offsets > 0
+            window = self.block()[rows[known]]
+            values = matrix[known]
+            values[:, buffered] = window[:, offsets[buffered] + self.capacity - 1]
+            values[:, carried] = window[:, -1:]
+            matrix[known] = values
+        return matrix
+
+    def record(self, captured_at: datetime, rows: Iterable[Mapping[str, object]]) -> int:
+        """Apply one capture (``station_id``/``fuel_type``/``price_eur`` rows); return the rows written.
+
+        Captures older than the newest applied one are ignored; a capture in the
+        same slot overwrites it (the last capture per slot wins, as on the grid).
+        """
+
+        with self._lock:
+            if self._captured_at is not None and captured_at < self._captured_at:
+                logger.debug("Ignoring capture at {} older than price state ({})", captured_at, self._captured_at)
+                return 0
+            self._advance(self.slot(captured_at))
+            written = 0
+            head, capacity = self._head, self.capacity
+            for row in rows:
+                index = self._row((str(row["station_id"]), str(row["fuel_type"])))
+                self._values[index, head] = self._values[index, head + capacity] = float(row["price_eur"])
+                written += 1
+            self._captured_at = captured_at
+            return written
+
+    def reload(self, session: Session) -> int:
+        """Rebuild the buffer from ``price_snapshots``; return the number of series."""
+
+        captured = last_capture(session)
+        if captured is None:
+            with self._lock:
+                self._reset([], np.full((0, self.capacity), np.nan), None, None)
+            return 0
+        start = self.slot(captured) - self.step * (self.capacity - 1)
+        wide = load_price_series(session, start, self.step, captured)
+        grid = wide.to_numpy(dtype="float64").T[:, -self.capacity :]
+        if grid.shape[1] < self.capacity:
+            pad = np.full((grid.shape[0], self.capacity - grid.shape[1]), np.nan)
+            grid = np.hstack([pad, grid])
+        keys = [(str(station_id), str(fuel_type)) for station_id, fuel_type in wide.columns]
+        with self._lock:
+            self._reset(keys, grid, self.slot(captured), captured)
+        logger.info("Loaded price state: {} series, {:.1f} MiB", len(keys), self.nbytes / 2**20)
+        return len(keys)
+
+    def sync(self, session: Session) -> int:
+        """Replay change events stored since the newest applied capture; return how many were applied.
+
+        Loads the whole state when it is empty and reloads it when the gap is
+        longer than the buffer.
+        """
+
+        if not self._loaded:
+            self.reload(session)
+            return 0
+        captured = last_capture(session)
+        since = self._captured_at
+        if captured is None or (since is not None and captured <= since):
+            return 0
+        if since is None or self.slot(captured) - self.slot(since) >= self.step * self.capacity:
+            self.reload(session)
+            return 0
+
+        events = load_price_events(session, since, captured)
+        events = events[events["captured_at"] > since]
+        applied = 0
+        for moment, group in events.groupby("captured_at", sort=True):
+            applied += self.record(moment.to_pydatetime(), group.to_dict("records"))
+        self.record(captured, ())  # advance the clock to the last capture cycle
+        return applied
+
+    def _reset(
+        self,
+        keys: List[SeriesKey],
+        grid: np.ndarray,
+        head_slot: Optional[datetime],
+        captured_at: Optional[datetime],
+    ) -> None:
+        values = np.full((max(INITIAL_ROWS, len(keys)), 2 * self.capacity), np.nan)
+        values[: len(keys), : self.capacity] = grid
+        values[: len(keys), self.capacity :] = grid
+        self._values = values
+        self._keys = keys
+        self._rows = {key: index for index, key in enumerate(keys)}
+        self._head = self.capacity - 1
+        self._head_slot = head_slot
+        self._captured_at = captured_at
+        self._loaded = True
+
+    def _row(self, key: SeriesKey) -> int:
+        index = self._rows.get(key)
+        if index is None:
+            index = len(self._keys)
+            if index == self._values.shape[0]:
+                grown = np.full((max(INITIAL_ROWS, 2 * index), 2 * self.capacity), np.nan)
+                grown[:index] = self._values
+                self._values = grown
+            self._rows[key] = index
+            self._keys.append(key)
+        return index
+
+    def _advance(self, slot: datetime) -> None:
+        """Move the head to ``slot``, carrying the newest prices into every skipped slot."""
+
+        if self._head_slot is None:
+            self._head_slot = slot
+            return
+        steps = (slot - self._head_slot) // self.step
+        if steps <= 0:
+            return
+        count, head, capacity = len(self._keys), self._head, self.capacity
+        positions = (head + np.arange(1, min(steps, capacity) + 1)) % capacity
+        newest = self._values[:count, head : head + 1]
+        self._values[:count, positions] = newest
+        self._values[:count, positions + capacity] = newest
+        self._head = (head + steps) % capacity
+        self._head_slot = slot
+
+
+@lru_cache
+def get_price_state() -> PriceState:
+    """Return the process-wide price state (empty until the first reload)."""
+
+    return PriceState()
+
+
+__all__ = ["PriceState", "SeriesKey", "get_price_state"]
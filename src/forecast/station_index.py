@@ -0,0 +1,137 @@
+"""In-memory spatial index over the cached ``stations`` table.
+
+Stations are bucketed into a lat/lng grid whose cells are roughly
+``cell_km`` wide. A radius query only inspects the cells overlapping the
+query's bounding box and then filters candidates with a vectorised haversine,
+so "stations within r km of (lat, lng)" never touches the database or
+Tankerkönig.
+"""
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from src.config.settings import get_settings
+from src.db import models
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres; accepts scalars or NumPy arrays."""
+
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(np.asarray(lng2) - lng1)
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+@dataclass(slots=True)
+class StationHit:
+    station_id: str
+    name: Optional[str]
+    brand: Optional[str]
+    lat: float
+    lng: float
+    distance_km: float
+
+
+class StationIndex:
+    def __init__(self, cell_km: Optional[float] = None) -> None:
+        self.cell_km = cell_km or get_settings().station_index_cell_km
+        self.cell_deg = self.cell_km / KM_PER_DEGREE_LAT
+        self._lock = threading.Lock()
+        self._load([], [], [], [], [])
+
+    def __len__(self) -> int:
+        return len(self._state[0])
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def _load(self, ids, names, brands, lats, lngs) -> None:
+        lat_arr = np.asarray(lats, dtype="float64")
+        lng_arr = np.asarray(lngs, dtype="float64")
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        for position, (lat, lng) in enumerate(zip(lat_arr.tolist(), lng_arr.tolist())):
+            buckets.setdefault(self._cell(lat, lng), []).append(position)
+        # Swap everything in one assignment so readers never see a half-built index.
+        self._state = (
+            np.asarray(ids, dtype=object),
+            list(names),
+            list(brands),
+            lat_arr,
+            lng_arr,
+            {cell: np.asarray(members, dtype=np.intp) for cell, members in buckets.items()},
+        )
+
+    def reload(self, session: Session) -> int:
+        """Rebuild the index from the ``stations`` table; return the station count."""
+
+        rows = session.execute(
+            select(models.Station.id, models.Station.name, models.Station.brand, models.Station.lat, models.Station.lng)
+        ).all()
+        columns = list(zip(*rows)) if rows else [[], [], [], [], []]
+        with self._lock:
+            self._load(*columns)
+        return len(rows)
+
+    def within(self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None) -> List[StationHit]:
+        """Stations within ``radius_km`` of the point, nearest first."""
+
+        ids, names, brands, lats, lngs, buckets = self._state
+        if not len(ids):
+            return []
+
+        lat_span = radius_km / KM_PER_DEGREE_LAT
+        lng_span = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        lat_lo, lng_lo = self._cell(lat - lat_span, lng - lng_span)
+        lat_hi, lng_hi = self._cell(lat + lat_span, lng + lng_span)
+        candidates = [
+            buckets[(i, j)]
+            for i in range(lat_lo, lat_hi + 1)
+            for j in range(lng_lo, lng_hi + 1)
+            if (i, j) in buckets
+        ]
+        if not candidates:
+            return []
+
+        positions = np.concatenate(candidates)
+        distances = haversine_km(lat, lng, lats[positions], lngs[positions])
+        mask = distances <= radius_km
+        positions, distances = positions[mask], distances[mask]
+        order = np.argsort(distances, kind="stable")[:limit]
+        return [
+            StationHit(
+                station_id=ids[position],
+                name=names[position],
+                brand=brands[position],
+                lat=float(lats[position]),
+                lng=float(lngs[position]),
+                distance_km=float(distance),
+            )
+            for position, distance in zip(positions[order].tolist(), distances[order].tolist())
+        ]
+
+    def nearest(self, lat: float, lng: float, radius_km: float) -> Optional[StationHit]:
+        hits = self.within(lat, lng, radius_km, limit=1)
+        return hits[0] if hits else None
+
+
+@lru_cache
+def get_station_index() -> StationIndex:
+    """Return the process-wide station index (empty until the first reload)."""
+
+    return StationIndex()
+
+
+__all__ = ["StationHit", "StationIndex", "get_station_index", "haversine_km"]
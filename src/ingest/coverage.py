@@ -0,0 +1,190 @@
+"""Coverage planning for multi-region Tankerkönig polling.
+
+``list.php`` only answers radius queries of up to 25 km, so every configured
+region is tiled into overlapping circles on a hexagonal lattice. The lattice
+is laid out for circles of ``TILE_SPACING * r`` (spacing ``sqrt(3)`` times that
+within a row, 1.5 times between rows), so the real circles of radius ``r``
+overlap everywhere, including at the triple points, and absorb the error of the
+flat projection. Each row converts its kilometre offsets to longitude at its
+own latitude. A sweep polls every tile once through the shared Tankerkönig
+rate limiter and dedupes stations by UUID across overlapping tiles.
+
+Sweeps are only needed to discover stations; the frequent price refresh uses
+the cached station IDs with ``prices.php`` (10 IDs per call), so the number of
+calls per cycle grows with the station count / 10 instead of with the area.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.config.settings import CoverageRegion, Settings, get_settings
+from src.db import models
+from src.db.watermarks import get_watermark, set_watermark
+from src.forecast.station_index import KM_PER_DEGREE_LAT, haversine_km
+from src.ingest.tankerkoenig import AsyncTankerkoenigClient, Station, TankerkoenigClient
+from src.ingest.upstream import Fallback, UpstreamUnavailable
+
+MAX_TILE_RADIUS_KM = 25.0
+TILE_SPACING = 0.95  # lattice cell circumradius as a fraction of the tile radius
+SWEEP_WATERMARK = "station_sweep"
+SWEEP_FUEL_TYPE = "all"
+
+
+@dataclass(slots=True, frozen=True)
+class Tile:
+    region: str
+    lat: float
+    lng: float
+    radius_km: float
+
+
+def configured_regions(settings: Optional[Settings] = None) -> List[CoverageRegion]:
+    """Configured regions, or one circle around the location defaults."""
+
+    settings = settings or get_settings()
+    if settings.coverage_regions:
+        return list(settings.coverage_regions)
+    return [
+        CoverageRegion(
+            name="default",
+            lat=settings.hamburg_lat,
+            lng=settings.hamburg_lng,
+            radius_km=settings.search_radius_km,
+        )
+    ]
+
+
+def plan_tiles(region: CoverageRegion, tile_radius_km: float = MAX_TILE_RADIUS_KM) -> List[Tile]:
+    """Overlapping circles of ``tile_radius_km`` that together cover the region."""
+
+    radius = min(tile_radius_km, MAX_TILE_RADIUS_KM)
+    if region.radius_km <= radius:
+        return [Tile(region.name, region.lat, region.lng, region.radius_km)]
+
+    cell = TILE_SPACING * radius
+    dx, dy = math.sqrt(3) * cell, 1.5 * cell
+    rows = math.ceil((region.radius_km + cell) / dy)
+    cols = math.ceil((region.radius_km + cell) / dx) + 1
+    tiles: List[Tile] = []
+    for row in range(-rows, rows + 1):
+        y = row * dy
+        lat = region.lat + y / KM_PER_DEGREE_LAT
+        km_per_degree_lng = KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6)
+        offset = dx / 2 if row % 2 else 0.0
+        for col in range(-cols, cols + 1):
+            x = col * dx + offset
+            # Keep every tile whose hexagonal cell can touch the region.
+            if math.hypot(x, y) > region.radius_km + cell:
+                continue
+            tiles.append(Tile(region=region.name, lat=lat, lng=region.lng + x / km_per_degree_lng, radius_km=radius))
+    return tiles
+
+
+def plan_coverage(regions: Iterable[CoverageRegion], tile_radius_km: float = MAX_TILE_RADIUS_KM) -> List[Tile]:
+    return [tile for region in regions for tile in plan_tiles(region, tile_radius_km)]
+
+
+def dedupe_stations(batches: Iterable[Iterable[Station]], regions: Iterable[CoverageRegion]) -> List[Station]:
+    """Merge tile results: one entry per UUID, restricted to stations inside a region."""
+
+    regions = list(regions)
+    unique: Dict[str, Station] = {}
+    for batch in batches:
+        for station in batch:
+            if station.id in unique:
+                continue
+            if any(
+                haversine_km(region.lat, region.lng, station.lat, station.lng) <= region.radius_km
+                for region in regions
+            ):
+                unique[station.id] = station
+    return list(unique.values())
+
+
+class CoveragePlanner:
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        client: Optional[TankerkoenigClient] = None,
+        async_client: Optional[AsyncTankerkoenigClient] = None,
+    ) -> None:
+        self.settings = settings or get_settings()
+        self.client = client or TankerkoenigClient()
+        self.async_client = async_client or AsyncTankerkoenigClient()
+        self.regions = configured_regions(self.settings)
+        self.tiles = plan_coverage(self.regions, self.settings.coverage_tile_radius_km)
+
+    def sweep(self) -> List[Station]:
+        """Poll ``list.php`` once per tile (paced by the shared rate limiter) and dedupe.
+
+        Raises :class:`UpstreamUnavailable` if any tile could not be listed or was
+        only answered from the last-good cache, so the sweep is not marked done.
+        """
+
+        batches = [
+            self.client.list_stations(tile.lat, tile.lng, tile.radius_km, SWEEP_FUEL_TYPE) for tile in self.tiles
+        ]
+        return self._merge(self._complete(batches))
+
+    async def sweep_async(self) -> List[Station]:
+        """Async sweep; raises :class:`UpstreamUnavailable` like :meth:`sweep`."""
+
+        results = await asyncio.gather(
+            *(
+                self.async_client.list_stations(tile.lat, tile.lng, tile.radius_km, SWEEP_FUEL_TYPE)
+                for tile in self.tiles
+            ),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise UpstreamUnavailable(f"Coverage sweep incomplete: {result}") from result
+        return self._merge(self._complete(results))
+
+    @staticmethod
+    def _complete(batches: List[Any]) -> List[List[Station]]:
+        stale = sum(isinstance(batch, Fallback) for batch in batches)
+        if stale:
+            raise UpstreamUnavailable(f"Coverage sweep incomplete: {stale} tiles only answered from cache")
+        return batches
+
+    def _merge(self, batches: List[List[Station]]) -> List[Station]:
+        stations = dedupe_stations(batches, self.regions)
+        logger.info(
+            "Coverage sweep: {} tiles, {} listings, {} unique stations",
+            len(self.tiles),
+            sum(len(batch) for batch in batches),
+            len(stations),
+        )
+        return stations
+
+    def sweep_due(self, session: Session) -> bool:
+        """True when no stations are cached or the last sweep is older than the sweep interval."""
+
+        if not session.execute(select(func.count()).select_from(models.Station)).scalar_one():
+            return True
+        last_sweep = get_watermark(session, SWEEP_WATERMARK)
+        interval = timedelta(hours=self.settings.station_sweep_interval_hours)
+        return last_sweep is None or datetime.utcnow() - last_sweep >= interval
+
+    @staticmethod
+    def mark_swept(session: Session) -> None:
+        set_watermark(session, SWEEP_WATERMARK, datetime.utcnow())
+
+
+__all__ = [
+    "CoveragePlanner",
+    "Tile",
+    "configured_regions",
+    "dedupe_stations",
+    "plan_coverage",
+    "plan_tiles",
+]
@@ -1,118 +1,248 @@
 """ETL orchestration for fuel + weather data."""
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from loguru import logger
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from src.config.settings import get_settings
-from src.db import models
+from src.db import bulk, models
+from src.db.archive import ParquetArchive
 from src.db.session import SessionLocal
-from src.ingest.tankerkoenig import TankerkoenigClient
+from src.db.watermarks import set_watermark
+from src.forecast.price_state import get_price_state
+from src.ingest.coverage import CoveragePlanner
+from src.ingest.price_changes import PriceChangeTracker
+from src.ingest.tankerkoenig import AsyncTankerkoenigClient, Station, TankerkoenigClient
+from src.ingest.upstream import Fallback, UpstreamUnavailable
 from src.ingest.weather_history import HistoricalWeatherIngestor
+from src.ingest.weather_openweather import WeatherPoint
 from src.ingest.weather_service import WeatherService
+from src.models.features import CAPTURE_WATERMARK, WEATHER_WATERMARK, FeatureBuilder
+from src.observability.metrics import DB_COMMIT_SECONDS, ETL_STAGE_SECONDS, ROWS_DEDUPLICATED, ROWS_INGESTED
 
 
 class ETLPipeline:
     def __init__(self) -> None:
         self.settings = get_settings()
         self.tk_client = TankerkoenigClient()
+        self.async_tk_client = AsyncTankerkoenigClient()
+        self.coverage = CoveragePlanner(self.settings, self.tk_client, self.async_tk_client)
+        self.price_tracker = PriceChangeTracker()
         self.weather_service = WeatherService()
         self.history_ingestor = HistoricalWeatherIngestor()
+        self.archive = ParquetArchive()
+        self.feature_builder = FeatureBuilder()
 
     def sync_stations(self, session: Session) -> None:
-        stations = self.tk_client.list_stations(
-            lat=self.settings.hamburg_lat,
-            lng=self.settings.hamburg_lng,
-            radius_km=self.settings.search_radius_km,
-            fuel_type=self.settings.fuel_type,
-        )
-        for station in stations:
-            existing = session.get(models.Station, station.id)
-            if existing:
-                existing.name = station.name
-                existing.brand = station.brand
-                existing.lat = station.lat
-                existing.lng = station.lng
-                existing.street = station.street
-                existing.house_number = station.house_number
-                existing.post_code = station.post_code
-            else:
-                session.add(
-                    models.Station(
-                        id=station.id,
-                        name=station.name,
-                        brand=station.brand,
-                        lat=station.lat,
-                        lng=station.lng,
-                        street=station.street,
-                        house_number=station.house_number,
-                        post_code=station.post_code,
-                    )
-                )
-        session.commit()
-        logger.info("Synced %s stations from Tankerkönig", len(stations))
+        """Sweep every coverage tile with ``list.php`` and upsert the deduped stations."""
+
+        self._store_stations(session, self.coverage.sweep())
 
     def capture_prices(self, session: Session) -> None:
-        station_ids = [row[0] for row in session.execute(select(models.Station.id)).all()]
+        station_ids = self._cached_station_ids(session)
         if not station_ids:
             logger.warning("No stations cached yet; skipping price capture")
             return
 
-        for chunk_start in range(0, len(station_ids), 10):
-            chunk = station_ids[chunk_start : chunk_start + 10]
-            prices = self.tk_client.get_prices(chunk)
-            for station_id, payload in prices.items():
-                price_value = payload.get(self.settings.fuel_type)
-                if price_value is None:
-                    continue
-                session.add(
-                    models.PriceSnapshot(
-                        station_id=station_id,
-                        fuel_type=self.settings.fuel_type,
-                        price_eur=price_value,
-                        captured_at=datetime.utcnow(),
-                    )
+        prices: Dict[str, Any] = {}
+        step = self.tk_client.MAX_IDS_PER_PRICE_CALL
+        for chunk_start in range(0, len(station_ids), step):
+            chunk = station_ids[chunk_start : chunk_start + step]
+            try:
+                result = self.tk_client.get_prices(chunk)
+            except UpstreamUnavailable as exc:
+                logger.warning("Skipping price chunk of {} stations: {}", len(chunk), exc)
+                continue
+            if isinstance(result, Fallback):
+                # Cached prices are not a new observation: never stamp them with this cycle's time.
+                logger.warning(
+                    "Skipping price chunk of {} stations: only cached prices from {}", len(chunk), result.fetched_at
                 )
-        session.commit()
-        logger.info("Captured latest prices for %s stations", len(station_ids))
+                continue
+            prices.update(result)
+        self._store_prices(session, prices)
+        logger.info("Captured latest prices for {} stations", len(station_ids))
 
     def capture_weather(self, session: Session) -> None:
-        forecast = self.weather_service.get_forecast()
-        for entry in forecast:
-            captured_at = entry.timestamp.replace(tzinfo=None)
-            existing = session.execute(
-                select(models.WeatherSnapshot.id).where(
-                    models.WeatherSnapshot.captured_at == captured_at
-                )
-            ).scalar_one_or_none()
-            if existing:
-                continue
-            session.add(
-                models.WeatherSnapshot(
-                    captured_at=captured_at,
-                    temperature_c=entry.temperature_c,
-                    humidity=entry.humidity,
-                    wind_speed_ms=entry.wind_speed_ms,
-                    precipitation_mm=entry.precipitation_mm,
-                    cloud_cover_pct=entry.cloud_cover_pct,
-                )
-            )
+        forecast = self.weather_service.get_forecast(fresh_only=True)
+        self._store_weather(session, forecast)
+
+    def _store_stations(self, session: Session, stations: List[Station]) -> None:
+        with DB_COMMIT_SECONDS.time(table="stations"):
+            self._upsert_stations(session, stations)
+        ROWS_INGESTED.inc(len(stations), table="stations")
+        logger.info("Synced {} stations from Tankerkönig", len(stations))
+
+    def _upsert_stations(self, session: Session, stations: List[Station]) -> None:
+        bulk.upsert_stations(
+            session,
+            [
+                {
+                    "id": station.id,
+                    "name": station.name,
+                    "brand": station.brand,
+                    "lat": station.lat,
+                    "lng": station.lng,
+                    "street": station.street,
+                    "house_number": station.house_number,
+                    "post_code": station.post_code,
+                }
+                for station in stations
+            ],
+        )
+        self.coverage.mark_swept(session)
         session.commit()
-        logger.info("Persisted %s weather points", len(forecast))
+
+    @staticmethod
+    def _cached_station_ids(session: Session) -> List[str]:
+        return list(session.execute(select(models.Station.id)).scalars())
+
+    def _store_prices(self, session: Session, prices: Dict[str, Any]) -> None:
+        fuel_types = self.settings.fuel_types
+        captured_at = datetime.utcnow()
+        rows = []
+        for station_id, payload in prices.items():
+            for fuel_type in fuel_types:
+                price_value = payload.get(fuel_type)
+                if isinstance(price_value, bool) or not isinstance(price_value, (int, float)):
+                    continue  # missing, or false when the station does not sell this fuel
+                rows.append(
+                    {
+                        "station_id": station_id,
+                        "fuel_type": fuel_type,
+                        "price_eur": price_value,
+                        "captured_at": captured_at,
+                    }
+                )
+
+        observed = len(rows)
+        if self.settings.price_change_capture:
+            if not self.price_tracker.seeded:
+                self.price_tracker.seed(session)
+            rows = self.price_tracker.changes(rows)
+        with DB_COMMIT_SECONDS.time(table="price_snapshots"):
+            bulk.insert_price_snapshots(session, rows)
+            if prices:
+                # Readers forward-fill change events up to the last cycle that observed prices.
+                set_watermark(session, CAPTURE_WATERMARK, captured_at)
+            session.commit()
+        self.price_tracker.commit(rows)
+        price_state = get_price_state()
+        if prices and price_state.loaded:  # only processes serving forecasts load the state
+            price_state.record(captured_at, rows)
+        ROWS_INGESTED.inc(len(rows), table="price_snapshots")
+        ROWS_DEDUPLICATED.inc(observed - len(rows), table="price_snapshots")
+        logger.info("Stored {} price changes of {} observations", len(rows), observed)
+
+    @staticmethod
+    def _store_weather(session: Session, forecast: List[WeatherPoint]) -> None:
+        rows = [
+            {
+                "captured_at": entry.timestamp.replace(tzinfo=None),
+                "temperature_c": entry.temperature_c,
+                "humidity": entry.humidity,
+                "wind_speed_ms": entry.wind_speed_ms,
+                "precipitation_mm": entry.precipitation_mm,
+                "cloud_cover_pct": entry.cloud_cover_pct,
+            }
+            for entry in forecast
+        ]
+        with DB_COMMIT_SECONDS.time(table="weather_snapshots"):
+            inserted = bulk.insert_weather_snapshots(session, rows)
+            if rows:
+                set_watermark(session, WEATHER_WATERMARK, datetime.utcnow())
+            session.commit()
+        ROWS_INGESTED.inc(inserted, table="weather_snapshots")
+        ROWS_DEDUPLICATED.inc(len(rows) - inserted, table="weather_snapshots")
+        logger.info("Persisted {} new of {} weather points", inserted, len(forecast))
 
     def backfill_weather_history(self, days: int = 30) -> int:
         """Populate SQLite with Meteostat/DWD historical weather snapshots."""
 
         return self.history_ingestor.backfill(days)
 
+    def archive_history(self, prune: Optional[bool] = None) -> Dict[str, int]:
+        """Compact closed days of price/weather snapshots into the Parquet archive."""
+
+        with ETL_STAGE_SECONDS.time(stage="archive"), SessionLocal() as session:
+            return self.archive.compact(session, prune=prune)
+
     def run_all(self) -> None:
+        with ETL_STAGE_SECONDS.time(stage="cycle"), SessionLocal() as session:
+            if self.coverage.sweep_due(session):
+                try:
+                    with ETL_STAGE_SECONDS.time(stage="sweep"):
+                        self.sync_stations(session)
+                except UpstreamUnavailable as exc:
+                    logger.warning("Station sweep failed; using cached stations: {}", exc)
+            with ETL_STAGE_SECONDS.time(stage="prices"):
+                self.capture_prices(session)
+            with ETL_STAGE_SECONDS.time(stage="weather"):
+                self.capture_weather(session)
+            with ETL_STAGE_SECONDS.time(stage="features"):
+                self.feature_builder.build(session)
+
+    async def run_all_async(self) -> None:
+        """Async ETL cycle for the event loop.
+
+        Upstream calls go through the shared pooled client and the resilient
+        upstream layer (rate limit, retries, circuit breaker with cached fallback);
+        price chunks and the weather forecast are fetched concurrently. Cached
+        fallback answers are not persisted and move no watermark. The coverage
+        tiles are only re-swept when the station cache is empty or stale; otherwise
+        prices are refreshed for the cached station IDs. SQLite work runs in a
+        worker thread so the loop stays free for request handling. Each stage is
+        timed in ``benzin_etl_stage_seconds``.
+        """
+
+        with ETL_STAGE_SECONDS.time(stage="cycle"):
+            station_ids: Optional[List[str]] = None
+            if await asyncio.to_thread(self._sweep_due):
+                try:
+                    with ETL_STAGE_SECONDS.time(stage="sweep"):
+                        stations = await self.coverage.sweep_async()
+                except UpstreamUnavailable as exc:
+                    logger.warning("Station sweep failed; using cached stations: {}", exc)
+                else:
+                    station_ids = await asyncio.to_thread(self._persist_stations, stations)
+            if station_ids is None:
+                station_ids = await asyncio.to_thread(self._load_station_ids)
+            if not station_ids:
+                logger.warning("No stations cached yet; skipping price capture")
+
+            with ETL_STAGE_SECONDS.time(stage="fetch"):
+                prices, forecast = await asyncio.gather(
+                    self.async_tk_client.get_prices_many(station_ids),
+                    self.weather_service.get_forecast_async(fresh_only=True),
+                )
+            with ETL_STAGE_SECONDS.time(stage="persist"):
+                await asyncio.to_thread(self._persist_observations, prices, forecast)
+            logger.info("Captured latest prices for {} stations", len(station_ids))
+            with ETL_STAGE_SECONDS.time(stage="features"):
+                await asyncio.to_thread(self.feature_builder.run)
+
+    def _sweep_due(self) -> bool:
+        with SessionLocal() as session:
+            return self.coverage.sweep_due(session)
+
+    def _load_station_ids(self) -> List[str]:
+        with SessionLocal() as session:
+            return self._cached_station_ids(session)
+
+    def _persist_stations(self, stations: List[Station]) -> List[str]:
+        with SessionLocal() as session:
+            self._store_stations(session, stations)
+            return self._cached_station_ids(session)
+
+    def _persist_observations(self, prices: Dict[str, Any], forecast: List[WeatherPoint]) -> None:
         with SessionLocal() as session:
-            self.sync_stations(session)
-            self.capture_prices(session)
-            self.capture_weather(session)
+            self._store_prices(session, prices)
+            self._store_weather(session, forecast)
 
 
 __all__ = ["ETLPipeline"]
@@ -0,0 +1,46 @@
+"""Process-wide pooled ``httpx.AsyncClient`` shared by the async ingest clients.
+
+One client is created lazily on first use and kept for the lifetime of the app,
+so Tankerkönig and OpenWeather calls reuse keep-alive connections instead of
+paying a TCP/TLS handshake per request. Call :func:`close_async_http_client`
+on shutdown.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from src.config.settings import get_settings
+from src.lazy_imports import lazy_import
+
+httpx = lazy_import("httpx")
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.http_max_connections,
+        max_keepalive_connections=settings.http_max_keepalive_connections,
+        keepalive_expiry=settings.http_keepalive_expiry_seconds,
+    )
+    return httpx.AsyncClient(timeout=settings.http_timeout_seconds, limits=limits)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Return the shared async client, creating it on first use."""
+
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = build_async_http_client()
+    return _async_client
+
+
+async def close_async_http_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+__all__ = ["build_async_http_client", "close_async_http_client", "get_async_http_client"]
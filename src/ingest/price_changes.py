@@ -0,0 +1,67 @@
+"""Change-data capture for Tankerkönig price observations.
+
+Most 5-minute observations repeat the previous price. The tracker keeps the last
+persisted price per (station, fuel) in memory, seeded once from the newest row of
+every series in ``price_snapshots``, and lets only observations that differ
+through. Each stored row is therefore a change event that stays in effect until
+the next one; ``load_price_series`` rebuilds the regular slot grid from them.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from src.db.bulk import Row
+from src.models.features import latest_prices
+
+SeriesKey = Tuple[str, str]  # (station_id, fuel_type)
+
+
+class PriceChangeTracker:
+    def __init__(self) -> None:
+        self._last: Dict[SeriesKey, float] = {}
+        self._seeded = False
+        self._lock = threading.Lock()
+
+    @property
+    def seeded(self) -> bool:
+        return self._seeded
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def seed(self, session: Session) -> int:
+        """Load the latest stored price of every series; return the number of series."""
+
+        latest = latest_prices(session)
+        last = dict(
+            zip(
+                zip(latest["station_id"].tolist(), latest["fuel_type"].tolist()),
+                latest["price_eur"].tolist(),
+            )
+        )
+        with self._lock:
+            self._last = last
+            self._seeded = True
+        logger.info("Seeded price change tracker with {} series", len(last))
+        return len(last)
+
+    def changes(self, rows: Sequence[Row]) -> List[Row]:
+        """Rows whose price differs from the last persisted one (new series included).
+
+        The map is not updated here; call :meth:`commit` once the rows are stored.
+        """
+
+        last = self._last
+        return [row for row in rows if last.get((row["station_id"], row["fuel_type"])) != row["price_eur"]]
+
+    def commit(self, rows: Sequence[Row]) -> None:
+        with self._lock:
+            for row in rows:
+                self._last[(row["station_id"], row["fuel_type"])] = row["price_eur"]
+
+
+__all__ = ["PriceChangeTracker", "SeriesKey"]
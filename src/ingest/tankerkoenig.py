@@ -5,16 +5,23 @@ The implementation follows the public endpoints documented in tanker.md:
 - prices.php: batch price lookup for up to 10 station UUIDs
 - detail.php: extended metadata / opening time details for a single station
 - complaint.php: not implemented yet, but method placeholder is provided for future use
+
+When the upstream layer answers from its last-good cache (breaker open, retries
+exhausted), the methods return their usual value wrapped in a
+:class:`~src.ingest.upstream.Fallback`; callers storing observations skip those.
 """
 from __future__ import annotations
 
+import asyncio
 from dataclasses import dataclass
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 
 import httpx
 from loguru import logger
 
 from src.config.settings import get_settings
+from src.ingest.http import get_async_http_client
+from src.ingest.upstream import Fallback, Upstream, UpstreamUnavailable, get_upstream, map_result
 
 
 @dataclass(slots=True)
@@ -37,27 +44,32 @@ class Station:
 
 class TankerkoenigClient:
     BASE_URL = "https://creativecommons.tankerkoenig.de/json"
+    MAX_IDS_PER_PRICE_CALL = 10
 
-    def __init__(self, api_key: Optional[str] = None, timeout: float = 10.0) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        upstream: Optional[Upstream] = None,
+    ) -> None:
         settings = get_settings()
         self.api_key = api_key or settings.tankerkoenig_api_key
-        self.timeout = timeout
-        self._client = httpx.Client(timeout=timeout)
+        self.upstream = upstream or get_upstream("tankerkoenig")
+        self.timeout = timeout or self.upstream.timeout_seconds
+        self._client = httpx.Client(timeout=self.timeout)
 
-    def _request(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    def _request(self, endpoint: str, params: Dict[str, Any]) -> Union[Dict[str, Any], Fallback]:
         if not self.api_key:
             raise RuntimeError("Tankerkönig API key is not configured yet")
 
         url = f"{self.BASE_URL}/{endpoint}"
-        response = self._client.get(url, params={"apikey": self.api_key, **params})
-        response.raise_for_status()
-        payload = response.json()
 
-        if not payload.get("ok", False):
-            message = payload.get("message", "unknown error")
-            raise RuntimeError(f"Tankerkönig API call failed: {message}")
+        def _fetch() -> Dict[str, Any]:
+            response = self._client.get(url, params={"apikey": self.api_key, **params})
+            response.raise_for_status()
+            return _check_payload(response.json())
 
-        return payload
+        return self.upstream.call_sync(endpoint, params, _fetch)
 
     def list_stations(
         self,
@@ -66,7 +78,7 @@ class TankerkoenigClient:
         radius_km: float,
         fuel_type: str,
         sort_by: str = "dist",
-    ) -> List[Station]:
+    ) -> Union[List[Station], Fallback]:
         """Return stations within the given radius."""
 
         logger.debug(
@@ -88,30 +100,9 @@ class TankerkoenigClient:
             },
         )
 
-        stations: List[Station] = []
-        for raw in payload.get("stations", []):
-            stations.append(
-                Station(
-                    id=raw["id"],
-                    name=raw.get("name", ""),
-                    brand=raw.get("brand"),
-                    street=raw.get("street"),
-                    place=raw.get("place"),
-                    lat=raw["lat"],
-                    lng=raw["lng"],
-                    dist=raw.get("dist"),
-                    diesel=raw.get("diesel"),
-                    e5=raw.get("e5"),
-                    e10=raw.get("e10"),
-                    is_open=raw.get("isOpen"),
-                    house_number=raw.get("houseNumber"),
-                    post_code=raw.get("postCode"),
-                )
-            )
-
-        return stations
+        return map_result(payload, _parse_stations)
 
-    def get_prices(self, station_ids: Iterable[str]) -> Dict[str, Any]:
+    def get_prices(self, station_ids: Iterable[str]) -> Union[Dict[str, Any], Fallback]:
         """Return current prices for up to 10 station UUIDs."""
 
         joined_ids = ",".join(station_ids)
@@ -119,16 +110,151 @@ class TankerkoenigClient:
             return {}
 
         payload = self._request("prices.php", {"ids": joined_ids})
-        return payload.get("prices", {})
+        return map_result(payload, lambda body: body.get("prices", {}))
 
-    def get_station_details(self, station_id: str) -> Dict[str, Any]:
+    def get_station_details(self, station_id: str) -> Union[Dict[str, Any], Fallback]:
         """Return extended metadata for a station."""
 
         payload = self._request("detail.php", {"id": station_id})
-        return payload.get("station", {})
+        return map_result(payload, lambda body: body.get("station", {}))
 
     def close(self) -> None:
         self._client.close()
 
 
-__all__ = ["TankerkoenigClient", "Station"]
+class AsyncTankerkoenigClient:
+    """Async counterpart of :class:`TankerkoenigClient` using the shared pooled client."""
+
+    BASE_URL = TankerkoenigClient.BASE_URL
+    MAX_IDS_PER_PRICE_CALL = TankerkoenigClient.MAX_IDS_PER_PRICE_CALL
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: Optional[int] = None,
+        upstream: Optional[Upstream] = None,
+    ) -> None:
+        settings = get_settings()
+        self.api_key = api_key or settings.tankerkoenig_api_key
+        self.max_concurrency = max_concurrency or settings.tankerkoenig_max_concurrency
+        self.upstream = upstream or get_upstream("tankerkoenig")
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_async_http_client()
+
+    async def _request(self, endpoint: str, params: Dict[str, Any]) -> Union[Dict[str, Any], Fallback]:
+        if not self.api_key:
+            raise RuntimeError("Tankerkönig API key is not configured yet")
+
+        url = f"{self.BASE_URL}/{endpoint}"
+
+        async def _fetch() -> Dict[str, Any]:
+            response = await self.client.get(
+                url, params={"apikey": self.api_key, **params}, timeout=self.upstream.timeout_seconds
+            )
+            response.raise_for_status()
+            return _check_payload(response.json())
+
+        return await self.upstream.call(endpoint, params, _fetch)
+
+    async def list_stations(
+        self,
+        lat: float,
+        lng: float,
+        radius_km: float,
+        fuel_type: str,
+        sort_by: str = "dist",
+    ) -> Union[List[Station], Fallback]:
+        """Return stations within the given radius."""
+
+        payload = await self._request(
+            "list.php",
+            {
+                "lat": lat,
+                "lng": lng,
+                "rad": radius_km,
+                "type": fuel_type,
+                "sort": sort_by,
+            },
+        )
+        return map_result(payload, _parse_stations)
+
+    async def get_prices(self, station_ids: Iterable[str]) -> Union[Dict[str, Any], Fallback]:
+        """Return current prices for up to 10 station UUIDs."""
+
+        joined_ids = ",".join(station_ids)
+        if not joined_ids:
+            return {}
+
+        payload = await self._request("prices.php", {"ids": joined_ids})
+        return map_result(payload, lambda body: body.get("prices", {}))
+
+    async def get_prices_many(self, station_ids: Sequence[str]) -> Dict[str, Any]:
+        """Return current prices for any number of stations.
+
+        IDs are split into chunks of 10 (the ``prices.php`` limit) and the chunks
+        are fetched concurrently, at most ``max_concurrency`` at a time. A chunk
+        that is unavailable, or only answered from the last-good cache, is
+        skipped: cached prices must not be stored as new observations.
+        """
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def _fetch(chunk: Sequence[str]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    result = await self.get_prices(chunk)
+                except UpstreamUnavailable as exc:
+                    logger.warning("Skipping price chunk of {} stations: {}", len(chunk), exc)
+                    return {}
+                if isinstance(result, Fallback):
+                    logger.warning(
+                        "Skipping price chunk of {} stations: only cached prices from {}", len(chunk), result.fetched_at
+                    )
+                    return {}
+                return result
+
+        step = self.MAX_IDS_PER_PRICE_CALL
+        chunks = [station_ids[start : start + step] for start in range(0, len(station_ids), step)]
+        results = await asyncio.gather(*(_fetch(chunk) for chunk in chunks))
+
+        prices: Dict[str, Any] = {}
+        for result in results:
+            prices.update(result)
+        return prices
+
+
+def _check_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    if not payload.get("ok", False):
+        message = payload.get("message", "unknown error")
+        raise RuntimeError(f"Tankerkönig API call failed: {message}")
+    return payload
+
+
+def _parse_stations(payload: Dict[str, Any]) -> List[Station]:
+    return [_parse_station(raw) for raw in payload.get("stations", [])]
+
+
+def _parse_station(raw: Dict[str, Any]) -> Station:
+    return Station(
+        id=raw["id"],
+        name=raw.get("name", ""),
+        brand=raw.get("brand"),
+        street=raw.get("street"),
+        place=raw.get("place"),
+        lat=raw["lat"],
+        lng=raw["lng"],
+        dist=raw.get("dist"),
+        diesel=raw.get("diesel"),
+        e5=raw.get("e5"),
+        e10=raw.get("e10"),
+        is_open=raw.get("isOpen"),
+        house_number=raw.get("houseNumber"),
+        post_code=raw.get("postCode"),
+    )
+
+
+__all__ = ["AsyncTankerkoenigClient", "TankerkoenigClient", "Station"]
@@ -0,0 +1,369 @@
+"""Shared resilience layer for upstream API calls (Tankerkönig, OpenWeather).
+
+Every ingest client routes its HTTP calls through the :class:`Upstream` of its
+service, which combines:
+
+- a token-bucket rate limiter (sustained rate plus a small burst), shared by the
+  sync and async clients of the service;
+- retries with jittered exponential backoff ("full jitter") for timeouts,
+  connection errors, 429 and 5xx responses, honouring ``Retry-After``;
+- a circuit breaker that opens after repeated failed calls and short-circuits
+  further calls until a cool-down has passed, then lets one probe through;
+- a last-good-response cache per (endpoint, params): while the breaker is open or
+  a call ultimately fails, the cached payload is returned wrapped in a
+  :class:`Fallback` (with the time it was fetched) instead of an error, so
+  callers that record observations can tell it apart from a fresh answer;
+- per-endpoint latency and error metrics (:meth:`Upstream.metrics`), also
+  exported as ``benzin_upstream_request_seconds`` on ``/metrics``.
+
+Only when neither the upstream nor the cache can answer is
+:class:`UpstreamUnavailable` raised, so callers can skip one stage instead of
+failing a whole ETL cycle.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Tuple
+
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.lazy_imports import lazy_import
+from src.observability.metrics import UPSTREAM_FALLBACKS, UPSTREAM_REQUEST_SECONDS
+
+httpx = lazy_import("httpx")
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The upstream call failed (or was short-circuited) and no cached data exists."""
+
+
+@dataclass(slots=True, frozen=True)
+class Fallback:
+    """Last good response served in place of a failed or short-circuited call."""
+
+    payload: Any
+    fetched_at: datetime  # UTC time the payload was originally received
+
+
+def map_result(result: Any, function: Callable[[Any], Any]) -> Any:
+    """Apply ``function`` to a call result, keeping the :class:`Fallback` marker if present."""
+
+    if isinstance(result, Fallback):
+        return Fallback(function(result.payload), result.fetched_at)
+    return function(result)
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate_per_second`` up to ``capacity`` tokens.
+
+    Each call reserves a token (possibly going into debt) under a thread lock and
+    then sleeps until the token exists, so sync and async callers share one bucket.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: int) -> None:
+        if rate_per_second <= 0 or capacity < 1:
+            raise ValueError("rate_per_second must be > 0 and capacity >= 1")
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take one token and return how long the caller has to wait for it."""
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+            self._updated = now
+            self._tokens -= 1.0
+            return max(0.0, -self._tokens / self.rate_per_second)
+
+    async def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream; after the cool-down exactly one probe is let through."""
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("Circuit opened after {} consecutive failures", self.failures)
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+@dataclass(slots=True)
+class EndpointMetrics:
+    calls: int = 0  # upstream attempts, retries included
+    errors: int = 0
+    retries: int = 0
+    fallbacks: int = 0  # answered from the last-good cache
+    short_circuits: int = 0  # not sent upstream because the breaker was open
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+    last_error: Optional[str] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+
+        def _quantile(q: float) -> Optional[float]:
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 2) if latencies else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "short_circuits": self.short_circuits,
+            "latency_ms_p50": _quantile(0.5),
+            "latency_ms_p95": _quantile(0.95),
+            "latency_ms_max": round(latencies[-1], 2) if latencies else None,
+            "last_error": self.last_error,
+        }
+
+
+class Upstream:
+    def __init__(
+        self,
+        name: str,
+        limiter: TokenBucket,
+        breaker: CircuitBreaker,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 8.0,
+        timeout_seconds: float = 5.0,
+        cache_size: int = 1024,
+    ) -> None:
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.timeout_seconds = timeout_seconds
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, Hashable], Tuple[Any, datetime]]" = OrderedDict()
+        self._metrics: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    async def call(self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Awaitable[Any]]) -> Any:
+        key = self._key(endpoint, params)
+        if not self.breaker.allow():
+            return self._fallback(endpoint, key, short_circuit=True)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                result = await fetch()
+            except Exception as exc:
+                delay = self._on_error(endpoint, exc, attempt, started)
+                if delay is None:
+                    return self._fallback(endpoint, key, exc)
+                await asyncio.sleep(delay)
+            else:
+                return self._on_success(endpoint, key, result, started)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def call_sync(self, endpoint: str, params: Dict[str, Any], fetch: Callable[[], Any]) -> Any:
+        key = self._key(endpoint, params)
+        if not self.breaker.allow():
+            return self._fallback(endpoint, key, short_circuit=True)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.wait()
+            started = time.perf_counter()
+            try:
+                result = fetch()
+            except Exception as exc:
+                delay = self._on_error(endpoint, exc, attempt, started)
+                if delay is None:
+                    return self._fallback(endpoint, key, exc)
+                time.sleep(delay)
+            else:
+                return self._on_success(endpoint, key, result, started)
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {endpoint: metrics.snapshot() for endpoint, metrics in self._metrics.items()}
+        return {"breaker": self.breaker.state, "endpoints": endpoints}
+
+    @staticmethod
+    def _key(endpoint: str, params: Dict[str, Any]) -> Tuple[str, Hashable]:
+        return endpoint, tuple(sorted((name, str(value)) for name, value in params.items()))
+
+    def _endpoint_metrics(self, endpoint: str) -> EndpointMetrics:
+        metrics = self._metrics.get(endpoint)
+        if metrics is None:
+            metrics = self._metrics.setdefault(endpoint, EndpointMetrics())
+        return metrics
+
+    def _on_success(self, endpoint: str, key: Tuple[str, Hashable], result: Any, started: float) -> Any:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_REQUEST_SECONDS.observe(elapsed, service=self.name, endpoint=endpoint, outcome="ok")
+        with self._lock:
+            metrics = self._endpoint_metrics(endpoint)
+            metrics.calls += 1
+            metrics.latencies_ms.append(elapsed * 1000.0)
+            self._cache[key] = (result, datetime.utcnow())
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        self.breaker.record_success()
+        return result
+
+    def _on_error(self, endpoint: str, exc: Exception, attempt: int, started: float) -> Optional[float]:
+        """Record a failed attempt; return the backoff delay, or ``None`` when giving up."""
+
+        elapsed = time.perf_counter() - started
+        UPSTREAM_REQUEST_SECONDS.observe(elapsed, service=self.name, endpoint=endpoint, outcome="error")
+        with self._lock:
+            metrics = self._endpoint_metrics(endpoint)
+            metrics.calls += 1
+            metrics.errors += 1
+            metrics.latencies_ms.append(elapsed * 1000.0)
+            metrics.last_error = _describe(exc)
+            retry = attempt < self.max_retries and _is_retryable(exc)
+            if retry:
+                metrics.retries += 1
+        if not retry:
+            self.breaker.record_failure()
+            return None
+        delay = random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2**attempt))
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max_seconds))
+        logger.debug(
+            "{} {} attempt {} failed ({}); retrying in {:.2f}s", self.name, endpoint, attempt + 1, _describe(exc), delay
+        )
+        return delay
+
+    def _fallback(
+        self,
+        endpoint: str,
+        key: Tuple[str, Hashable],
+        exc: Optional[Exception] = None,
+        short_circuit: bool = False,
+    ) -> Fallback:
+        with self._lock:
+            metrics = self._endpoint_metrics(endpoint)
+            if short_circuit:
+                metrics.short_circuits += 1
+            cached = self._cache.get(key)
+            if cached is not None:
+                metrics.fallbacks += 1
+        if short_circuit:
+            UPSTREAM_FALLBACKS.inc(service=self.name, endpoint=endpoint, reason="short_circuit")
+        if cached is not None:
+            UPSTREAM_FALLBACKS.inc(service=self.name, endpoint=endpoint, reason="cached")
+            logger.warning("{} {} unavailable; serving last good response", self.name, endpoint)
+            return Fallback(*cached)
+        reason = "circuit open" if short_circuit else _describe(exc)
+        raise UpstreamUnavailable(f"{self.name} {endpoint} unavailable ({reason})") from exc
+
+
+def _describe(exc: Exception) -> str:
+    """Short error description; never includes the request URL (it carries the API key)."""
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"HTTP {exc.response.status_code}"
+    if isinstance(exc, httpx.HTTPError):
+        return type(exc).__name__
+    return f"{type(exc).__name__}: {exc}"[:200]
+
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS
+    return isinstance(exc, httpx.TransportError)
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    try:
+        return float(exc.response.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+@lru_cache
+def get_upstream(name: str) -> Upstream:
+    """Return the process-wide :class:`Upstream` for ``"tankerkoenig"`` or ``"openweather"``."""
+
+    settings = get_settings()
+    calls_per_minute = {
+        "tankerkoenig": settings.tankerkoenig_calls_per_minute,
+        "openweather": settings.openweather_calls_per_minute,
+    }[name]
+    return Upstream(
+        name,
+        limiter=TokenBucket(calls_per_minute / 60.0, settings.upstream_burst),
+        breaker=CircuitBreaker(settings.upstream_breaker_failures, settings.upstream_breaker_reset_seconds),
+        max_retries=settings.upstream_max_retries,
+        backoff_base_seconds=settings.upstream_backoff_base_seconds,
+        backoff_max_seconds=settings.upstream_backoff_max_seconds,
+        timeout_seconds=settings.upstream_timeout_seconds,
+    )
+
+
+def upstream_metrics() -> Dict[str, Any]:
+    """Breaker state and per-endpoint metrics of every upstream service."""
+
+    return {name: get_upstream(name).metrics() for name in ("tankerkoenig", "openweather")}
+
+
+__all__ = [
+    "CircuitBreaker",
+    "EndpointMetrics",
+    "Fallback",
+    "TokenBucket",
+    "Upstream",
+    "UpstreamUnavailable",
+    "get_upstream",
+    "map_result",
+    "upstream_metrics",
+]
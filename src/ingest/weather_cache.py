@@ -0,0 +1,161 @@
+"""Disk-backed cache of parsed OpenWeather forecasts.
+
+Entries are keyed by coordinates rounded to ``weather_cache_precision`` decimals
+(2 decimals ~ 1 km) and stay fresh for ``weather_refresh_minutes``. Forecasts
+are stored columnar: one int64 epoch array and one float32 ``(hours, 5)`` value
+array per location, instead of a list of ``WeatherPoint`` objects or the raw
+``onecall`` JSON. The whole cache is persisted atomically to a single ``.npz``
+file after every update and loaded on start, so a restart does not refetch.
+
+Stale entries keep their ``ETag`` so the clients can revalidate them with a
+conditional request instead of downloading the full payload again.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.ingest.weather_openweather import WeatherPoint
+
+CacheKey = Tuple[float, float]
+VALUE_FIELDS = ("temperature_c", "humidity", "wind_speed_ms", "precipitation_mm", "cloud_cover_pct")
+
+
+@dataclass(slots=True)
+class CachedForecast:
+    fetched_at: float  # epoch seconds of the last fetch or successful revalidation
+    etag: Optional[str]
+    timestamps: np.ndarray  # int64 epoch seconds (UTC)
+    values: np.ndarray  # float32, shape (len(timestamps), len(VALUE_FIELDS)), NaN = missing
+
+    @classmethod
+    def from_points(cls, points: List[WeatherPoint], etag: Optional[str], fetched_at: float) -> "CachedForecast":
+        timestamps = np.array(
+            [point.timestamp.replace(tzinfo=timezone.utc).timestamp() for point in points], dtype=np.int64
+        )
+        values = np.array(
+            [[_to_float(getattr(point, name)) for name in VALUE_FIELDS] for point in points], dtype=np.float32
+        ).reshape(len(points), len(VALUE_FIELDS))
+        return cls(fetched_at=fetched_at, etag=etag, timestamps=timestamps, values=values)
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def points(self) -> List[WeatherPoint]:
+        rows = np.round(self.values.astype(np.float64), 2).tolist()
+        return [
+            WeatherPoint(
+                timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None),
+                **{name: (None if value != value else value) for name, value in zip(VALUE_FIELDS, row)},
+            )
+            for timestamp, row in zip(self.timestamps.tolist(), rows)
+        ]
+
+
+class WeatherCache:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_seconds: Optional[float] = None,
+        precision: Optional[int] = None,
+    ) -> None:
+        settings = get_settings()
+        self.path = Path(path or settings.weather_cache_path)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.weather_refresh_minutes * 60
+        self.precision = precision if precision is not None else settings.weather_cache_precision
+        self._entries: Dict[CacheKey, CachedForecast] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def key(self, lat: float, lon: float) -> CacheKey:
+        return round(lat, self.precision), round(lon, self.precision)
+
+    def lookup(self, lat: float, lon: float) -> Optional[CachedForecast]:
+        """Entry for the location regardless of age (``None`` when never fetched)."""
+
+        return self._entries.get(self.key(lat, lon))
+
+    def is_fresh(self, entry: Optional[CachedForecast]) -> bool:
+        return entry is not None and entry.age() < self.ttl_seconds
+
+    def put(self, lat: float, lon: float, points: List[WeatherPoint], etag: Optional[str] = None) -> None:
+        with self._lock:
+            self._entries[self.key(lat, lon)] = CachedForecast.from_points(points, etag, time.time())
+            self._save()
+
+    def touch(self, lat: float, lon: float) -> None:
+        """Mark an entry fresh again after a ``304 Not Modified`` revalidation."""
+
+        with self._lock:
+            entry = self._entries.get(self.key(lat, lon))
+            if entry is not None:
+                entry.fetched_at = time.time()
+                self._save()
+
+    def _save(self) -> None:
+        keys = list(self._entries)
+        entries = [self._entries[key] for key in keys]
+        lengths = [len(entry.timestamps) for entry in entries]
+        arrays = {
+            "keys": np.array(keys, dtype=np.float64).reshape(len(keys), 2),
+            "fetched_at": np.array([entry.fetched_at for entry in entries], dtype=np.float64),
+            "etags": np.array([entry.etag or "" for entry in entries], dtype=np.str_),
+            "offsets": np.cumsum([0, *lengths]).astype(np.int64),
+            "timestamps": np.concatenate([entry.timestamps for entry in entries]) if entries else np.empty(0, np.int64),
+            "values": (
+                np.concatenate([entry.values for entry in entries])
+                if entries
+                else np.empty((0, len(VALUE_FIELDS)), np.float32)
+            ),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("wb") as handle:
+            np.savez_compressed(handle, **arrays)
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                offsets = data["offsets"]
+                timestamps, values = data["timestamps"], data["values"]
+                for position, (lat, lon) in enumerate(data["keys"].tolist()):
+                    start, end = offsets[position], offsets[position + 1]
+                    etag = str(data["etags"][position]) or None
+                    self._entries[(lat, lon)] = CachedForecast(
+                        fetched_at=float(data["fetched_at"][position]),
+                        etag=etag,
+                        timestamps=timestamps[start:end].copy(),
+                        values=values[start:end].copy(),
+                    )
+        except Exception as exc:  # corrupt or incompatible file: start cold
+            logger.warning("Ignoring unreadable weather cache {}: {}", self.path, exc)
+            self._entries.clear()
+            return
+        logger.debug("Loaded {} cached weather forecasts from {}", len(self._entries), self.path)
+
+
+def _to_float(value: Optional[float]) -> float:
+    return np.nan if value is None else float(value)
+
+
+@lru_cache
+def get_weather_cache() -> WeatherCache:
+    """Return the process-wide weather cache shared by the sync and async clients."""
+
+    return WeatherCache()
+
+
+__all__ = ["CachedForecast", "WeatherCache", "get_weather_cache"]
@@ -1,16 +1,29 @@
-"""Historical weather ingestion leveraging Meteostat (DWD-based) datasets."""
+"""Historical weather ingestion leveraging Meteostat (DWD-based) datasets.
+
+``meteostat`` is imported on the first fetch, not at module import: it is only
+needed by backfills and pulls in a large dependency tree.
+"""
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, List, Optional
 
 from loguru import logger
-from meteostat import Hourly, Point
-from pandas import isna
+from sqlalchemy import insert, select
 
 from src.config.settings import get_settings
-from src.db import models
+from src.db import bulk, models
 from src.db.session import SessionLocal
+from src.lazy_imports import lazy_import
+from src.observability.metrics import DB_COMMIT_SECONDS, ROWS_DEDUPLICATED, ROWS_INGESTED
+
+if TYPE_CHECKING:
+    from meteostat import Hourly
+
+pd = lazy_import("pandas")
+
+DEFAULT_CHUNK_SIZE = 5000
+FETCH_WINDOW = timedelta(days=365)
 
 
 class HistoricalWeatherIngestor:
@@ -18,75 +31,100 @@ class HistoricalWeatherIngestor:
         settings = get_settings()
         self.lat = lat or settings.hamburg_lat
         self.lng = lng or settings.hamburg_lng
-        self.point = Point(self.lat, self.lng)
+        self._point: Optional[Any] = None
+
+    @property
+    def point(self) -> Any:
+        if self._point is None:
+            from meteostat import Point
+
+            self._point = Point(self.lat, self.lng)
+        return self._point
 
     def fetch_hourly(self, start: datetime, end: datetime) -> Hourly:
         """Return Meteostat Hourly dataset for the specified window."""
 
+        from meteostat import Hourly
+
         start_utc = start.astimezone(timezone.utc)
         end_utc = end.astimezone(timezone.utc)
         return Hourly(self.point, start_utc, end_utc, timezone="UTC")
 
-    def backfill(self, days: int = 7) -> int:
+    def backfill(self, days: int = 7, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
         """Fetch historical data for the last `days` days and persist it."""
 
         end = datetime.now(timezone.utc)
         start = end - timedelta(days=days)
-        dataset = self.fetch_hourly(start, end)
-        frame = dataset.fetch()
-        if frame.empty:
-            logger.warning("No historical weather data returned by Meteostat")
-            return 0
+        return self.backfill_range(start, end, chunk_size=chunk_size)
+
+    def backfill_range(self, start: datetime, end: datetime, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Columnar backfill of ``[start, end]``.
+
+        The window is fetched in yearly slices; each slice is normalised with
+        vectorised pandas operations, anti-joined against the timestamps already
+        stored (one range query per slice) and inserted in ``chunk_size`` batches.
+        """
 
         inserted = 0
-        with SessionLocal() as session:
-            for timestamp, row in frame.iterrows():
-                captured_at = timestamp.to_pydatetime().replace(tzinfo=None)
-                if self._snapshot_exists(session, captured_at):
-                    continue
-                snapshot = models.WeatherSnapshot(
-                    captured_at=captured_at,
-                    temperature_c=self._clean(row.get("temp")),
-                    humidity=self._clean(row.get("rhum")),
-                    wind_speed_ms=self._derive_wind_speed(row.get("wspd")),
-                    precipitation_mm=self._clean(row.get("prcp")),
-                    cloud_cover_pct=self._estimate_cloud_cover(row.get("coco")),
-                )
-                session.add(snapshot)
-                inserted += 1
-            session.commit()
-        logger.info("Inserted %s historical weather rows (days=%s)", inserted, days)
+        window_start = start
+        while window_start < end:
+            window_end = min(window_start + FETCH_WINDOW, end)
+            frame = self.fetch_hourly(window_start, window_end).fetch()
+            if not frame.empty:
+                inserted += self._persist_frame(self.normalize_frame(frame), chunk_size)
+            window_start = window_end
+
+        if not inserted:
+            logger.warning("No new historical weather data returned by Meteostat")
+        logger.info("Inserted {} historical weather rows ({} → {})", inserted, start.date(), end.date())
         return inserted
 
     @staticmethod
-    def _snapshot_exists(session, captured_at: datetime) -> bool:
-        stmt = (
-            session.query(models.WeatherSnapshot.id)
-            .filter(models.WeatherSnapshot.captured_at == captured_at)
-            .limit(1)
+    def normalize_frame(frame: pd.DataFrame) -> pd.DataFrame:
+        """Map a Meteostat hourly frame onto ``weather_snapshots`` columns."""
+
+        index = pd.DatetimeIndex(frame.index)
+        if index.tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        raw = frame.reindex(columns=["temp", "rhum", "wspd", "prcp", "coco"]).astype("float64")
+        raw.index = index
+
+        normalized = pd.DataFrame(
+            {
+                "temperature_c": raw["temp"],
+                "humidity": raw["rhum"],
+                "wind_speed_ms": raw["wspd"] / 3.6,  # km/h → m/s
+                "precipitation_mm": raw["prcp"],
+                "cloud_cover_pct": (raw["coco"] / 9.0).clip(0.0, 1.0).mul(100.0).round(2),
+            },
+            index=index,
         )
-        return session.query(stmt.exists()).scalar()
-
-    @staticmethod
-    def _clean(value: Optional[float]) -> Optional[float]:
-        if value is None or isna(value):
-            return None
-        return float(value)
+        normalized.index.name = "captured_at"
+        return normalized[~normalized.index.duplicated(keep="first")]
 
-    @staticmethod
-    def _derive_wind_speed(speed_kmh: Optional[float]) -> Optional[float]:
-        value = HistoricalWeatherIngestor._clean(speed_kmh)
-        if value is None:
-            return None
-        return value / 3.6  # convert km/h to m/s
-
-    @staticmethod
-    def _estimate_cloud_cover(code: Optional[float]) -> Optional[float]:
-        value = HistoricalWeatherIngestor._clean(code)
-        if value is None:
-            return None
-        normalized = max(0.0, min(1.0, value / 9.0))
-        return round(normalized * 100.0, 2)
+    def _persist_frame(self, frame: pd.DataFrame, chunk_size: int) -> int:
+        table = models.WeatherSnapshot.__table__
+        with SessionLocal() as session:
+            existing = pd.DatetimeIndex(
+                session.execute(
+                    select(table.c.captured_at).where(
+                        table.c.captured_at >= frame.index.min().to_pydatetime(),
+                        table.c.captured_at <= frame.index.max().to_pydatetime(),
+                    )
+                ).scalars().all()
+            )
+            fresh = frame[~frame.index.isin(existing)]
+            ROWS_DEDUPLICATED.inc(len(frame) - len(fresh), table="weather_snapshots")
+            if fresh.empty:
+                return 0
+
+            records = bulk.frame_to_records(fresh, index_name="captured_at")
+            with DB_COMMIT_SECONDS.time(table="weather_snapshots"):
+                for chunk_start in range(0, len(records), chunk_size):
+                    session.execute(insert(table), records[chunk_start : chunk_start + chunk_size])
+                session.commit()
+        ROWS_INGESTED.inc(len(records), table="weather_snapshots")
+        return len(records)
 
 
 __all__: List[str] = ["HistoricalWeatherIngestor"]
@@ -6,12 +6,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import httpx
 from loguru import logger
 
 from src.config.settings import get_settings
+from src.ingest.http import get_async_http_client
+from src.ingest.upstream import Fallback, Upstream, UpstreamUnavailable, get_upstream
+
+ONECALL_ENDPOINT = "onecall"
+NOT_MODIFIED = 304
 
 
 @dataclass(slots=True)
@@ -24,55 +29,162 @@ class WeatherPoint:
     cloud_cover_pct: Optional[float]
 
 
+@dataclass(slots=True)
+class ForecastResponse:
+    """Result of a (conditional) forecast request; ``points`` is ``None`` on ``304 Not Modified``.
+
+    ``fallback`` marks a response replayed from the upstream layer's last-good
+    cache: OpenWeather was not reached, so it confirms nothing about freshness.
+    """
+
+    points: Optional[List[WeatherPoint]]
+    etag: Optional[str] = None
+    fallback: bool = False
+
+    @property
+    def not_modified(self) -> bool:
+        return self.points is None
+
+
 class OpenWeatherClient:
     BASE_URL = "https://api.openweathermap.org/data/3.0"
 
-    def __init__(self, api_key: Optional[str] = None, timeout: float = 10.0) -> None:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        upstream: Optional[Upstream] = None,
+    ) -> None:
         settings = get_settings()
         self.api_key = api_key or settings.openweather_api_key
-        self.timeout = timeout
-        self._client = httpx.Client(timeout=timeout)
+        self.upstream = upstream or get_upstream("openweather")
+        self.timeout = timeout or self.upstream.timeout_seconds
+        self._client = httpx.Client(timeout=self.timeout)
 
     def fetch_forecast(self, lat: float, lon: float) -> List[WeatherPoint]:
+        return self.fetch_forecast_conditional(lat, lon).points or []
+
+    def fetch_forecast_conditional(self, lat: float, lon: float, etag: Optional[str] = None) -> ForecastResponse:
+        """Fetch the hourly forecast; with ``etag`` the request is sent with ``If-None-Match``."""
+
         if not self.api_key:
             logger.warning("OpenWeather API key missing; returning empty forecast")
-            return []
-
-        url = f"{self.BASE_URL}/onecall"
-        params = {
-            "lat": lat,
-            "lon": lon,
-            "appid": self.api_key,
-            "units": "metric",
-            "exclude": "minutely,alerts",
-        }
-        try:
-            response = self._client.get(url, params=params)
-            response.raise_for_status()
-        except httpx.HTTPError as exc:  # pragma: no cover - network
-            logger.error("OpenWeather request failed: %s", exc)
-            return []
-        payload: Dict[str, Any] = response.json()
-
-        forecast: List[WeatherPoint] = []
-        for item in payload.get("hourly", []):
-            forecast.append(
-                WeatherPoint(
-                    timestamp=datetime.fromtimestamp(item["dt"], tz=timezone.utc).replace(tzinfo=None),
-                    temperature_c=float(item.get("temp", 0.0)),
-                    humidity=item.get("humidity"),
-                    wind_speed_ms=item.get("wind_speed"),
-                    precipitation_mm=
-                        (item.get("rain", {}) or {}).get("1h")
-                        or (item.get("snow", {}) or {}).get("1h"),
-                    cloud_cover_pct=item.get("clouds"),
-                )
+            return ForecastResponse(points=[])
+
+        url = f"{self.BASE_URL}/{ONECALL_ENDPOINT}"
+        params = _onecall_params(lat, lon)
+
+        def _fetch() -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+            response = self._client.get(
+                url, params={**params, "appid": self.api_key}, headers=_conditional_headers(etag)
             )
+            return _read_response(response)
 
-        return forecast
+        try:
+            result = self.upstream.call_sync(ONECALL_ENDPOINT, params, _fetch)
+        except UpstreamUnavailable as exc:
+            logger.error("OpenWeather request failed: {}", exc)
+            return ForecastResponse(points=[])
+        return _forecast_response(result)
 
     def close(self) -> None:
         self._client.close()
 
 
-__all__ = ["OpenWeatherClient", "WeatherPoint"]
+class AsyncOpenWeatherClient:
+    """Async counterpart of :class:`OpenWeatherClient` using the shared pooled client."""
+
+    BASE_URL = OpenWeatherClient.BASE_URL
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        upstream: Optional[Upstream] = None,
+    ) -> None:
+        settings = get_settings()
+        self.api_key = api_key or settings.openweather_api_key
+        self.upstream = upstream or get_upstream("openweather")
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_async_http_client()
+
+    async def fetch_forecast(self, lat: float, lon: float) -> List[WeatherPoint]:
+        return (await self.fetch_forecast_conditional(lat, lon)).points or []
+
+    async def fetch_forecast_conditional(
+        self, lat: float, lon: float, etag: Optional[str] = None
+    ) -> ForecastResponse:
+        """Fetch the hourly forecast; with ``etag`` the request is sent with ``If-None-Match``."""
+
+        if not self.api_key:
+            logger.warning("OpenWeather API key missing; returning empty forecast")
+            return ForecastResponse(points=[])
+
+        url = f"{self.BASE_URL}/{ONECALL_ENDPOINT}"
+        params = _onecall_params(lat, lon)
+
+        async def _fetch() -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+            response = await self.client.get(
+                url,
+                params={**params, "appid": self.api_key},
+                headers=_conditional_headers(etag),
+                timeout=self.upstream.timeout_seconds,
+            )
+            return _read_response(response)
+
+        try:
+            result = await self.upstream.call(ONECALL_ENDPOINT, params, _fetch)
+        except UpstreamUnavailable as exc:
+            logger.error("OpenWeather request failed: {}", exc)
+            return ForecastResponse(points=[])
+        return _forecast_response(result)
+
+
+def _onecall_params(lat: float, lon: float) -> Dict[str, Any]:
+    return {"lat": lat, "lon": lon, "units": "metric", "exclude": "minutely,alerts"}
+
+
+def _conditional_headers(etag: Optional[str]) -> Dict[str, str]:
+    return {"If-None-Match": etag} if etag else {}
+
+
+def _forecast_response(result: Any) -> ForecastResponse:
+    fallback = isinstance(result, Fallback)
+    new_etag, payload = result.payload if fallback else result
+    return ForecastResponse(
+        points=None if payload is None else _parse_hourly(payload), etag=new_etag, fallback=fallback
+    )
+
+
+def _read_response(response: httpx.Response) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """Return ``(etag, payload)``; the payload is ``None`` for ``304 Not Modified``."""
+
+    if response.status_code == NOT_MODIFIED:
+        return response.headers.get("ETag"), None
+    response.raise_for_status()
+    return response.headers.get("ETag"), response.json()
+
+
+def _parse_hourly(payload: Dict[str, Any]) -> List[WeatherPoint]:
+    forecast: List[WeatherPoint] = []
+    for item in payload.get("hourly", []):
+        forecast.append(
+            WeatherPoint(
+                timestamp=datetime.fromtimestamp(item["dt"], tz=timezone.utc).replace(tzinfo=None),
+                temperature_c=float(item.get("temp", 0.0)),
+                humidity=item.get("humidity"),
+                wind_speed_ms=item.get("wind_speed"),
+                precipitation_mm=
+                    (item.get("rain", {}) or {}).get("1h")
+                    or (item.get("snow", {}) or {}).get("1h"),
+                cloud_cover_pct=item.get("clouds"),
+            )
+        )
+
+    return forecast
+
+
+__all__ = ["AsyncOpenWeatherClient", "ForecastResponse", "OpenWeatherClient", "WeatherPoint"]
@@ -1,28 +1,104 @@
-"""High-level weather service that wraps OpenWeather + DWD clients."""
+"""High-level weather service that wraps OpenWeather + DWD clients.
+
+OpenWeather forecasts are served from the disk-backed :class:`WeatherCache`
+while they are younger than ``weather_refresh_minutes``; stale entries are
+revalidated with their ``ETag`` and concurrent refreshes of one location are
+coalesced, so each location costs at most one upstream call per refresh window.
+A response replayed from the upstream layer's last-good cache (breaker open,
+retries exhausted) neither refreshes nor touches a cache entry; with
+``fresh_only`` such forecasts are not returned at all, so the ETL does not store
+them as a new capture.
+"""
 from __future__ import annotations
 
+import asyncio
+import threading
+from collections import defaultdict
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from loguru import logger
 
 from src.config.settings import get_settings
+from src.ingest.weather_cache import CacheKey, CachedForecast, WeatherCache, get_weather_cache
 from src.ingest.weather_dwd import DWDClient, DWDWeatherRecord
-from src.ingest.weather_openweather import OpenWeatherClient, WeatherPoint
+from src.ingest.weather_openweather import (
+    AsyncOpenWeatherClient,
+    ForecastResponse,
+    OpenWeatherClient,
+    WeatherPoint,
+)
 
 
 class WeatherService:
-    def __init__(self) -> None:
+    def __init__(self, cache: Optional[WeatherCache] = None) -> None:
         settings = get_settings()
         self.ow_client = OpenWeatherClient(api_key=settings.openweather_api_key)
+        self.async_ow_client = AsyncOpenWeatherClient(api_key=settings.openweather_api_key)
         self.dwd_client = DWDClient(api_key=settings.dwd_api_key)
+        self.cache = cache or get_weather_cache()
+        self._locks: Dict[CacheKey, threading.Lock] = defaultdict(threading.Lock)
+        self._inflight: Dict[CacheKey, asyncio.Future] = {}
 
-    def get_forecast(self) -> List[WeatherPoint]:
-        settings = get_settings()
-        forecast = self.ow_client.fetch_forecast(settings.hamburg_lat, settings.hamburg_lng)
-        if not forecast:
-            logger.warning("OpenWeather forecast empty; downstream logic should handle fallback once available")
-        return forecast
+    def get_forecast(
+        self, lat: Optional[float] = None, lon: Optional[float] = None, fresh_only: bool = False
+    ) -> List[WeatherPoint]:
+        """Forecast for the location; with ``fresh_only`` an empty list instead of a stale one."""
+
+        lat, lon = _location(lat, lon)
+        with self._locks[self.cache.key(lat, lon)]:
+            entry = self.cache.lookup(lat, lon)
+            if self.cache.is_fresh(entry):
+                return entry.points()
+            response = self.ow_client.fetch_forecast_conditional(lat, lon, entry.etag if entry else None)
+            forecast, fresh = self._store(lat, lon, entry, response)
+        return _served(forecast, fresh, fresh_only)
+
+    async def get_forecast_async(
+        self, lat: Optional[float] = None, lon: Optional[float] = None, fresh_only: bool = False
+    ) -> List[WeatherPoint]:
+        lat, lon = _location(lat, lon)
+        entry = self.cache.lookup(lat, lon)
+        if self.cache.is_fresh(entry):
+            return entry.points()
+
+        key = self.cache.key(lat, lon)
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._refresh_async(lat, lon, entry))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        forecast, fresh = await asyncio.shield(future)
+        return _served(forecast, fresh, fresh_only)
+
+    async def _refresh_async(
+        self, lat: float, lon: float, entry: Optional[CachedForecast]
+    ) -> Tuple[List[WeatherPoint], bool]:
+        response = await self.async_ow_client.fetch_forecast_conditional(lat, lon, entry.etag if entry else None)
+        return await asyncio.to_thread(self._store, lat, lon, entry, response)
+
+    def _store(
+        self,
+        lat: float,
+        lon: float,
+        entry: Optional[CachedForecast],
+        response: ForecastResponse,
+    ) -> Tuple[List[WeatherPoint], bool]:
+        """Update the cache from a response; return the forecast to serve and whether OpenWeather confirmed it."""
+
+        if response.fallback:
+            # Replayed by the upstream layer, not revalidated: the entry keeps its age.
+            return (entry.points() if entry else response.points or []), False
+        if response.not_modified:
+            if entry is None:
+                return [], False
+            self.cache.touch(lat, lon)
+            return entry.points(), True
+        if response.points:
+            self.cache.put(lat, lon, response.points, response.etag)
+            return response.points, True
+        # Upstream unavailable (or empty answer): a stale forecast beats none.
+        return (entry.points() if entry else []), False
 
     def get_historical(self, station_id: str) -> List[DWDWeatherRecord]:
         return self.dwd_client.fetch_historical(station_id)
@@ -35,4 +111,22 @@ class WeatherService:
         return forecast[0].temperature_c
 
 
+def _served(forecast: List[WeatherPoint], fresh: bool, fresh_only: bool) -> List[WeatherPoint]:
+    if fresh_only and not fresh:
+        if forecast:
+            logger.warning("OpenWeather unavailable; not treating the stale cached forecast as a new capture")
+        return []
+    if not forecast:
+        logger.warning("OpenWeather forecast empty; downstream logic should handle fallback once available")
+    return forecast
+
+
+def _location(lat: Optional[float], lon: Optional[float]) -> Tuple[float, float]:
+    settings = get_settings()
+    return (
+        settings.hamburg_lat if lat is None else lat,
+        settings.hamburg_lng if lon is None else lon,
+    )
+
+
 __all__ = ["WeatherService"]
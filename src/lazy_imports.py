@@ -0,0 +1,56 @@
+"""Deferred imports for heavy optional dependencies.
+
+``lazy_import("pandas")`` returns a proxy that imports the module on first
+attribute access and forwards every attribute lookup to it, so modules can keep
+a top-level ``pd = lazy_import("pandas")`` while processes that never touch
+pandas (an API worker serving cached payloads, ``/metrics``) never pay for it.
+
+The first access takes a lock and runs a regular ``importlib.import_module``,
+so threads racing on it (``asyncio.to_thread`` workers warming up, building
+forecasts, persisting ETL results) all wait for the fully executed module.
+Nothing half-initialised is ever placed in ``sys.modules``, unlike
+``importlib.util.LazyLoader``, which is not thread-safe before Python 3.12.
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import threading
+from types import ModuleType
+from typing import Any, Optional
+
+
+class _DeferredModule:
+    __slots__ = ("_name", "_module", "_lock")
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> ModuleType:
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+                module = self._module
+        return module
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<deferred module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Module proxy for ``name``; the import runs on first attribute access."""
+
+    if importlib.util.find_spec(name.partition(".")[0]) is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    return _DeferredModule(name)  # type: ignore[return-value]
+
+
+__all__ = ["lazy_import"]
@@ -1,16 +1,23 @@
 import uvicorn
 
 from src.config.settings import get_settings
+from src.observability.exposition import multiprocess_dir, reset_multiprocess_dir
 
 
 def run() -> None:
     settings = get_settings()
+    metrics_dir = multiprocess_dir()
+    if metrics_dir is not None:
+        reset_multiprocess_dir(metrics_dir)
     uvicorn.run(
         "src.api.app:app",
         host=settings.api_host,
         port=settings.api_port,
         reload=False,
+        workers=settings.api_workers,
         factory=False,
+        # Open event streams never finish on their own; cut them off instead of blocking shutdown.
+        timeout_graceful_shutdown=settings.api_shutdown_timeout_seconds,
     )
 
 
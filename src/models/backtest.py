@@ -0,0 +1,346 @@
+"""Vectorised historical replay of stored prices and weather.
+
+Every ``origin_every`` slots between ``start`` and ``end`` is a forecast
+origin: the history window ending at the origin is taken from the slot grid
+rebuilt from ``price_snapshots`` (exactly as prediction does), the next
+``horizon_steps`` slots are forecast and compared with the prices that were
+actually in effect. Origins are split into chunks scored in parallel by a
+``spawn`` process pool. Within a chunk, all (origin, series, step) rows go into
+one feature matrix, which each model version scores with a single ``predict``
+call. Workers return summed absolute and squared errors per horizon step,
+hour of day and station, and the parent merges them into MAE/RMSE.
+
+The ``persistence`` baseline (last observed price carried forward, what the
+API serves without a model) is always scored alongside the model versions.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from loguru import logger
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.config.settings import get_settings
+from src.db.session import SessionLocal
+from src.lazy_imports import lazy_import
+from src.models.features import FEATURE_COLUMNS, HISTORY_STEPS, load_price_series, load_weather_snapshots
+from src.models.inference import horizon_price_features, last_observed, slot_features
+from src.models.registry import LoadedModel, ModelRegistry
+
+pd = lazy_import("pandas")
+
+BASELINE = "persistence"
+BATCH_ROWS = 1_000_000  # feature rows per model call; bounds worker memory (~150 MB)
+HOURS = 24
+EPSILON = timedelta(microseconds=1)
+
+
+@dataclass(slots=True)
+class ErrorTotals:
+    """Summed absolute and squared errors per group label; additive across chunks."""
+
+    labels: List[Any]
+    abs_error: np.ndarray
+    squared_error: np.ndarray
+    count: np.ndarray
+
+    @classmethod
+    def empty(cls, labels: Sequence[Any]) -> "ErrorTotals":
+        size = len(labels)
+        return cls(list(labels), np.zeros(size), np.zeros(size), np.zeros(size, dtype=np.int64))
+
+    @classmethod
+    def from_groups(cls, labels: Sequence[Any], groups: np.ndarray, errors: np.ndarray) -> "ErrorTotals":
+        size = len(labels)
+        return cls(
+            list(labels),
+            np.bincount(groups, weights=np.abs(errors), minlength=size),
+            np.bincount(groups, weights=errors * errors, minlength=size),
+            np.bincount(groups, minlength=size),
+        )
+
+    def merge(self, other: "ErrorTotals") -> "ErrorTotals":
+        if other.labels == self.labels:
+            return ErrorTotals(
+                self.labels,
+                self.abs_error + other.abs_error,
+                self.squared_error + other.squared_error,
+                self.count + other.count,
+            )
+        labels = list(dict.fromkeys([*self.labels, *other.labels]))
+        merged = ErrorTotals.empty(labels)
+        positions = {label: index for index, label in enumerate(labels)}
+        for totals in (self, other):
+            index = np.fromiter((positions[label] for label in totals.labels), dtype=np.intp, count=len(totals.labels))
+            merged.abs_error[index] += totals.abs_error
+            merged.squared_error[index] += totals.squared_error
+            merged.count[index] += totals.count
+        return merged
+
+    def rows(self, label_name: str) -> List[Dict[str, Any]]:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mae = self.abs_error / self.count
+            rmse = np.sqrt(self.squared_error / self.count)
+        return [
+            {label_name: label, "mae": _finite(m), "rmse": _finite(r), "count": int(n)}
+            for label, m, r, n in zip(self.labels, mae.tolist(), rmse.tolist(), self.count.tolist())
+        ]
+
+
+@dataclass(slots=True)
+class ModelErrors:
+    by_step: ErrorTotals
+    by_hour: ErrorTotals
+    by_station: ErrorTotals
+
+    def merge(self, other: "ModelErrors") -> "ModelErrors":
+        return ModelErrors(
+            self.by_step.merge(other.by_step),
+            self.by_hour.merge(other.by_hour),
+            self.by_station.merge(other.by_station),
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        count = int(self.by_step.count.sum())
+        if not count:
+            return {"mae": None, "rmse": None, "count": 0}
+        return {
+            "mae": float(self.by_step.abs_error.sum() / count),
+            "rmse": float(np.sqrt(self.by_step.squared_error.sum() / count)),
+            "count": count,
+        }
+
+
+@dataclass(slots=True)
+class ChunkResult:
+    origins: int
+    series: int
+    errors: Dict[str, ModelErrors]
+
+
+@dataclass(slots=True)
+class BacktestConfig:
+    start: datetime
+    end: datetime
+    step: timedelta
+    horizon_steps: int
+    origin_every: int  # slots between origins
+    fuel_types: List[str]
+    station_ids: Optional[List[str]] = None
+    model_versions: List[str] = field(default_factory=list)
+    model_dir: Optional[str] = None
+
+    def origins(self) -> List[datetime]:
+        first = pd.Timestamp(self.start).ceil(self.step).to_pydatetime()
+        spacing = self.step * self.origin_every
+        count = int((self.end - first) // spacing) + 1 if self.end >= first else 0
+        return [first + spacing * index for index in range(count)]
+
+
+@dataclass(slots=True)
+class BacktestReport:
+    config: BacktestConfig
+    origins: int
+    errors: Dict[str, ModelErrors]
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        step_minutes = self.config.step.total_seconds() / 60.0
+        models: Dict[str, Any] = {}
+        for name, errors in self.errors.items():
+            by_step = errors.by_step.rows("step")
+            for row in by_step:
+                row["lead_minutes"] = (row["step"] + 1) * step_minutes
+            models[name] = {
+                **errors.summary(),
+                "by_step": by_step,
+                "by_hour": errors.by_hour.rows("hour"),
+                "by_station": sorted(errors.by_station.rows("station_id"), key=lambda row: row["station_id"]),
+            }
+        return {
+            "start": self.config.start.isoformat(),
+            "end": self.config.end.isoformat(),
+            "step_minutes": step_minutes,
+            "horizon_steps": self.config.horizon_steps,
+            "origin_every_steps": self.config.origin_every,
+            "fuel_types": self.config.fuel_types,
+            "origins": self.origins,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "models": models,
+        }
+
+
+_models: Dict[str, LoadedModel] = {}  # per worker process
+
+
+def _load_model(version: str, model_dir: Optional[str]) -> LoadedModel:
+    model = _models.get(version)
+    if model is None:
+        model = _models[version] = ModelRegistry(Path(model_dir) if model_dir else None).load(version)
+    return model
+
+
+def score_chunk(config: BacktestConfig, origins: Sequence[datetime]) -> ChunkResult:
+    """Replay ``origins`` (ascending) and return error totals per model; runs in a worker process."""
+
+    step, horizon = config.step, config.horizon_steps
+    grid_start = origins[0] - step * (HISTORY_STEPS - 1)
+    grid_end = origins[-1] + step * horizon
+    with SessionLocal() as session:
+        # Events anywhere inside the last slot set its price, so read up to the end of that slot.
+        wide = load_price_series(
+            session, grid_start, step, grid_end + step - EPSILON, config.station_ids, config.fuel_types
+        )
+        weather = load_weather_snapshots(session, grid_start - timedelta(hours=1), grid_end + timedelta(hours=1))
+    names = [BASELINE, *config.model_versions]
+    if wide.columns.empty:
+        return ChunkResult(len(origins), 0, {})
+
+    # Positions are relative to the first grid slot; the grid ends at the last capture,
+    # so actuals (and per-slot features) are padded up to the last target slot.
+    slots = pd.date_range(wide.index[0], grid_end, freq=step)
+    prices = wide.reindex(slots).to_numpy(dtype="float64").T  # (series, slots)
+    per_slot = slot_features(slots, weather).to_numpy(dtype="float64")
+    positions = ((pd.DatetimeIndex(origins) - slots[0]) // step).to_numpy()
+    positions = positions[positions >= HISTORY_STEPS - 1]
+    series_keys = list(wide.columns)
+    station_positions: Dict[str, int] = {}
+    station_of_series = np.asarray(
+        [station_positions.setdefault(station_id, len(station_positions)) for station_id, _ in series_keys]
+    )
+    station_labels = list(station_positions)
+    hours = slots.hour.to_numpy()
+
+    histories = sliding_window_view(prices, HISTORY_STEPS, axis=1)  # (series, windows, HISTORY_STEPS)
+    futures = sliding_window_view(prices, horizon, axis=1)  # (series, windows, horizon)
+    step_labels, hour_labels = list(range(horizon)), list(range(HOURS))
+    totals: Dict[str, ModelErrors] = {}
+
+    n_series = len(series_keys)
+    per_batch = max(1, BATCH_ROWS // max(1, n_series * horizon))
+    for offset in range(0, len(positions), per_batch):
+        batch = positions[offset : offset + per_batch]
+        targets = batch[:, None] + 1 + np.arange(horizon)  # (origins, horizon) slot positions
+        # Rows are origin-major, then series: (origins * series, ...).
+        history = histories[:, batch - (HISTORY_STEPS - 1)].transpose(1, 0, 2).reshape(-1, HISTORY_STEPS)
+        actual = futures[:, batch + 1].transpose(1, 0, 2).reshape(-1, horizon)
+        current = last_observed(history)
+
+        step_index = np.broadcast_to(np.arange(horizon), actual.shape)
+        hour_index = np.broadcast_to(hours[targets][:, None, :], (len(batch), n_series, horizon)).reshape(actual.shape)
+        station_index = np.broadcast_to(station_of_series[None, :, None], (len(batch), n_series, horizon)).reshape(
+            actual.shape
+        )
+
+        predictions = {BASELINE: np.repeat(current[:, None], horizon, axis=1)}
+        if config.model_versions:
+            features = _feature_frame(history, per_slot[targets], n_series)
+            for version in config.model_versions:
+                model = _load_model(version, config.model_dir)
+                predicted = np.asarray(model.predictor.predict(features[model.features]), dtype="float64")
+                predicted = predicted.reshape(actual.shape)
+                predicted[np.isnan(current)] = np.nan
+                predictions[version] = predicted
+
+        for name in names:
+            errors = predictions[name] - actual
+            valid = ~np.isnan(errors)
+            chunk = ModelErrors(
+                ErrorTotals.from_groups(step_labels, step_index[valid], errors[valid]),
+                ErrorTotals.from_groups(hour_labels, hour_index[valid], errors[valid]),
+                ErrorTotals.from_groups(station_labels, station_index[valid], errors[valid]),
+            )
+            totals[name] = totals[name].merge(chunk) if name in totals else chunk
+    return ChunkResult(len(positions), n_series, totals)
+
+
+def _feature_frame(history: np.ndarray, per_slot: np.ndarray, n_series: int) -> pd.DataFrame:
+    """One feature row per (origin, series, step); ``per_slot`` is ``(origins, horizon, slot features)``."""
+
+    horizon = per_slot.shape[1]
+    columns = horizon_price_features(history, horizon)
+    frame = pd.DataFrame({name: values.reshape(-1) for name, values in columns.items()})
+    slot_columns = [column for column in FEATURE_COLUMNS if column not in columns]
+    tiled = np.broadcast_to(per_slot[:, None], (per_slot.shape[0], n_series, *per_slot.shape[1:]))
+    frame[slot_columns] = tiled.reshape(-1, per_slot.shape[2])
+    return frame[FEATURE_COLUMNS]
+
+
+def run_backtest(config: BacktestConfig, workers: Optional[int] = None, chunks_per_worker: int = 4) -> BacktestReport:
+    """Score every origin of ``config`` across ``workers`` processes (1 = in this process)."""
+
+    started = datetime.utcnow()
+    origins = config.origins()
+    workers = max(1, workers or os.cpu_count() or 1)
+    chunk_count = max(1, min(len(origins), workers * chunks_per_worker))
+    chunks = [list(chunk) for chunk in np.array_split(np.asarray(origins, dtype=object), chunk_count) if len(chunk)]
+
+    errors: Dict[str, ModelErrors] = {}
+    scored = 0
+
+    def collect(result: ChunkResult) -> None:
+        nonlocal scored
+        scored += result.origins
+        for name, model_errors in result.errors.items():
+            errors[name] = errors[name].merge(model_errors) if name in errors else model_errors
+
+    if workers == 1 or len(chunks) == 1:
+        for chunk in chunks:
+            collect(score_chunk(config, chunk))
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+            for future in as_completed([pool.submit(score_chunk, config, chunk) for chunk in chunks]):
+                collect(future.result())
+
+    elapsed = (datetime.utcnow() - started).total_seconds()
+    logger.info("Backtested {} origins with {} in {:.1f}s", scored, ", ".join(errors) or "no models", elapsed)
+    return BacktestReport(config=config, origins=scored, errors=errors, elapsed_seconds=elapsed)
+
+
+def default_config(
+    start: datetime,
+    end: datetime,
+    horizon_steps: Optional[int] = None,
+    origin_every: int = 12,
+    fuel_types: Optional[List[str]] = None,
+    station_ids: Optional[List[str]] = None,
+    model_versions: Optional[List[str]] = None,
+) -> BacktestConfig:
+    settings = get_settings()
+    step = timedelta(minutes=settings.prediction_interval_minutes)
+    return BacktestConfig(
+        start=start,
+        end=end,
+        step=step,
+        horizon_steps=horizon_steps or int(timedelta(hours=24) / step),
+        origin_every=origin_every,
+        fuel_types=list(fuel_types or settings.fuel_types),
+        station_ids=station_ids,
+        model_versions=list(model_versions or []),
+        model_dir=str(settings.model_dir),
+    )
+
+
+def _finite(value: float) -> Optional[float]:
+    return value if np.isfinite(value) else None
+
+
+__all__ = [
+    "BASELINE",
+    "BacktestConfig",
+    "BacktestReport",
+    "ChunkResult",
+    "ErrorTotals",
+    "ModelErrors",
+    "default_config",
+    "run_backtest",
+    "score_chunk",
+]
@@ -0,0 +1,353 @@
+"""Incremental feature engineering feeding the ``feature_vectors`` table.
+
+Each run only processes slots newer than the stored watermark (plus the 24h of
+history needed for lags and rolling windows). ``price_snapshots`` holds change
+events (a row only when a series' price moves), so prices are reconstructed
+onto a regular slot grid (one column per station/fuel series) by forward-filling
+the events up to the last capture cycle. Lags, rolling statistics, calendar
+encodings and the weather join are then plain vectorised pandas operations.
+
+When ``ARCHIVE_PRUNE`` has moved closed days out of SQLite, the price and
+weather loaders read the part of a range before the prune cutoff from the
+Parquet archive, so backtests and full rebuilds still see the whole history.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session
+
+from src.config.settings import Settings, get_settings
+from src.db import bulk, models
+from src.db.session import SessionLocal
+from src.db.watermarks import get_watermark, set_watermark
+from src.lazy_imports import lazy_import
+
+pd = lazy_import("pandas")
+
+WATERMARK_NAME = "feature_vectors"
+CAPTURE_WATERMARK = "price_capture"  # captured_at of the last price capture cycle
+WEATHER_WATERMARK = "weather_capture"  # time of the last non-empty OpenWeather forecast capture
+PRICE_EVENT_COLUMNS = ["station_id", "fuel_type", "captured_at", "price_eur"]
+HISTORY_STEPS = 288  # 24h of 5-minute slots
+ARCHIVE_SEED_LOOKBACK = timedelta(days=7)  # archived events read before a range to seed its first slots
+LAG_STEPS = {"lag_1": 1, "lag_12": 12, "lag_288": 288}
+WEATHER_COLUMNS = ["temperature_c", "humidity", "wind_speed_ms", "precipitation_mm", "cloud_cover_pct"]
+CALENDAR_COLUMNS = ["hour_sin", "hour_cos", "weekday_sin", "weekday_cos"]
+PRICE_COLUMNS = [
+    *LAG_STEPS,
+    "rolling_mean_12",
+    "rolling_std_12",
+    "rolling_mean_288",
+    "rolling_min_288",
+    "rolling_max_288",
+]
+FEATURE_COLUMNS = [*CALENDAR_COLUMNS, *PRICE_COLUMNS, *WEATHER_COLUMNS]
+LABEL_COLUMN = "label_price"
+KEY_COLUMNS = ["station_id", "fuel_type", "target_timestamp"]
+
+
+def calendar_features(index: pd.DatetimeIndex) -> pd.DataFrame:
+    """Cyclical time-of-day and weekday encodings."""
+
+    hours = index.hour + index.minute / 60.0
+    weekdays = index.weekday
+    return pd.DataFrame(
+        {
+            "hour_sin": np.sin(2 * np.pi * hours / 24.0),
+            "hour_cos": np.cos(2 * np.pi * hours / 24.0),
+            "weekday_sin": np.sin(2 * np.pi * weekdays / 7.0),
+            "weekday_cos": np.cos(2 * np.pi * weekdays / 7.0),
+        },
+        index=index,
+    )
+
+
+def interpolate_weather(weather: pd.DataFrame, grid: pd.DatetimeIndex) -> pd.DataFrame:
+    """Time-interpolate hourly weather rows (indexed by timestamp) onto ``grid``.
+
+    Slots outside the span of the weather rows stay NaN.
+    """
+
+    weather = weather.reindex(columns=WEATHER_COLUMNS).astype("float64")
+    if weather.empty:
+        return pd.DataFrame(np.nan, index=grid, columns=WEATHER_COLUMNS)
+    weather = weather[~weather.index.duplicated(keep="last")].sort_index()
+    combined = weather.reindex(weather.index.union(grid))
+    return combined.interpolate(method="time", limit_area="inside").reindex(grid)
+
+
+def price_grid(events: pd.DataFrame, step: timedelta, start: datetime, end: datetime) -> pd.DataFrame:
+    """Reconstruct the slot grid ``[start, end]`` from price change events.
+
+    Events are floored to their slot (the last one per slot wins) and forward-filled,
+    so every slot holds the price in effect at that slot. Events before ``start``
+    only seed the fill. Series without any event up to a slot stay NaN there.
+    """
+
+    grid = pd.date_range(pd.Timestamp(start).floor(step), pd.Timestamp(end).floor(step), freq=step)
+    if events.empty:
+        columns = pd.MultiIndex.from_tuples([], names=["station_id", "fuel_type"])
+        return pd.DataFrame(index=grid, columns=columns, dtype="float64")
+    wide = (
+        events.assign(slot=events["captured_at"].dt.floor(step))
+        .pivot_table(index="slot", columns=["station_id", "fuel_type"], values="price_eur", aggfunc="last")
+        .sort_index()
+    )
+    return wide.reindex(wide.index.union(grid)).ffill().reindex(grid)
+
+
+def price_features(wide: pd.DataFrame) -> pd.DataFrame:
+    """Lag and rolling-window features for every series of a slot grid, in long form."""
+
+    frames: Dict[str, pd.DataFrame] = {LABEL_COLUMN: wide}
+    for name, steps in LAG_STEPS.items():
+        frames[name] = wide.shift(steps)
+    previous = wide.shift(1)
+    short = previous.rolling(12, min_periods=1)
+    day = previous.rolling(HISTORY_STEPS, min_periods=1)
+    frames["rolling_mean_12"] = short.mean()
+    frames["rolling_std_12"] = short.std()
+    frames["rolling_mean_288"] = day.mean()
+    frames["rolling_min_288"] = day.min()
+    frames["rolling_max_288"] = day.max()
+
+    long = pd.concat(
+        {name: frame.stack(["station_id", "fuel_type"], future_stack=True) for name, frame in frames.items()},
+        axis=1,
+    )
+    long.index = long.index.set_names(["target_timestamp", "station_id", "fuel_type"])
+    long = long[long[LABEL_COLUMN].notna()].reset_index()
+    long["current_price"] = long["lag_1"]
+    return long
+
+
+def _series_filter(table, station_ids: Optional[Iterable[str]], fuel_types: Optional[Iterable[str]]) -> list:
+    clauses = []
+    if station_ids is not None:
+        clauses.append(table.c.station_id.in_(list(station_ids)))
+    if fuel_types is not None:
+        clauses.append(table.c.fuel_type.in_(list(fuel_types)))
+    return clauses
+
+
+def _price_frame(rows) -> pd.DataFrame:
+    frame = pd.DataFrame(rows, columns=PRICE_EVENT_COLUMNS)
+    frame["captured_at"] = pd.to_datetime(frame["captured_at"])
+    frame["price_eur"] = frame["price_eur"].astype("float64")
+    return frame
+
+
+def latest_prices(
+    session: Session,
+    before: Optional[datetime] = None,
+    station_ids: Optional[Iterable[str]] = None,
+    fuel_types: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Last price event per series at or before ``before`` (over all history when ``None``)."""
+
+    table = models.PriceSnapshot.__table__
+    latest = select(
+        table.c.station_id,
+        table.c.fuel_type,
+        func.max(table.c.captured_at).label("captured_at"),
+    ).where(*_series_filter(table, station_ids, fuel_types))
+    if before is not None:
+        latest = latest.where(table.c.captured_at <= before)
+    latest = latest.group_by(table.c.station_id, table.c.fuel_type).subquery()
+    stmt = select(*(table.c[column] for column in PRICE_EVENT_COLUMNS)).join(
+        latest,
+        and_(
+            table.c.station_id == latest.c.station_id,
+            table.c.fuel_type == latest.c.fuel_type,
+            table.c.captured_at == latest.c.captured_at,
+        ),
+    )
+    return _price_frame(session.execute(stmt).all())
+
+
+def load_price_events(
+    session: Session,
+    start: datetime,
+    end: Optional[datetime] = None,
+    station_ids: Optional[Iterable[str]] = None,
+    fuel_types: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Change events in ``(start, end]`` plus the event in effect at ``start`` for every series."""
+
+    table = models.PriceSnapshot.__table__
+    stmt = select(*(table.c[column] for column in PRICE_EVENT_COLUMNS)).where(
+        table.c.captured_at > start, *_series_filter(table, station_ids, fuel_types)
+    )
+    if end is not None:
+        stmt = stmt.where(table.c.captured_at <= end)
+    seed = latest_prices(session, start, station_ids, fuel_types)
+    events = _price_frame(session.execute(stmt).all())
+    events = pd.concat([seed, events], ignore_index=True) if not seed.empty else events
+    pruned = _pruned_until(session)
+    if pruned is None or start >= pruned:
+        return events
+    # Pruned history lives in the archive; rows SQLite kept there (in-effect events) show up twice, harmlessly.
+    from src.db.archive import ParquetArchive
+
+    archived = ParquetArchive().read_prices(
+        PRICE_EVENT_COLUMNS, start - ARCHIVE_SEED_LOOKBACK, pruned, fuel_types, station_ids
+    )
+    if end is not None:
+        archived = archived[archived["captured_at"] <= end]
+    if archived.empty:
+        return events
+    archived = _price_frame(archived[PRICE_EVENT_COLUMNS].astype({"fuel_type": str}))
+    return pd.concat([archived, events], ignore_index=True).sort_values("captured_at", kind="stable")
+
+
+def last_capture(session: Session) -> Optional[datetime]:
+    """Time of the last price capture cycle (newest event for tables without the watermark)."""
+
+    captured = get_watermark(session, CAPTURE_WATERMARK)
+    if captured is None:
+        captured = session.execute(select(func.max(models.PriceSnapshot.captured_at))).scalar_one_or_none()
+    return captured
+
+
+def load_price_series(
+    session: Session,
+    start: datetime,
+    step: timedelta,
+    end: Optional[datetime] = None,
+    station_ids: Optional[Iterable[str]] = None,
+    fuel_types: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Regular slot grid ``[start, end]`` rebuilt from change events.
+
+    ``end`` defaults to the last capture cycle: prices are only known up to the
+    last time they were observed, so the grid never extends past it.
+    """
+
+    captured = last_capture(session)
+    if captured is None:
+        return price_grid(pd.DataFrame(columns=PRICE_EVENT_COLUMNS), step, start, start)
+    end = min(end, captured) if end is not None else captured
+    events = load_price_events(session, start, end, station_ids, fuel_types)
+    return price_grid(events, step, start, max(start, end))
+
+
+def load_weather_snapshots(session: Session, start: datetime, end: datetime) -> pd.DataFrame:
+    table = models.WeatherSnapshot.__table__
+    stmt = select(table.c.captured_at, *(table.c[column] for column in WEATHER_COLUMNS)).where(
+        table.c.captured_at >= start, table.c.captured_at <= end
+    )
+    frame = pd.DataFrame(session.execute(stmt).all(), columns=["captured_at", *WEATHER_COLUMNS])
+    pruned = _pruned_until(session)
+    if pruned is not None and start < pruned:
+        from src.db.archive import ParquetArchive
+
+        archived = ParquetArchive().read_weather(["captured_at", *WEATHER_COLUMNS], start, min(pruned, end))
+        if not archived.empty:
+            frame = pd.concat([archived[["captured_at", *WEATHER_COLUMNS]], frame], ignore_index=True)
+    return frame.set_index(pd.DatetimeIndex(pd.to_datetime(frame.pop("captured_at"))))
+
+
+def _pruned_until(session: Session) -> Optional[datetime]:
+    """Cutoff of the last archive prune; SQLite lacks closed-day rows before it."""
+
+    from src.db.archive import PRUNED_WATERMARK
+
+    return get_watermark(session, PRUNED_WATERMARK)
+
+
+def load_feature_frame(
+    session: Session,
+    fuel_type: Optional[str] = None,
+    since: Optional[datetime] = None,
+    station_ids: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """Return stored feature rows (keys, features, label) as a typed frame."""
+
+    table = models.FeatureVector.__table__
+    columns = [*KEY_COLUMNS, "current_price", *FEATURE_COLUMNS, LABEL_COLUMN]
+    stmt = select(*(table.c[column] for column in columns)).where(
+        *_series_filter(table, station_ids, [fuel_type] if fuel_type is not None else None)
+    )
+    if since is not None:
+        stmt = stmt.where(table.c.target_timestamp > since)
+    frame = pd.DataFrame(session.execute(stmt).all(), columns=columns)
+    frame["target_timestamp"] = pd.to_datetime(frame["target_timestamp"])
+    numeric = ["current_price", *FEATURE_COLUMNS, LABEL_COLUMN]
+    frame[numeric] = frame[numeric].astype("float64")
+    return frame
+
+
+class FeatureBuilder:
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self.settings = settings or get_settings()
+        self.step = timedelta(minutes=self.settings.prediction_interval_minutes)
+
+    def run(self) -> int:
+        with SessionLocal() as session:
+            return self.build(session)
+
+    def build(self, session: Session) -> int:
+        """Append feature rows for slots after the watermark; return the number written."""
+
+        watermark = get_watermark(session, WATERMARK_NAME)
+        end = last_capture(session)
+        if end is None or (watermark is not None and pd.Timestamp(end).floor(self.step) <= watermark):
+            return 0
+        if watermark is not None:
+            start = watermark - self.step * (HISTORY_STEPS + 1)
+        else:
+            start = session.execute(select(func.min(models.PriceSnapshot.captured_at))).scalar_one()
+
+        wide = load_price_series(session, start, self.step, end)
+        if wide.columns.empty:
+            return 0
+
+        features = price_features(wide)
+        if watermark is not None:
+            features = features[features["target_timestamp"] > watermark]
+        if features.empty:
+            return 0
+
+        slots = pd.DatetimeIndex(features["target_timestamp"].unique())
+        weather = load_weather_snapshots(
+            session,
+            (slots.min() - timedelta(hours=1)).to_pydatetime(),
+            (slots.max() + timedelta(hours=1)).to_pydatetime(),
+        )
+        per_slot = pd.concat([calendar_features(slots), interpolate_weather(weather, slots)], axis=1)
+        features = features.join(per_slot, on="target_timestamp")
+
+        records: List[dict] = bulk.frame_to_records(
+            features[[*KEY_COLUMNS, "current_price", *FEATURE_COLUMNS, LABEL_COLUMN]]
+        )
+        created_at = datetime.utcnow()
+        for record in records:
+            record["created_at"] = created_at
+        bulk.insert_feature_vectors(session, records)
+        set_watermark(session, WATERMARK_NAME, slots.max().to_pydatetime())
+        session.commit()
+        logger.info("Built {} feature rows up to {}", len(records), slots.max())
+        return len(records)
+
+
+__all__ = [
+    "CAPTURE_WATERMARK",
+    "FEATURE_COLUMNS",
+    "FeatureBuilder",
+    "LABEL_COLUMN",
+    "calendar_features",
+    "interpolate_weather",
+    "last_capture",
+    "latest_prices",
+    "load_feature_frame",
+    "load_price_events",
+    "load_price_series",
+    "price_features",
+    "price_grid",
+    "WEATHER_WATERMARK",
+]
@@ -0,0 +1,148 @@
+"""Batched, vectorised horizon inference.
+
+The whole horizon for every requested series is turned into one feature matrix
+(series × steps rows) and scored with a single ``predict`` call. Future prices
+are unknown at forecast time, so lags and rolling windows that reach past the
+forecast origin see the last observed price (persistence), matching how the
+training features are laid out on the slot grid.
+"""
+from __future__ import annotations
+
+import warnings
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.lazy_imports import lazy_import
+from src.models.features import (
+    FEATURE_COLUMNS,
+    HISTORY_STEPS,
+    LAG_STEPS,
+    calendar_features,
+    interpolate_weather,
+)
+from src.models.registry import LoadedModel
+
+pd = lazy_import("pandas")
+
+SeriesKey = Tuple[str, str]  # (station_id, fuel_type)
+
+
+def horizon_slots(start: datetime, step: timedelta, steps: int) -> pd.DatetimeIndex:
+    return pd.date_range(start=start, periods=steps, freq=step)
+
+
+def history_matrix(
+    wide: pd.DataFrame,
+    keys: Sequence[SeriesKey],
+    end: datetime,
+    step: timedelta,
+    length: int = HISTORY_STEPS,
+) -> np.ndarray:
+    """Return a ``(len(keys), length)`` array of slot prices ending at ``end``.
+
+    ``wide`` is a slot grid as returned by ``load_price_series`` (one column per
+    (station_id, fuel_type)); the last known price is carried to ``end`` and
+    series without observations are all-NaN rows.
+    """
+
+    matrix = np.full((len(keys), length), np.nan)
+    if wide.empty or not keys:
+        return matrix
+    last_slot = pd.Timestamp(end).floor(step)
+    grid = pd.date_range(end=last_slot, periods=length, freq=step)
+    wide = wide.reindex(wide.index.union(grid)).ffill(limit=length).reindex(grid)
+    wide = wide.reindex(columns=pd.MultiIndex.from_tuples(list(keys), names=["station_id", "fuel_type"]))
+    matrix[:] = wide.to_numpy(dtype="float64").T
+    return matrix
+
+
+def last_observed(history: np.ndarray) -> np.ndarray:
+    """Last non-NaN value per row (NaN when a row has none)."""
+
+    valid = ~np.isnan(history)
+    positions = history.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    values = history[np.arange(history.shape[0]), positions]
+    values[~valid.any(axis=1)] = np.nan
+    return values
+
+
+def horizon_price_features(history: np.ndarray, steps: int) -> Dict[str, np.ndarray]:
+    """Lag and rolling features of the next ``steps`` slots after each history row, ``(series, steps)`` each."""
+
+    n_series = history.shape[0]
+    if history.shape[1] < HISTORY_STEPS:
+        pad = np.full((n_series, HISTORY_STEPS - history.shape[1]), np.nan)
+        history = np.hstack([pad, history])
+    hist_len = history.shape[1]
+    current = last_observed(history)
+    extended = np.hstack([history, np.repeat(current[:, None], steps, axis=1)])
+
+    columns = {}
+    for name, lag in LAG_STEPS.items():
+        columns[name] = extended[:, hist_len - lag : hist_len - lag + steps]
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)  # all-NaN windows
+        for window, stats in ((12, ("mean", "std")), (HISTORY_STEPS, ("mean", "min", "max"))):
+            views = sliding_window_view(extended, window, axis=1)[:, hist_len - window : hist_len - window + steps]
+            if "mean" in stats:
+                columns[f"rolling_mean_{window}"] = np.nanmean(views, axis=2)
+            if "std" in stats:
+                columns[f"rolling_std_{window}"] = np.nanstd(views, axis=2, ddof=1)
+            if "min" in stats:
+                columns[f"rolling_min_{window}"] = np.nanmin(views, axis=2)
+            if "max" in stats:
+                columns[f"rolling_max_{window}"] = np.nanmax(views, axis=2)
+    return columns
+
+
+def slot_features(slots: pd.DatetimeIndex, weather: pd.DataFrame) -> pd.DataFrame:
+    """Calendar encodings and interpolated weather per slot."""
+
+    return pd.concat([calendar_features(slots), interpolate_weather(weather, slots)], axis=1)
+
+
+def build_horizon_features(history: np.ndarray, slots: pd.DatetimeIndex, weather: pd.DataFrame) -> pd.DataFrame:
+    """Feature frame with ``len(history) * len(slots)`` rows, series-major."""
+
+    columns = horizon_price_features(history, len(slots))
+    frame = pd.DataFrame({name: values.reshape(-1) for name, values in columns.items()})
+    per_slot = slot_features(slots, weather)
+    per_slot_values = np.tile(per_slot.to_numpy(dtype="float64"), (history.shape[0], 1))
+    frame[list(per_slot.columns)] = per_slot_values
+    return frame[FEATURE_COLUMNS]
+
+
+def predict_horizon(
+    history: np.ndarray,
+    slots: pd.DatetimeIndex,
+    weather: pd.DataFrame,
+    model: Optional[LoadedModel],
+) -> np.ndarray:
+    """Return a ``(series, steps)`` price matrix from one batched model call.
+
+    Without an active model the last observed price is carried forward.
+    """
+
+    current = last_observed(history)
+    if model is None:
+        return np.repeat(current[:, None], len(slots), axis=1)
+    features = build_horizon_features(history, slots, weather)
+    predicted = np.asarray(model.predictor.predict(features[model.features]), dtype="float64")
+    predicted = predicted.reshape(history.shape[0], len(slots))
+    # Series with no observed price at all cannot be forecast meaningfully.
+    predicted[np.isnan(current)] = np.nan
+    return predicted
+
+
+__all__ = [
+    "build_horizon_features",
+    "history_matrix",
+    "horizon_price_features",
+    "horizon_slots",
+    "last_observed",
+    "predict_horizon",
+    "slot_features",
+]
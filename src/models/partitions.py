@@ -0,0 +1,329 @@
+"""Partitioned training: one predictor per fuel, brand cluster or station.
+
+``TRAIN_PARTITION_BY`` selects the scheme; every partition is additionally
+split by fuel type. ``PartitionedTrainer.run`` plans the partitions from the
+``stations`` table and ``feature_vectors`` and fingerprints each one by the
+count and newest target slot of its labelled rows (the ones training uses).
+Only partitions whose fingerprint differs from the manifest (or that were never
+fitted) are dispatched to a ``spawn`` process pool sized to the available
+cores. Each job gets a time budget
+(``TRAIN_PARTITION_TIME_LIMIT_SECONDS``): it is passed to AutoGluon, and an
+alarm in the worker aborts the job if it overruns by more than half again.
+
+Artifact layout::
+
+    <model_dir>/partitions/<key>/<version>/predictor/      TabularPredictor
+    <model_dir>/partitions/<key>/<version>/metadata.json
+    <model_dir>/partitions/manifest.json                   key -> version, path, fingerprint, metrics
+
+The manifest is rewritten atomically after every finished job; the inference
+side (``PartitionedModels`` in ``src/models/registry.py``) reads it and loads a
+partition's predictor only when a forecast first needs it.
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.config.settings import Settings, get_settings
+from src.db import models
+from src.db.session import SessionLocal
+from src.models.features import load_feature_frame
+from src.models.train import _limit_resources, _report, _write_json_atomic, fit_predictor
+
+PARTITION_DIR = "partitions"
+MANIFEST_NAME = "manifest.json"
+PARTITION_KINDS = ("fuel", "brand", "station")
+UNBRANDED = "unbranded"
+KEEP_VERSIONS = 2  # newest plus the one it replaced
+
+
+@dataclass(slots=True)
+class Partition:
+    key: str
+    kind: str
+    fuel_type: str
+    brand: Optional[str] = None
+    station_ids: Optional[List[str]] = None  # None: every station selling the fuel
+    rows: int = 0
+    last_target: Optional[str] = None
+
+    @property
+    def fingerprint(self) -> Dict[str, Any]:
+        return {"rows": self.rows, "last_target": self.last_target}
+
+
+def brand_slug(brand: Optional[str]) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", (brand or "").strip().lower()).strip("-")
+    return slug or UNBRANDED
+
+
+def partition_key(kind: str, fuel_type: str, station_id: Optional[str] = None, brand: Optional[str] = None) -> str:
+    """Manifest key of the partition a (station, fuel) series belongs to."""
+
+    if kind == "fuel":
+        return f"fuel={fuel_type}"
+    if kind == "brand":
+        return f"brand={brand_slug(brand)}/fuel={fuel_type}"
+    if kind == "station":
+        return f"station={station_id}/fuel={fuel_type}"
+    raise ValueError(f"Unknown partition kind {kind!r}; expected one of {', '.join(PARTITION_KINDS)}")
+
+
+def manifest_path(model_dir: Path) -> Path:
+    return Path(model_dir) / PARTITION_DIR / MANIFEST_NAME
+
+
+def load_manifest(model_dir: Path) -> Dict[str, Any]:
+    path = manifest_path(model_dir)
+    if not path.exists():
+        return {"kind": None, "partitions": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def plan_partitions(session: Session, kind: str, fuel_types: List[str]) -> List[Partition]:
+    """Partitions with their current fingerprint, from one grouped scan of ``feature_vectors``.
+
+    Only labelled rows count: rows whose target slot has not been observed yet
+    are dropped by training, so they neither make a partition big enough to
+    train nor mark it as changed.
+    """
+
+    table = models.FeatureVector.__table__
+    series = session.execute(
+        select(
+            table.c.station_id,
+            table.c.fuel_type,
+            func.count().label("rows"),
+            func.max(table.c.target_timestamp).label("last_target"),
+        )
+        .where(table.c.fuel_type.in_(fuel_types), table.c.label_price.is_not(None))
+        .group_by(table.c.station_id, table.c.fuel_type)
+    ).all()
+    brands = dict(session.execute(select(models.Station.id, models.Station.brand)).all()) if kind == "brand" else {}
+
+    partitions: Dict[str, Partition] = {}
+    for station_id, fuel_type, rows, last_target in series:
+        brand = brands.get(station_id) if kind == "brand" else None
+        key = partition_key(kind, fuel_type, station_id, brand)
+        partition = partitions.get(key)
+        if partition is None:
+            partition = partitions[key] = Partition(
+                key=key,
+                kind=kind,
+                fuel_type=fuel_type,
+                brand=brand_slug(brand) if kind == "brand" else None,
+                station_ids=None if kind == "fuel" else [],
+            )
+        if partition.station_ids is not None:
+            partition.station_ids.append(station_id)
+        partition.rows += rows
+        last = last_target.isoformat() if last_target is not None else None
+        if last is not None and (partition.last_target is None or last > partition.last_target):
+            partition.last_target = last
+    return sorted(partitions.values(), key=lambda partition: partition.key)
+
+
+class PartitionBudgetExceeded(TimeoutError):
+    pass
+
+
+def _on_budget_exceeded(signum, frame) -> None:  # pragma: no cover - only fires on overrun
+    raise PartitionBudgetExceeded("partition training exceeded its time budget")
+
+
+_worker_slot = 0
+
+
+def _init_worker(counter, memory_limit_mb: int, num_cpus: int) -> None:
+    """Pin each pool process to its own block of cores and cap its memory."""
+
+    global _worker_slot
+    with counter.get_lock():
+        _worker_slot = counter.value
+        counter.value += 1
+    _limit_resources(memory_limit_mb, num_cpus, _worker_slot)
+
+
+def fit_partition(partition: Partition, version: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Train one partition's predictor; runs inside a pool process."""
+
+    version_dir = Path(config["model_dir"]) / PARTITION_DIR / partition.key / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+    budget = int(config["time_limit_seconds"])
+    alarm = hasattr(signal, "SIGALRM")
+    if alarm:
+        signal.signal(signal.SIGALRM, _on_budget_exceeded)
+        signal.alarm(budget + max(60, budget // 2))
+    try:
+        _report(version_dir, "loading_features")
+        with SessionLocal() as session:
+            frame = load_feature_frame(session, fuel_type=partition.fuel_type, station_ids=partition.station_ids)
+        metadata = fit_predictor(frame, version_dir, {**config, "fuel_type": partition.fuel_type})
+    finally:
+        if alarm:
+            signal.alarm(0)
+    return {**metadata, "partition": partition.key}
+
+
+class PartitionedTrainer:
+    def __init__(self, settings: Optional[Settings] = None) -> None:
+        self.settings = settings or get_settings()
+        self.model_dir = Path(self.settings.model_dir)
+        self._lock = threading.Lock()
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def kind(self) -> str:
+        return self.settings.train_partition_by
+
+    def workers(self) -> int:
+        """Pool size: configured, or the usable cores divided by ``TRAIN_NUM_CPUS``."""
+
+        if self.settings.train_partition_workers > 0:
+            return self.settings.train_partition_workers
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        return max(1, cores // max(1, self.settings.train_num_cpus))
+
+    def _config(self) -> Dict[str, Any]:
+        settings = self.settings
+        return {
+            "model_dir": str(self.model_dir),
+            "time_limit_seconds": settings.train_partition_time_limit_seconds,
+            "presets": settings.train_presets,
+            "num_cpus": settings.train_num_cpus,
+            "min_rows": settings.train_min_rows,
+        }
+
+    def plan(self, force: bool = False) -> Tuple[List[Partition], List[Partition]]:
+        """``(due, unchanged)``: partitions to retrain, and those whose data has not changed."""
+
+        with SessionLocal() as session:
+            partitions = plan_partitions(session, self.kind, self.settings.fuel_types)
+        fitted = load_manifest(self.model_dir)["partitions"]
+        due, unchanged = [], []
+        for partition in partitions:
+            entry = fitted.get(partition.key)
+            if partition.rows < self.settings.train_min_rows:
+                continue
+            if force or entry is None or entry.get("fingerprint") != partition.fingerprint:
+                due.append(partition)
+            else:
+                unchanged.append(partition)
+        return due, unchanged
+
+    def run(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        """Retrain the changed partitions in parallel; ``None`` when a run is already in progress."""
+
+        if not self._lock.acquire(blocking=False):
+            logger.info("Partitioned training already running; skipping")
+            return None
+        try:
+            return self._run(force)
+        finally:
+            self._lock.release()
+
+    async def run_async(self, force: bool = False) -> Optional[Dict[str, Any]]:
+        import asyncio
+
+        return await asyncio.to_thread(self.run, force)
+
+    def _run(self, force: bool) -> Dict[str, Any]:
+        started = datetime.utcnow()
+        version = started.strftime("%Y%m%dT%H%M%SZ")
+        due, unchanged = self.plan(force)
+        summary: Dict[str, Any] = {
+            "version": version,
+            "kind": self.kind,
+            "started_at": started.isoformat(),
+            "trained": [],
+            "unchanged": len(unchanged),
+            "failed": {},
+        }
+        if due:
+            workers = min(self.workers(), len(due))
+            logger.info(
+                "Training {} of {} {} partitions on {} workers", len(due), len(due) + len(unchanged), self.kind, workers
+            )
+            config = self._config()
+            context = multiprocessing.get_context("spawn")
+            counter = context.Value("i", 0)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(counter, self.settings.train_memory_limit_mb, self.settings.train_num_cpus),
+            ) as pool:
+                futures = {pool.submit(fit_partition, partition, version, config): partition for partition in due}
+                for future in as_completed(futures):
+                    partition = futures[future]
+                    try:
+                        metadata = future.result()
+                    except Exception as exc:  # noqa: BLE001 - one failed partition must not stop the others
+                        error = summary["failed"][partition.key] = f"{type(exc).__name__}: {exc}"
+                        logger.error("Training partition {} failed: {}", partition.key, error)
+                        continue
+                    self._record(partition, version, metadata)
+                    summary["trained"].append(partition.key)
+        summary["finished_at"] = datetime.utcnow().isoformat()
+        self.last_run = summary
+        logger.info(
+            "Partitioned training {}: {} trained, {} unchanged, {} failed",
+            version,
+            len(summary["trained"]),
+            summary["unchanged"],
+            len(summary["failed"]),
+        )
+        return summary
+
+    def _record(self, partition: Partition, version: str, metadata: Dict[str, Any]) -> None:
+        """Point the manifest at the new artifact and drop versions older than the one it replaced."""
+
+        manifest = load_manifest(self.model_dir)
+        manifest["kind"] = self.kind
+        manifest["updated_at"] = datetime.utcnow().isoformat()
+        manifest["partitions"][partition.key] = {
+            **asdict(partition),
+            "fingerprint": partition.fingerprint,
+            "version": version,
+            "path": f"{PARTITION_DIR}/{partition.key}/{version}",
+            "trained_at": metadata.get("trained_at"),
+            "metrics": metadata.get("metrics"),
+            "features": metadata.get("features"),
+        }
+        path = manifest_path(self.model_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write_json_atomic(path, manifest)
+
+        versions = sorted(child for child in (path.parent / partition.key).iterdir() if child.is_dir())
+        for stale in versions[:-KEEP_VERSIONS]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+__all__ = [
+    "MANIFEST_NAME",
+    "PARTITION_KINDS",
+    "Partition",
+    "PartitionBudgetExceeded",
+    "PartitionedTrainer",
+    "brand_slug",
+    "fit_partition",
+    "load_manifest",
+    "manifest_path",
+    "partition_key",
+    "plan_partitions",
+]
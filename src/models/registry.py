@@ -0,0 +1,315 @@
+"""In-memory registry of trained predictors for inference.
+
+The newest artifact (``<model_dir>/LATEST``) is loaded once per process and
+warmed up with a dummy prediction before it becomes active, so the first real
+request does not pay lazy-initialisation costs. Newer versions are swapped in
+with a single reference assignment: requests already holding the old model
+finish on it. The replaced model stays loaded for instant rollback.
+
+Rollbacks are persisted rather than kept in process memory: ``LATEST`` is
+pointed back at the previous version and the rolled-back one is added to
+``<model_dir>/rejected.json``. Every API worker's ``watch_models`` job then
+converges on the same version, and a restarted worker does not reload the
+rejected one.
+
+With partitioned training (``TRAIN_PARTITION_BY``) the registry also follows
+``<model_dir>/partitions/manifest.json``. Partition predictors are loaded on
+first use and kept in a small LRU (``MODEL_CACHE_SIZE``); series without a
+fitted partition fall back to the global model if it was trained on their fuel
+(``FUEL_TYPE``), otherwise to persistence.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.lazy_imports import lazy_import
+from src.models.partitions import load_manifest, manifest_path, partition_key
+from src.models.train import LATEST_POINTER, REJECTED_FILE, _write_json_atomic, point_latest
+
+pd = lazy_import("pandas")
+
+LOAD_RETRY_SECONDS = 300.0  # a partition version that failed to load is retried after this long
+
+
+@dataclass(slots=True)
+class LoadedModel:
+    version: str
+    predictor: Any
+    metadata: Dict[str, Any]
+    features: List[str]
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+    warmup_ms: float = 0.0
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "loaded_at": self.loaded_at.isoformat(),
+            "warmup_ms": round(self.warmup_ms, 2),
+            "trained_at": self.metadata.get("trained_at"),
+            "metrics": self.metadata.get("metrics"),
+        }
+
+
+def load_autogluon_predictor(path: Path) -> Any:
+    from autogluon.tabular import TabularPredictor
+
+    return TabularPredictor.load(str(path))
+
+
+def load_model(version_dir: Path, version: str, loader: Callable[[Path], Any]) -> LoadedModel:
+    """Load one artifact directory and warm it up with a dummy prediction."""
+
+    metadata = json.loads((version_dir / "metadata.json").read_text(encoding="utf-8"))
+    model = LoadedModel(
+        version=version,
+        predictor=loader(version_dir / "predictor"),
+        metadata=metadata,
+        features=list(metadata["features"]),
+    )
+    dummy = pd.DataFrame([[0.0] * len(model.features)], columns=model.features)
+    started = time.perf_counter()
+    model.predictor.predict(dummy)
+    model.warmup_ms = (time.perf_counter() - started) * 1000.0
+    return model
+
+
+class PartitionedModels:
+    """Partition predictors from the training manifest, loaded lazily and kept in an LRU.
+
+    A loaded partition's version is ``<key>/<version>`` (its path below
+    ``partitions/``), so it is distinguishable from global versions in
+    responses and cache keys. Loads run outside the lock, so a cold partition
+    never blocks forecasts served by loaded ones; concurrent requests for the
+    same version wait for one load. A version that failed to load is retried
+    after ``LOAD_RETRY_SECONDS`` or when the manifest changes.
+    """
+
+    def __init__(self, model_dir: Path, loader: Callable[[Path], Any], capacity: int) -> None:
+        self.model_dir = model_dir
+        self.loader = loader
+        self.capacity = max(1, capacity)
+        self.kind: Optional[str] = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._mtime: Optional[float] = None
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._failed: Dict[str, float] = {}  # version -> time.monotonic() of the failed load
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def refresh(self) -> bool:
+        """Reread the manifest if it changed on disk; return True when it did."""
+
+        path = manifest_path(self.model_dir)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        manifest = load_manifest(self.model_dir) if mtime is not None else {"kind": None, "partitions": {}}
+        with self._lock:
+            self.kind = manifest.get("kind")
+            self._entries = manifest.get("partitions", {})
+            for key in [key for key, model in self._models.items() if not self._current(key, model)]:
+                del self._models[key]  # superseded; the next request loads the new version
+            self._failed.clear()
+            self._mtime = mtime
+        logger.info("Loaded partition manifest: {} {} partitions", len(self._entries), self.kind or "-")
+        return True
+
+    def resolve(self, station_id: str, brand: Optional[str], fuel_type: str) -> Optional[LoadedModel]:
+        """The fitted partition predictor serving this series, loading it on first use."""
+
+        if not self._entries:
+            return None
+        key = partition_key(self.kind, fuel_type, station_id, brand)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        version = f"{key}/{entry['version']}"
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None and model.version == version:
+                self._models.move_to_end(key)
+                return model
+            failed_at = self._failed.get(version)
+            if failed_at is not None and time.monotonic() - failed_at < LOAD_RETRY_SECONDS:
+                return None
+            pending = self._inflight.get(version)
+            leader = pending is None
+            if leader:
+                pending = self._inflight[version] = Future()
+        if not leader:
+            return pending.result()
+
+        model = None
+        try:
+            model = load_model(self.model_dir / entry["path"], version, self.loader)
+        except Exception:  # noqa: BLE001 - a broken partition falls back to the global model
+            logger.exception("Loading partition model {} failed", version)
+        finally:
+            with self._lock:
+                del self._inflight[version]
+                if model is None:
+                    self._failed[version] = time.monotonic()
+                elif self._current(key, model):  # the manifest may have moved on during the load
+                    self._failed.pop(version, None)
+                    self._models[key] = model
+                    while len(self._models) > self.capacity:
+                        self._models.popitem(last=False)
+            pending.set_result(model)
+        if model is not None:
+            logger.info("Loaded partition model {} (warm-up {:.1f} ms)", model.version, model.warmup_ms)
+        return model
+
+    def _current(self, key: str, model: LoadedModel) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and model.version == f"{key}/{entry['version']}"
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "count": len(self._entries),
+            "loaded": [model.version for model in self._models.values()],
+            "capacity": self.capacity,
+        }
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        model_dir: Optional[Path] = None,
+        loader: Callable[[Path], Any] = load_autogluon_predictor,
+    ) -> None:
+        settings = get_settings()
+        self.model_dir = Path(model_dir or settings.model_dir)
+        self.loader = loader
+        self.default_fuel_type = settings.fuel_type  # of global artifacts that predate ``metadata["fuel_type"]``
+        self.partitions = PartitionedModels(self.model_dir, loader, settings.model_cache_size)
+        self.active: Optional[LoadedModel] = None
+        self.previous: Optional[LoadedModel] = None
+        self._lock = threading.Lock()
+
+    @property
+    def active_version(self) -> Optional[str]:
+        model = self.active
+        return model.version if model else None
+
+    def latest_version(self) -> Optional[str]:
+        pointer = self.model_dir / LATEST_POINTER
+        if not pointer.exists():
+            return None
+        return pointer.read_text(encoding="utf-8").strip() or None
+
+    def versions(self) -> List[str]:
+        """Successfully trained global versions on disk, oldest first."""
+
+        return sorted(path.parent.name for path in self.model_dir.glob("*/metadata.json"))
+
+    def rejected_versions(self) -> Set[str]:
+        path = self.model_dir / REJECTED_FILE
+        if not path.exists():
+            return set()
+        return set(json.loads(path.read_text(encoding="utf-8")).get("versions", []))
+
+    def refresh(self) -> bool:
+        """Load and activate the newest artifact if it differs; return True on swap.
+
+        Also rereads the partition manifest; a changed manifest counts as a swap.
+        """
+
+        partitions_changed = self.partitions.refresh()
+        latest = self.latest_version()
+        if latest is None or latest == self.active_version or latest in self.rejected_versions():
+            return partitions_changed
+        with self._lock:
+            if latest == self.active_version:
+                return partitions_changed
+            previous = self.previous
+            model = previous if previous is not None and previous.version == latest else self.load(latest)
+            self.previous, self.active = self.active, model
+        logger.info("Activated model {} (warm-up {:.1f} ms)", model.version, model.warmup_ms)
+        return True
+
+    def load(self, version: str) -> LoadedModel:
+        return load_model(self.model_dir / version, version, self.loader)
+
+    def model_for(self, station_id: str, brand: Optional[str], fuel_type: str) -> Optional[LoadedModel]:
+        """Partition model for one series if one was fitted, else the global model trained on its fuel.
+
+        ``None`` (persistence) for fuels the global model was not trained on: an
+        e5 model must not score e10 or diesel series.
+        """
+
+        model = self.partitions.resolve(station_id, brand, fuel_type)
+        if model is not None:
+            return model
+        active = self.active
+        if active is not None and active.metadata.get("fuel_type", self.default_fuel_type) == fuel_type:
+            return active
+        return None
+
+    def rollback(self) -> Optional[LoadedModel]:
+        """Reactivate the newest version older than the active one that was not rolled back before.
+
+        The active version is recorded as rejected and ``LATEST`` is pointed at
+        the reactivated one, so the other workers follow on their next refresh.
+        Returns ``None`` when there is no earlier version to go back to.
+        """
+
+        with self._lock:
+            active = self.active
+            if active is None:
+                return None
+            rejected = self.rejected_versions() | {active.version}
+            candidates = [
+                version for version in self.versions() if version < active.version and version not in rejected
+            ]
+            if not candidates:
+                return None
+            previous = self.previous
+            target = candidates[-1]
+            model = previous if previous is not None and previous.version == target else self.load(target)
+            _write_json_atomic(
+                self.model_dir / REJECTED_FILE,
+                {"versions": sorted(rejected), "updated_at": datetime.utcnow().isoformat()},
+            )
+            point_latest(self.model_dir, target)
+            self.active, self.previous = model, active
+        logger.warning("Rolled back from model {} to {}", active.version, model.version)
+        return model
+
+    def status(self) -> Dict[str, Any]:
+        active, previous = self.active, self.previous
+        return {
+            "active": active.describe() if active else None,
+            "previous": previous.describe() if previous else None,
+            "latest_on_disk": self.latest_version(),
+            "rejected": sorted(self.rejected_versions()),
+            "partitions": self.partitions.status(),
+        }
+
+
+@lru_cache
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+
+    return ModelRegistry()
+
+
+__all__ = ["LoadedModel", "ModelRegistry", "PartitionedModels", "get_model_registry", "load_model"]
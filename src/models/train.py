@@ -1,21 +1,260 @@
-"""AutoGluon training placeholders."""
+"""AutoGluon training, executed in a resource-limited worker process.
+
+The fit itself runs in a single-worker ``spawn`` process pool so a multi-minute
+AutoGluon run never blocks the API event loop. The child caps its address space
+and CPU affinity, writes progress to ``<model_dir>/<version>/progress.json`` and
+returns the artifact metadata, which the parent keeps as the latest status.
+
+Artifact layout::
+
+    <model_dir>/<version>/predictor/      AutoGluon TabularPredictor
+    <model_dir>/<version>/metadata.json   features, rows, metrics
+    <model_dir>/LATEST                    name of the version to serve (the newest, unless rolled back)
+    <model_dir>/rejected.json             versions rolled back from, never reactivated
+"""
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 from loguru import logger
 
 from src.config.settings import get_settings
 
+LATEST_POINTER = "LATEST"
+REJECTED_FILE = "rejected.json"
+
+
+@dataclass(slots=True)
+class TrainingStatus:
+    version: str
+    state: str = "queued"  # queued | running | succeeded | failed
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def _write_json_atomic(path: Path, payload: Dict[str, Any]) -> None:
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(payload, indent=2, default=str), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def point_latest(model_dir: Path, version: str) -> None:
+    """Atomically point ``LATEST`` at ``version``; every API process follows it."""
+
+    tmp = model_dir / f".{LATEST_POINTER}.tmp"
+    tmp.write_text(version, encoding="utf-8")
+    os.replace(tmp, model_dir / LATEST_POINTER)
+
+
+def _report(version_dir: Path, stage: str, **extra: Any) -> None:
+    _write_json_atomic(
+        version_dir / "progress.json",
+        {"stage": stage, "updated_at": datetime.utcnow().isoformat(), **extra},
+    )
+
+
+def _limit_resources(memory_limit_mb: int, num_cpus: int, slot: int = 0) -> None:
+    """Best-effort caps for the training process (no-ops where unsupported).
+
+    Runs once per worker process, as the pool initializer: the limits persist
+    for the process, and ``os.nice`` is cumulative.
+
+    ``slot`` selects which block of ``num_cpus`` cores the process is pinned to,
+    so parallel training workers do not share cores.
+    """
+
+    try:
+        import resource
+
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):  # pragma: no cover - platform specific
+        logger.warning("Could not apply training memory limit")
+    if hasattr(os, "sched_setaffinity"):
+        available = sorted(os.sched_getaffinity(0))
+        count = max(1, min(num_cpus, len(available)))
+        first = (slot * count) % len(available)
+        os.sched_setaffinity(0, (available * 2)[first : first + count])
+    if hasattr(os, "nice"):
+        os.nice(10)
+
+
+def fit_predictor(frame, version_dir: Path, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit a predictor on a feature frame into ``version_dir``; return the metadata written next to it."""
+
+    from autogluon.tabular import TabularPredictor
+
+    from src.models.features import FEATURE_COLUMNS, LABEL_COLUMN
+
+    frame = frame.dropna(subset=[LABEL_COLUMN]).sort_values("target_timestamp")
+    if len(frame) < config["min_rows"]:
+        raise RuntimeError(f"Not enough feature rows to train ({len(frame)} < {config['min_rows']})")
+
+    # Hold out the most recent slice for tuning so validation mimics forecasting.
+    split = int(len(frame) * 0.9)
+    columns = [*FEATURE_COLUMNS, LABEL_COLUMN]
+    train_data, tuning_data = frame.iloc[:split][columns], frame.iloc[split:][columns]
+
+    _report(version_dir, "fitting", rows=len(frame))
+    predictor = TabularPredictor(
+        label=LABEL_COLUMN,
+        path=str(version_dir / "predictor"),
+        problem_type="regression",
+        eval_metric="mean_absolute_error",
+        verbosity=1,
+    ).fit(
+        train_data,
+        tuning_data=tuning_data,
+        time_limit=config["time_limit_seconds"],
+        presets=config["presets"],
+        num_cpus=config["num_cpus"],
+    )
+
+    _report(version_dir, "evaluating")
+    scores = predictor.evaluate(tuning_data, silent=True)
+    metadata = {
+        "version": version_dir.name,
+        "trained_at": datetime.utcnow().isoformat(),
+        "fuel_type": config["fuel_type"],
+        "rows": len(frame),
+        "train_end": frame["target_timestamp"].max().isoformat(),
+        "features": FEATURE_COLUMNS,
+        "label": LABEL_COLUMN,
+        "best_model": predictor.model_best,
+        "metrics": {name: float(value) for name, value in scores.items()},
+    }
+    _write_json_atomic(version_dir / "metadata.json", metadata)
+    _report(version_dir, "done")
+    return metadata
+
+
+def fit_model(version: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Train the global predictor and point ``LATEST`` at it; runs inside the worker process."""
+
+    from src.db.session import SessionLocal
+    from src.models.features import load_feature_frame
+
+    model_dir = Path(config["model_dir"])
+    version_dir = model_dir / version
+    version_dir.mkdir(parents=True, exist_ok=True)
+
+    _report(version_dir, "loading_features")
+    with SessionLocal() as session:
+        frame = load_feature_frame(session, fuel_type=config["fuel_type"])
+    metadata = fit_predictor(frame, version_dir, config)
+    point_latest(model_dir, version)
+    return metadata
+
 
 class AutoMLTrainer:
     def __init__(self) -> None:
         self.settings = get_settings()
         self.model_dir = Path(self.settings.model_dir)
         self.model_dir.mkdir(parents=True, exist_ok=True)
+        self.status: Optional[TrainingStatus] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._future: Optional[Future] = None
+
+    def _config(self) -> Dict[str, Any]:
+        settings = self.settings
+        return {
+            "model_dir": str(self.model_dir),
+            "fuel_type": settings.fuel_type,
+            "time_limit_seconds": settings.train_time_limit_seconds,
+            "presets": settings.train_presets,
+            "num_cpus": settings.train_num_cpus,
+            "min_rows": settings.train_min_rows,
+        }
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_resources,
+                initargs=(self.settings.train_memory_limit_mb, self.settings.train_num_cpus),
+            )
+        return self._executor
+
+    def submit(self) -> Optional[Future]:
+        """Start a training run in the worker process unless one is in flight."""
+
+        if self._future is not None and not self._future.done():
+            logger.info("Retraining {} still running; skipping new request", self.status.version)
+            return None
+
+        version = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+        self.status = TrainingStatus(version=version, state="running")
+        self._future = self._pool().submit(fit_model, version, self._config())
+        self._future.add_done_callback(self._on_done)
+        logger.info("Retraining {} submitted to worker process", version)
+        return self._future
+
+    def _on_done(self, future: Future) -> None:
+        status = self.status
+        status.finished_at = datetime.utcnow()
+        try:
+            status.result = future.result()
+            status.state = "succeeded"
+            logger.info("Retraining {} finished: {}", status.version, status.result.get("metrics"))
+        except Exception as exc:  # noqa: BLE001 - surfaced via status
+            status.state = "failed"
+            status.error = f"{type(exc).__name__}: {exc}"
+            logger.error("Retraining {} failed: {}", status.version, status.error)
+
+    def retrain(self) -> Optional[Dict[str, Any]]:
+        """Blocking retrain (scripts); still runs in the limited worker process."""
+
+        future = self.submit()
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception:  # noqa: BLE001 - already recorded by _on_done
+            return None
+
+    async def retrain_async(self) -> None:
+        """Scheduler entry point: await the worker without blocking the event loop."""
+
+        future = self.submit()
+        if future is not None:
+            with contextlib.suppress(Exception):  # failures are recorded by _on_done
+                await asyncio.wrap_future(future)
+
+    def progress(self) -> Dict[str, Any]:
+        """Current status merged with the worker's latest progress report."""
+
+        if self.status is None:
+            return {"state": "idle"}
+        report = asdict(self.status)
+        progress_file = self.model_dir / self.status.version / "progress.json"
+        if progress_file.exists():
+            report["progress"] = json.loads(progress_file.read_text(encoding="utf-8"))
+        return report
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+@lru_cache
+def get_trainer() -> AutoMLTrainer:
+    """Return the process-wide trainer."""
 
-    def retrain(self) -> None:
-        logger.info("AutoGluon retraining placeholder invoked; implement once data is ready")
+    return AutoMLTrainer()
 
 
-__all__ = ["AutoMLTrainer"]
+__all__ = ["AutoMLTrainer", "TrainingStatus", "fit_model", "fit_predictor", "get_trainer"]
@@ -0,0 +1,135 @@
+"""Scrape-time collection, multi-worker metric dumps and the scheduler worker's ``/metrics`` listener."""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from loguru import logger
+
+from src.config.settings import get_settings
+from src.db.session import SessionLocal
+from src.db.watermarks import get_watermark
+from src.models.features import CAPTURE_WATERMARK, WEATHER_WATERMARK
+from src.observability.metrics import CONTENT_TYPE, DATA_AGE_SECONDS, REGISTRY
+
+FRESHNESS_WATERMARKS = {"price": CAPTURE_WATERMARK, "weather": WEATHER_WATERMARK}
+
+
+def record_data_freshness() -> None:
+    """Set ``benzin_data_age_seconds`` from the capture watermarks (shared by all processes)."""
+
+    now = datetime.utcnow()
+    with SessionLocal() as session:
+        for source, watermark in FRESHNESS_WATERMARKS.items():
+            captured_at = get_watermark(session, watermark)
+            if captured_at is None:
+                DATA_AGE_SECONDS.remove(source=source)
+            else:
+                DATA_AGE_SECONDS.set((now - captured_at).total_seconds(), source=source)
+
+
+def multiprocess_dir() -> Optional[Path]:
+    """Directory the API workers share their metrics through; ``None`` with a single worker."""
+
+    settings = get_settings()
+    if settings.api_workers <= 1 or not settings.metrics_multiproc_dir:
+        return None
+    return Path(settings.metrics_multiproc_dir)
+
+
+def reset_multiprocess_dir(directory: Path) -> None:
+    """Drop dumps of a previous server run; called once before the workers start."""
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.json"):
+        path.unlink(missing_ok=True)
+
+
+def dump_process_metrics(directory: Path) -> None:
+    """Write this process's registry to ``<directory>/<pid>.json`` (atomically)."""
+
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"{os.getpid()}.json"
+    tmp = directory / f".{os.getpid()}.json.tmp"
+    tmp.write_text(json.dumps(REGISTRY.dump()), encoding="utf-8")
+    os.replace(tmp, target)
+
+
+def _other_dumps(directory: Path) -> Iterator[Tuple[str, bool, Dict[str, Any]]]:
+    own = os.getpid()
+    for path in directory.glob("*.json"):
+        try:
+            pid = int(path.stem)
+            if pid == own:
+                continue
+            dump = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue  # not a dump, or removed by a restarting server
+        yield str(pid), _alive(pid), dump
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def render_metrics(directory: Optional[Path] = None) -> str:
+    """Exposition of this process's registry, merged with the other workers' dumps in ``directory``."""
+
+    try:
+        record_data_freshness()
+    except Exception:  # pragma: no cover - database locked or missing
+        logger.exception("Reading data freshness for /metrics failed")
+    if directory is None:
+        return REGISTRY.render()
+    return REGISTRY.render_merged(_other_dumps(directory), str(os.getpid()))
+
+
+async def serve_metrics(host: str, port: int) -> asyncio.AbstractServer:
+    """Serve ``GET /metrics`` on a bare asyncio listener (the worker has no web framework)."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass  # drain headers
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?", 1)[0] == "/metrics":
+                status, content_type = "200 OK", CONTENT_TYPE
+                body = (await asyncio.to_thread(render_metrics)).encode("utf-8")
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    logger.info("Serving worker metrics on http://{}:{}/metrics", host, port)
+    return server
+
+
+__all__ = [
+    "FRESHNESS_WATERMARKS",
+    "dump_process_metrics",
+    "multiprocess_dir",
+    "record_data_freshness",
+    "render_metrics",
+    "reset_multiprocess_dir",
+    "serve_metrics",
+]
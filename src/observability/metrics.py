@@ -0,0 +1,384 @@
+"""Minimal in-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms with labels, rendered in the text format 0.0.4
+that Prometheus scrapes from ``/metrics``. Every process holds its own registry.
+The scheduler worker serves it on its own port. Several uvicorn workers share
+one port, so each of them also dumps its registry to a shared directory
+(:meth:`Registry.dump`), and the worker answering a scrape renders the merged
+view (:meth:`Registry.render_merged`): counters and histograms are summed over
+every process that ever wrote. Gauges follow their ``multiprocess_mode`` over
+the live processes: summed, one series per ``worker``, or the scraping
+process's own value.
+
+The hot-path metrics used across the code base are defined at the bottom of
+this module; import them from here instead of creating new ones ad hoc.
+"""
+from __future__ import annotations
+
+import abc
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, values))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines of every label set."""
+
+    @abc.abstractmethod
+    def dump(self) -> List[Tuple[LabelValues, Any]]:
+        """JSON-serialisable state per label set, for merging across processes."""
+
+    @abc.abstractmethod
+    def absorb(self, key: LabelValues, state: Any, worker: str, live: bool, own: bool) -> None:
+        """Fold one label set dumped by another process (or this one, ``own``) into this metric."""
+
+    def blank(self) -> "Metric":
+        """Empty metric of the same shape that merged dumps are absorbed into."""
+
+        return type(self)(self.name, self.documentation, self.labelnames)
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(f"{line}\n" for line in self.samples())
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in items]
+
+    def dump(self) -> List[Tuple[LabelValues, Any]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def absorb(self, key: LabelValues, state: Any, worker: str, live: bool, own: bool) -> None:
+        # Counts of exited workers stay in the total, so it never goes backwards.
+        self._values[key] = self._values.get(key, 0.0) + state
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    MULTIPROCESS_MODES = ("sum", "all", "local")
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), multiprocess_mode: str = "sum"
+    ) -> None:
+        if multiprocess_mode not in self.MULTIPROCESS_MODES:
+            raise ValueError(f"multiprocess_mode must be one of {self.MULTIPROCESS_MODES}")
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def remove(self, **labels: object) -> None:
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def value(self, **labels: object) -> Optional[float]:
+        return self._values.get(self._key(labels))
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in items]
+
+    def dump(self) -> List[Tuple[LabelValues, Any]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def blank(self) -> "Gauge":
+        labelnames = (*self.labelnames, "worker") if self.multiprocess_mode == "all" else self.labelnames
+        return Gauge(self.name, self.documentation, labelnames, self.multiprocess_mode)
+
+    def absorb(self, key: LabelValues, state: Any, worker: str, live: bool, own: bool) -> None:
+        if not live:
+            return  # a gauge of an exited worker no longer describes anything
+        if self.multiprocess_mode == "sum":
+            self._values[key] = self._values.get(key, 0.0) + state
+        elif self.multiprocess_mode == "all":
+            self._values[(*key, worker)] = state
+        elif own:
+            self._values[key] = state
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum]
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        position = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][position] += 1
+            series[1][0] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        """Observe the wall time of the ``with`` block (also when it raises)."""
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: object) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def dump(self) -> List[Tuple[LabelValues, Any]]:
+        with self._lock:
+            return [(key, [list(counts), total[0]]) for key, (counts, total) in self._series.items()]
+
+    def blank(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, self.labelnames, self.buckets)
+
+    def absorb(self, key: LabelValues, state: Any, worker: str, live: bool, own: bool) -> None:
+        counts, total = state
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        for position, count in enumerate(counts):
+            series[0][position] += count
+        series[1][0] += total
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._series.items())
+        lines: List[str] = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _number(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), multiprocess_mode: str = "sum"
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, multiprocess_mode))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+    def dump(self) -> Dict[str, List[Tuple[LabelValues, Any]]]:
+        """State of every metric by name (JSON-serialisable), for :meth:`render_merged` in another process."""
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.dump() for metric in metrics}
+
+    def render_merged(self, dumps: Iterable[Tuple[str, bool, Dict[str, Any]]], own: str) -> str:
+        """Render the metrics of several processes as one.
+
+        ``dumps`` yields ``(worker, live, dump)`` per other process; this
+        process's live state is merged in as worker ``own``.
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        merged = {metric.name: metric.blank() for metric in metrics}
+        for worker, live, dump in [*dumps, (own, True, self.dump())]:
+            for name, series in dump.items():
+                metric = merged.get(name)
+                if metric is None:
+                    continue  # written by a different version of the code
+                for key, state in series:
+                    metric.absorb(tuple(key), state, worker, live, worker == own)
+        return "".join(metric.render() for metric in merged.values())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+REGISTRY = Registry()
+
+ETL_STAGE_SECONDS = REGISTRY.histogram(
+    "benzin_etl_stage_seconds", "Duration of ETL stages (sweep, prices, weather, persist, features, archive, cycle).",
+    ("stage",),
+)
+UPSTREAM_REQUEST_SECONDS = REGISTRY.histogram(
+    "benzin_upstream_request_seconds", "Latency of upstream HTTP attempts.", ("service", "endpoint", "outcome"),
+)
+UPSTREAM_FALLBACKS = REGISTRY.counter(
+    "benzin_upstream_fallbacks_total",
+    "Upstream calls answered from the last-good cache or short-circuited by the breaker.",
+    ("service", "endpoint", "reason"),
+)
+DB_COMMIT_SECONDS = REGISTRY.histogram(
+    "benzin_db_commit_seconds", "Duration of SQLite write transactions (statement execution and commit).", ("table",),
+)
+FORECAST_BUILD_SECONDS = REGISTRY.histogram(
+    "benzin_forecast_build_seconds", "Duration of forecast builds from the local store.", ("kind",),
+)
+FORECAST_CACHE_REQUESTS = REGISTRY.counter(
+    "benzin_forecast_cache_requests_total",
+    "Forecast cache lookups by outcome (hit, stale, miss, coalesced), per cache (default, region).",
+    ("cache", "result"),
+)
+FORECAST_CACHE_EVICTIONS = REGISTRY.counter(
+    "benzin_forecast_cache_evictions_total", "Cached forecasts evicted to stay within the size bound.", ("cache",),
+)
+FORECAST_CACHE_BYTES = REGISTRY.gauge(
+    "benzin_forecast_cache_bytes", "Estimated memory held by cached forecasts.", ("cache",),
+)
+STREAM_CLIENTS = REGISTRY.gauge("benzin_stream_clients", "Connected server-sent event clients.")
+STREAM_MESSAGES_DROPPED = REGISTRY.counter(
+    "benzin_stream_messages_dropped_total", "Stream messages dropped because a client's queue was full.",
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "benzin_http_request_seconds", "API request latency by route template.", ("method", "route", "status"),
+)
+ROWS_INGESTED = REGISTRY.counter(
+    "benzin_rows_ingested_total", "Rows written to SQLite by the ingest pipeline.", ("table",),
+)
+ROWS_DEDUPLICATED = REGISTRY.counter(
+    "benzin_rows_deduplicated_total",
+    "Observations not written because they repeated stored data (unchanged prices, known timestamps).",
+    ("table",),
+)
+DATA_AGE_SECONDS = REGISTRY.gauge(  # computed from the database by the process answering the scrape
+    "benzin_data_age_seconds",
+    "Seconds since the latest successful capture, per source.",
+    ("source",),
+    multiprocess_mode="local",
+)
+STARTUP_SECONDS = REGISTRY.gauge(
+    "benzin_startup_seconds",
+    "Seconds from process start to each startup phase (imports, serving, ready, first_request).",
+    ("phase",),
+    multiprocess_mode="all",
+)
+
+
+__all__ = [
+    "CONTENT_TYPE",
+    "Counter",
+    "DATA_AGE_SECONDS",
+    "DB_COMMIT_SECONDS",
+    "ETL_STAGE_SECONDS",
+    "FORECAST_BUILD_SECONDS",
+    "FORECAST_CACHE_BYTES",
+    "FORECAST_CACHE_EVICTIONS",
+    "FORECAST_CACHE_REQUESTS",
+    "Gauge",
+    "HTTP_REQUEST_SECONDS",
+    "Histogram",
+    "Metric",
+    "REGISTRY",
+    "ROWS_DEDUPLICATED",
+    "ROWS_INGESTED",
+    "Registry",
+    "STARTUP_SECONDS",
+    "STREAM_CLIENTS",
+    "STREAM_MESSAGES_DROPPED",
+    "UPSTREAM_FALLBACKS",
+    "UPSTREAM_REQUEST_SECONDS",
+]
@@ -0,0 +1,100 @@
+"""Startup timing: how long a process takes from exec to serving its first request.
+
+Phases are measured from the process start time reported by the kernel
+(``/proc/self/stat``), so interpreter start-up and module imports are included;
+where ``/proc`` is unavailable the clock starts when this module is imported.
+Each phase is exported as ``benzin_startup_seconds{phase}`` and the whole report
+is logged once the first request has been answered and served from
+``/health/startup``.
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from loguru import logger
+
+from src.observability.metrics import STARTUP_SECONDS
+
+FIRST_REQUEST = "first_request"
+READY = "ready"
+
+
+def _process_started_at() -> float:
+    """Wall-clock time at which the kernel started this process."""
+
+    try:
+        with open("/proc/self/stat", "rb") as stat, open("/proc/uptime", "rb") as uptime:
+            # The command name (field 2) may contain spaces; fields after it are space separated.
+            fields = stat.read().rsplit(b")", 1)[1].split()
+            started_ticks = int(fields[19])  # field 22: starttime, in clock ticks since boot
+            uptime_seconds = float(uptime.read().split()[0])
+        age = uptime_seconds - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+    return time.time() - max(age, 0.0)
+
+
+_STARTED_AT = _process_started_at()
+_phases: Dict[str, float] = {}
+_steps: Dict[str, float] = {}
+
+
+def since_start() -> float:
+    return time.time() - _STARTED_AT
+
+
+def milestone(phase: str) -> float:
+    """Record ``phase`` as reached now (only the first call per phase counts)."""
+
+    reached = _phases.get(phase)
+    if reached is None:
+        reached = _phases[phase] = since_start()
+        STARTUP_SECONDS.set(reached, phase=phase)
+    return reached
+
+
+def reached(phase: str) -> bool:
+    return phase in _phases
+
+
+@contextmanager
+def step(name: str) -> Iterator[None]:
+    """Time one startup step (engine creation, model load, cache warm-up, ...)."""
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _steps[name] = time.perf_counter() - started
+
+
+def first_request_served() -> None:
+    """Called after every response; logs the report once, for the first one."""
+
+    if FIRST_REQUEST in _phases:
+        return
+    milestone(FIRST_REQUEST)
+    timings = report()
+    logger.info(
+        "Startup: first request after {:.3f}s (phases: {}; steps: {})",
+        timings["phases"][FIRST_REQUEST],
+        _format(timings["phases"]),
+        _format(timings["steps"]),
+    )
+
+
+def report() -> Dict[str, Dict[str, Optional[float]]]:
+    return {
+        "phases": {phase: round(seconds, 4) for phase, seconds in _phases.items()},
+        "steps": {name: round(seconds, 4) for name, seconds in _steps.items()},
+    }
+
+
+def _format(timings: Dict[str, Optional[float]]) -> str:
+    return ", ".join(f"{name}={seconds:.3f}s" for name, seconds in timings.items()) or "none"
+
+
+__all__ = ["FIRST_REQUEST", "READY", "first_request_served", "milestone", "reached", "report", "since_start", "step"]
@@ -0,0 +1,165 @@
+"""Standalone scheduler worker: ETL, retraining and archiving.
+
+Run with ``python -m src.worker`` next to the API (``python -m src.main``). Any
+number of workers may be started; they compete for the ``scheduler`` lease in
+SQLite and only the holder runs jobs, the others stay on standby and take over
+once the lease expires. The API then only reads from the store and can run
+several uvicorn workers (``API_WORKERS``) with ``EMBEDDED_SCHEDULER=false``.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import socket
+import uuid
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from loguru import logger
+
+from src.config.settings import Settings, get_settings
+from src.db import lease
+from src.db.session import SessionLocal
+from src.ingest.etl import ETLPipeline
+from src.ingest.http import close_async_http_client
+from src.models.partitions import PartitionedTrainer
+from src.models.train import get_trainer
+from src.observability.exposition import serve_metrics
+
+LEASE_NAME = "scheduler"
+
+Hook = Callable[[], Awaitable[None]]
+
+
+class IngestWorker:
+    """Schedules the ingest/training jobs while holding the scheduler lease.
+
+    ``after_etl`` and ``after_retrain`` hooks let an embedding process (the API
+    with ``EMBEDDED_SCHEDULER=true``) refresh its in-memory state right away.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        after_etl: Optional[Hook] = None,
+        after_retrain: Optional[Hook] = None,
+    ) -> None:
+        self.settings = settings or get_settings()
+        self.holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.after_etl = after_etl
+        self.after_retrain = after_retrain
+        self.etl_pipeline = ETLPipeline()
+        self.trainer = get_trainer()
+        self.partitioned_trainer = PartitionedTrainer(self.settings) if self.settings.train_partition_by else None
+        self.scheduler = AsyncIOScheduler()
+        self.is_leader = False
+        self._lease_task: Optional[asyncio.Task] = None
+
+    async def run_etl_cycle(self) -> None:
+        await self.etl_pipeline.run_all_async()
+        if self.after_etl is not None:
+            await self.after_etl()
+
+    async def run_retrain_cycle(self) -> None:
+        await self.trainer.retrain_async()
+        if self.partitioned_trainer is not None:
+            try:
+                await self.partitioned_trainer.run_async()
+            except Exception:  # pragma: no cover - planning failed (database locked, bad manifest)
+                logger.exception("Partitioned training failed")
+        if self.after_retrain is not None:
+            await self.after_retrain()
+
+    async def start(self) -> None:
+        settings = self.settings
+        self.scheduler.add_job(
+            self.run_etl_cycle,
+            IntervalTrigger(minutes=settings.price_refresh_minutes),
+            id="etl-job",
+            replace_existing=True,
+        )
+        self.scheduler.add_job(
+            self.run_retrain_cycle,
+            IntervalTrigger(hours=settings.retrain_interval_hours),
+            id="retrain-job",
+            replace_existing=True,
+        )
+        self.scheduler.add_job(
+            self.etl_pipeline.archive_history,
+            IntervalTrigger(hours=settings.archive_interval_hours),
+            id="archive-job",
+            replace_existing=True,
+        )
+        # Jobs stay paused until this process holds the lease.
+        self.scheduler.start(paused=True)
+        self._lease_task = asyncio.create_task(self._lease_loop(), name="scheduler-lease")
+
+    async def stop(self) -> None:
+        if self._lease_task is not None:
+            self._lease_task.cancel()
+            await asyncio.gather(self._lease_task, return_exceptions=True)
+        self.scheduler.shutdown(wait=False)
+        if self.is_leader:
+            await asyncio.to_thread(self._release)
+        self.trainer.close()
+
+    async def _lease_loop(self) -> None:
+        ttl = timedelta(seconds=self.settings.scheduler_lease_seconds)
+        interval = max(1.0, self.settings.scheduler_lease_seconds / 3)
+        while True:
+            try:
+                leader = await asyncio.to_thread(self._try_acquire, ttl)
+            except Exception:  # pragma: no cover - database locked or unavailable
+                logger.exception("Scheduler lease renewal failed")
+                leader = False
+            if leader and not self.is_leader:
+                logger.info("Acquired scheduler lease as {}; running jobs", self.holder)
+                self.scheduler.resume()
+            elif not leader and self.is_leader:
+                logger.warning("Lost scheduler lease; pausing jobs")
+                self.scheduler.pause()
+            self.is_leader = leader
+            await asyncio.sleep(interval)
+
+    def _try_acquire(self, ttl: timedelta) -> bool:
+        with SessionLocal() as session:
+            return lease.try_acquire(session, LEASE_NAME, self.holder, ttl)
+
+    def _release(self) -> None:
+        with SessionLocal() as session:
+            lease.release(session, LEASE_NAME, self.holder)
+
+
+async def serve() -> None:
+    worker = IngestWorker()
+    settings = worker.settings
+    metrics_server = None
+    if settings.worker_metrics_port:
+        metrics_server = await serve_metrics(settings.worker_metrics_host, settings.worker_metrics_port)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    await worker.start()
+    logger.info("Scheduler worker {} started", worker.holder)
+    try:
+        await stop.wait()
+    finally:
+        await worker.stop()
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        await close_async_http_client()
+        logger.info("Scheduler worker {} stopped", worker.holder)
+
+
+def run() -> None:
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,53 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from src.config.settings import get_settings
+from src.db import models
+from src.db.archive import ParquetArchive
+from src.db.base import Base
+from src.models.features import load_price_series
+
+STATION_ID = "00000000-0000-0000-0000-000000000001"
+UNTIL = date(2026, 10, 13)
+
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARCHIVE_DIR", str(tmp_path / "archive"))
+    get_settings.cache_clear()
+    yield tmp_path / "archive"
+    get_settings.cache_clear()
+
+
+def _price(captured_at: datetime, price: float) -> models.PriceSnapshot:
+    return models.PriceSnapshot(station_id=STATION_ID, fuel_type="e5", price_eur=price, captured_at=captured_at)
+
+
+def test_prune_keeps_latest_event_and_readers_use_archive(tmp_path, archive_dir) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'archive.db'}", future=True)
+    Base.metadata.create_all(engine)
+    archive = ParquetArchive(archive_dir)
+
+    with Session(engine) as session:
+        session.add(models.Station(id=STATION_ID, name="Test", lat=53.55, lng=9.99))
+        session.add_all([_price(datetime(2026, 10, 10, 8), 1.50), _price(datetime(2026, 10, 12, 9), 1.72)])
+        session.commit()
+        archive.compact(session, until=UNTIL, prune=True)
+
+        # A late row for an archived day gets a higher id than the event actually in effect.
+        session.add(_price(datetime(2026, 10, 10, 11), 1.55))
+        session.commit()
+        archive.compact(session, until=UNTIL, prune=True)
+
+        kept = session.execute(select(models.PriceSnapshot.captured_at, models.PriceSnapshot.price_eur)).all()
+        assert [(captured_at, float(price)) for captured_at, price in kept] == [(datetime(2026, 10, 12, 9), 1.72)]
+        assert len(archive.read_prices()) == 3
+
+        wide = load_price_series(session, datetime(2026, 10, 10), timedelta(minutes=5))
+        series = wide[(STATION_ID, "e5")]
+        assert series[datetime(2026, 10, 10, 9)] == 1.50
+        assert series[datetime(2026, 10, 11, 0)] == 1.55
+        assert series[datetime(2026, 10, 12, 9)] == 1.72
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from src.config.settings import CoverageRegion
+from src.forecast.station_index import KM_PER_DEGREE_LAT, haversine_km
+from src.ingest.coverage import plan_tiles
+
+
+@pytest.mark.parametrize(
+    ("lat", "radius_km", "tile_radius_km"),
+    [(53.5511, 100.0, 25.0), (53.5511, 250.0, 25.0), (60.0, 150.0, 20.0), (48.1, 60.0, 10.0)],
+)
+def test_tiles_cover_every_point_of_the_region(lat: float, radius_km: float, tile_radius_km: float) -> None:
+    region = CoverageRegion(name="test", lat=lat, lng=9.99, radius_km=radius_km)
+    tiles = plan_tiles(region, tile_radius_km)
+
+    rng = np.random.default_rng(0)
+    count = 50_000
+    distance = radius_km * np.sqrt(rng.random(count))
+    bearing = rng.random(count) * 2 * np.pi
+    points_lat = lat + distance * np.sin(bearing) / KM_PER_DEGREE_LAT
+    points_lng = region.lng + distance * np.cos(bearing) / (KM_PER_DEGREE_LAT * np.cos(np.radians(points_lat)))
+    inside = haversine_km(region.lat, region.lng, points_lat, points_lng) <= radius_km
+
+    covered = np.zeros(count, dtype=bool)
+    for tile in tiles:
+        covered |= haversine_km(tile.lat, tile.lng, points_lat, points_lng) <= tile.radius_km
+    assert covered[inside].all(), f"{(~covered[inside]).sum()} of {inside.sum()} points uncovered"
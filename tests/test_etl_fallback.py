@@ -0,0 +1,85 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from src.db import models
+from src.db.base import Base
+from src.db.watermarks import get_watermark
+from src.ingest.etl import ETLPipeline
+from src.ingest.tankerkoenig import AsyncTankerkoenigClient, TankerkoenigClient
+from src.ingest.upstream import CircuitBreaker, Fallback, TokenBucket, Upstream
+from src.ingest.weather_cache import WeatherCache
+from src.ingest.weather_openweather import ONECALL_ENDPOINT, OpenWeatherClient, _onecall_params
+from src.ingest.weather_service import WeatherService, _location
+from src.models.features import CAPTURE_WATERMARK, WEATHER_WATERMARK
+
+STATION_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def _upstream(name: str) -> Upstream:
+    return Upstream(name, TokenBucket(1000.0, 100), CircuitBreaker(failure_threshold=1, reset_seconds=3600))
+
+
+def _open_breaker(upstream: Upstream) -> None:
+    upstream.breaker.record_failure()
+    assert not upstream.breaker.allow()
+
+
+def _session(tmp_path) -> Session:
+    engine = create_engine(f"sqlite:///{tmp_path / 'etl.db'}", future=True)
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+    session.add(models.Station(id=STATION_ID, name="Test", lat=53.55, lng=9.99))
+    session.commit()
+    return session
+
+
+def test_open_breaker_persists_nothing(tmp_path) -> None:
+    tankerkoenig, openweather = _upstream("tankerkoenig"), _upstream("openweather")
+    # One successful call each fills the last-good cache the breaker then falls back to.
+    tankerkoenig.call_sync(
+        "prices.php", {"ids": STATION_ID}, lambda: {"ok": True, "prices": {STATION_ID: {"e5": 1.72}}}
+    )
+    lat, lon = _location(None, None)
+    hourly = {"hourly": [{"dt": int(time.time()) // 3600 * 3600, "temp": 12.0}]}
+    openweather.call_sync(ONECALL_ENDPOINT, _onecall_params(lat, lon), lambda: ('"v1"', hourly))
+    _open_breaker(tankerkoenig)
+    _open_breaker(openweather)
+
+    cache = WeatherCache(path=tmp_path / "weather.npz", ttl_seconds=600)
+    cache.put(lat, lon, [], etag='"v1"')
+    cache.lookup(lat, lon).fetched_at -= 3600  # stale, so the service asks upstream
+    stale_since = cache.lookup(lat, lon).fetched_at
+
+    pipeline = ETLPipeline()
+    pipeline.tk_client = TankerkoenigClient(api_key="test", upstream=tankerkoenig)
+    pipeline.weather_service = WeatherService(cache=cache)
+    pipeline.weather_service.ow_client = OpenWeatherClient(api_key="test", upstream=openweather)
+
+    with _session(tmp_path) as session:
+        pipeline.capture_prices(session)
+        pipeline.capture_weather(session)
+
+        assert session.execute(select(func.count()).select_from(models.PriceSnapshot)).scalar_one() == 0
+        assert session.execute(select(func.count()).select_from(models.WeatherSnapshot)).scalar_one() == 0
+        assert get_watermark(session, CAPTURE_WATERMARK) is None
+        assert get_watermark(session, WEATHER_WATERMARK) is None
+    assert cache.lookup(lat, lon).fetched_at == stale_since
+
+
+def test_fallback_is_marked_and_skipped_by_async_price_fetch() -> None:
+    upstream = _upstream("tankerkoenig")
+    before = datetime.utcnow()
+    upstream.call_sync("prices.php", {"ids": STATION_ID}, lambda: {"ok": True, "prices": {STATION_ID: {"e5": 1.72}}})
+    _open_breaker(upstream)
+
+    result = TankerkoenigClient(api_key="test", upstream=upstream).get_prices([STATION_ID])
+    assert isinstance(result, Fallback)
+    assert result.payload == {STATION_ID: {"e5": 1.72}}
+    assert before <= result.fetched_at <= before + timedelta(seconds=5)
+
+    client = AsyncTankerkoenigClient(api_key="test", upstream=upstream)
+    assert asyncio.run(client.get_prices_many([STATION_ID])) == {}
@@ -0,0 +1,48 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from types import SimpleNamespace
+
+from src.forecast.cache import ForecastCache
+
+
+class SlowBuilder:
+    def __init__(self) -> None:
+        self.builds = 0
+        self._lock = threading.Lock()
+
+    def build(self) -> SimpleNamespace:
+        with self._lock:
+            self.builds += 1
+        time.sleep(0.2)
+        return SimpleNamespace(points=[], generated_at=datetime.utcnow(), encode=lambda fmt: b"{}")
+
+
+def _concurrent_gets(cache: ForecastCache, callers: int = 8) -> list:
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        return list(pool.map(lambda _: cache.get(), range(callers)))
+
+
+def test_cold_misses_share_one_build() -> None:
+    builder = SlowBuilder()
+    cache = ForecastCache(builder=builder, ttl_seconds=60, stale_seconds=60)
+
+    entries = _concurrent_gets(cache)
+
+    assert builder.builds == 1
+    assert all(entry is entries[0] for entry in entries)
+
+
+def test_stale_entry_is_revalidated_once() -> None:
+    builder = SlowBuilder()
+    cache = ForecastCache(builder=builder, ttl_seconds=60, stale_seconds=60)
+    stale = cache.get()
+    stale.built_at -= 90  # past the TTL, inside the stale window
+
+    assert all(entry is stale for entry in _concurrent_gets(cache))
+    deadline = time.monotonic() + 5
+    while cache.entry is stale and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert builder.builds == 2
+    assert cache.entry is not stale
@@ -0,0 +1,33 @@
+import json
+
+import pytest
+
+from src.observability.metrics import Metric, Registry
+
+
+def _registry(requests: int, depth: float, latency: float) -> Registry:
+    registry = Registry()
+    registry.counter("requests_total", "Requests.", ("route",)).inc(requests, route="/prices")
+    registry.gauge("queue_depth", "Queued jobs.").set(depth)
+    registry.gauge("startup_seconds", "Startup time.", multiprocess_mode="all").set(depth)
+    registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)).observe(latency)
+    return registry
+
+
+def test_scrape_merges_every_worker() -> None:
+    own, live, dead = _registry(5, 1.0, 0.05), _registry(4, 6.0, 0.5), _registry(3, 9.0, 2.0)
+    # Workers share their state as JSON, so the merge must accept round-tripped dumps.
+    dumps = [("200", True, json.loads(json.dumps(live.dump()))), ("300", False, json.loads(json.dumps(dead.dump())))]
+
+    text = own.render_merged(dumps, "100")
+
+    assert 'requests_total{route="/prices"} 12' in text  # counters keep dead workers' increments
+    assert "queue_depth 7" in text  # gauges drop workers that exited
+    assert 'startup_seconds{worker="100"} 1' in text and 'startup_seconds{worker="200"} 6' in text
+    assert "latency_seconds_count 3" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+
+
+def test_metric_is_abstract() -> None:
+    with pytest.raises(TypeError):
+        Metric("name", "documentation")  # type: ignore[abstract]
@@ -0,0 +1,107 @@
+import asyncio
+
+from fastapi import FastAPI
+
+from src.api.routes import stream
+from src.api.routes.stream import RETRY_AFTER_SECONDS, RETRY_LATER, _events
+from src.forecast.broadcast import Broadcaster, get_broadcaster
+
+
+def _app(broadcaster: Broadcaster) -> FastAPI:
+    app = FastAPI()
+    app.include_router(stream.router)
+    app.dependency_overrides[get_broadcaster] = lambda: broadcaster
+    return app
+
+
+async def _request(app: FastAPI, receive, send) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/stream/forecast",
+        "raw_path": b"/stream/forecast",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    try:
+        await app(scope, receive, send)
+    except* OSError:
+        pass
+
+
+def test_disconnect_before_body_releases_nothing() -> None:
+    broadcaster = Broadcaster(max_subscribers=2)
+    app = _app(broadcaster)
+
+    async def receive() -> dict:
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        raise OSError("client went away")  # the connection is gone before the response starts
+
+    async def run() -> None:
+        for _ in range(5):
+            await _request(app, receive, send)
+
+    asyncio.run(run())
+    assert len(broadcaster) == 0
+
+
+def test_disconnect_while_streaming_unsubscribes() -> None:
+    broadcaster = Broadcaster(max_subscribers=2)
+    app = _app(broadcaster)
+    disconnected = asyncio.Event()
+    bodies = []
+
+    async def receive() -> dict:
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.body" and message.get("body"):
+            bodies.append(message["body"])
+
+    async def run() -> None:
+        broadcaster.publish(b"event: forecast\ndata: {}\n\n")
+        request = asyncio.create_task(_request(app, receive, send))
+        while not bodies:
+            await asyncio.sleep(0.01)
+        assert len(broadcaster) == 1
+        disconnected.set()
+        await asyncio.wait_for(request, 5)
+
+    asyncio.run(run())
+    assert bodies == [b"event: forecast\ndata: {}\n\n"]
+    assert len(broadcaster) == 0
+
+
+def test_full_broadcaster_asks_clients_to_back_off() -> None:
+    broadcaster = Broadcaster(max_subscribers=1)
+    messages = []
+
+    async def receive() -> dict:
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    async def run() -> list:
+        subscription = broadcaster.subscribe()
+        try:
+            await _request(_app(broadcaster), receive, send)
+            # A client that passed the handler's check but lost the race for the last slot.
+            return [chunk async for chunk in _events(broadcaster, keepalive=60)]
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    raced = asyncio.run(run())
+    start = messages[0]
+    assert start["status"] == 503
+    assert (b"retry-after", str(RETRY_AFTER_SECONDS).encode()) in start["headers"]
+    assert raced == [RETRY_LATER]